@@ -3,6 +3,7 @@ from fastapi.responses import StreamingResponse, JSONResponse, FileResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import asyncio, time, os, random, string, json
+from contextlib import asynccontextmanager
 from typing import Optional, Dict, Any, List
 from fastapi import HTTPException
 from pydantic import BaseModel
@@ -52,16 +53,26 @@ from services.medical_knowledge_graph import kg_service
 from services.medical_association_service import medical_association_service
 from services.medical_intent_service import recognize_medical_intent
 from services.qwen_intent_service import recognize_qwen_medical_intent
-from services.smart_intent_service import recognize_medical_intent as recognize_smart_medical_intent
+from services.smart_intent_service import arecognize_medical_intent as arecognize_smart_medical_intent
 from services.medical_taxonomy import MedicalDepartment, DocumentType, DiseaseCategory
 from fastapi.responses import StreamingResponse, JSONResponse
 # 原始RAG服务保留用于兼容性
 # 已移除通用聊天依赖，保留医疗相关服务
 
+# ---------------- 启动预热 ----------------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """启动时预建Neo4j连接池中的空闲连接，避免首个请求承担握手延迟"""
+    adapter = kg_service.kg.neo4j_adapter
+    if adapter is not None:
+        await adapter.awarmup(int(os.getenv("NEO4J_POOL_WARMUP", "4")))
+    yield
+
 app = FastAPI(
     title="九天老师公开课：多模态RAG系统API",
     version="1.0.0",
-    description="九天老师公开课《多模态RAG系统开发实战》后端API。"
+    description="九天老师公开课《多模态RAG系统开发实战》后端API。",
+    lifespan=lifespan
 )
 
 # 允许前端本地联调
@@ -766,7 +777,7 @@ async def medical_qa(req: MedicalChatRequest):
         if not req.department and not req.documentType and not req.diseaseCategory:
             intent_method = req.intentRecognitionMethod or "smart"
             if intent_method == "smart":
-                intent = recognize_smart_medical_intent(question)
+                intent = await arecognize_smart_medical_intent(question)
                 department = intent.get('department')
                 document_type = intent.get('document_type')
                 disease_category = intent.get('disease_category')
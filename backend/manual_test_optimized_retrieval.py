@@ -5,7 +5,6 @@
 
 import asyncio
 import json
-from services.enhanced_rag_service import EnhancedMedicalRAGService
 from services.query_quality_assessor import QueryQualityAssessor
 
 
@@ -16,8 +15,9 @@ async def test_optimized_retrieval():
     print("优化后检索流程测试")
     print("=" * 80)
     
-    # 初始化服务
+    # 初始化服务（检索服务依赖向量模型等重型组件，只在完整流程测试时导入）
     try:
+        from services.enhanced_rag_service import EnhancedMedicalRAGService
         rag_service = EnhancedMedicalRAGService()
         quality_assessor = QueryQualityAssessor()
         print("✅ 服务初始化成功")
@@ -1,5 +1,6 @@
 # services/medical_knowledge_graph.py
 from __future__ import annotations
+import copy
 import json
 import re
 from typing import Dict, List, Set, Tuple, Optional, Any
@@ -10,6 +11,8 @@ from collections import defaultdict, Counter
 import pickle
 import os
 
+from .cache_service import cache_service
+
 class EntityType(Enum):
     """实体类型枚举"""
     DISEASE = "disease"
@@ -597,7 +600,16 @@ class MedicalKnowledgeGraphService:
         self.kg = medical_kg
     
     async def enhance_query_with_kg(self, query: str) -> Dict[str, Any]:
-        """使用知识图谱增强查询"""
+        """使用知识图谱增强查询（相同查询命中 kg_enhancement 缓存时直接返回）"""
+        cached = cache_service.get('kg_enhancement', query)
+        if cached is not None:
+            return copy.deepcopy(cached)
+
+        result = self._enhance_query_uncached(query)
+        cache_service.set('kg_enhancement', query, copy.deepcopy(result), ttl=600)
+        return result
+    
+    def _enhance_query_uncached(self, query: str) -> Dict[str, Any]:
         # 提取查询中的实体
         entities = self.kg.extract_entities_from_text(query)
         
@@ -680,7 +692,10 @@ class MedicalKnowledgeGraphService:
     
     async def update_kg_from_documents(self, documents: List[str]) -> Dict[str, Any]:
         """从文档更新知识图谱"""
-        return self.kg.update_from_documents(documents)
+        result = self.kg.update_from_documents(documents)
+        # 图谱已变化，之前的增强结果不再可靠
+        cache_service.invalidate('kg_enhancement')
+        return result
 
 # 全局服务实例
 kg_service = MedicalKnowledgeGraphService()
\ No newline at end of file
@@ -39,6 +39,14 @@ class ProcessedChunk:
     metadata: Dict
     embedding_text: str  # 用于向量化的文本
 
+@dataclass
+class StructureChunk:
+    """结构识别得到的原始块（大量创建，使用 __slots__ 省去每个实例的 __dict__）"""
+    __slots__ = ('content', 'type', 'title')
+    content: str
+    type: str  # 'title', 'paragraph', 'list', 'table'
+    title: str
+
 class MedicalTermNormalizer:
     """医疗术语标准化器"""
     
@@ -170,6 +178,23 @@ class MedicalEntityExtractor:
 class MedicalTextSplitter:
     """医疗文档分割器"""
     
+    # 标题模式：数字编号、中文数字编号、短文本（合并为一个预编译正则，逐行只匹配一次）
+    _TITLE_RE = re.compile(
+        r'^(?:\d+[\.\、]\s*[\u4e00-\u9fff]+'
+        r'|[一二三四五六七八九十]+[\.\、]\s*[\u4e00-\u9fff]+'
+        r'|[\u4e00-\u9fff]{2,20}$)'
+    )
+    # 列表模式：项目符号、数字列表、字母列表、括号数字
+    _LIST_RE = re.compile(
+        r'^(?:[•·▪▫◦‣⁃]\s+'
+        r'|\d+[\.\)]\s+'
+        r'|[a-zA-Z][\.\)]\s+'
+        r'|[\(（]\d+[\)）]\s+)'
+    )
+    _CN_NUMERALS = frozenset('一二三四五六七八九十')
+    # 列表项可能的首字符（数字与字母另行判断），首字符不符时无需运行正则
+    _LIST_LEADS = frozenset('•·▪▫◦‣⁃(（')
+    
     def __init__(self, chunk_size: int = 500, chunk_overlap: int = 50):
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
@@ -190,104 +215,87 @@ class MedicalTextSplitter:
         documents = []
         for chunk_info in structured_chunks:
             # 进一步分割过长的块
-            if len(chunk_info['content']) > self.chunk_size:
-                sub_chunks = self.base_splitter.split_text(chunk_info['content'])
+            if len(chunk_info.content) > self.chunk_size:
+                sub_chunks = self.base_splitter.split_text(chunk_info.content)
                 for i, sub_chunk in enumerate(sub_chunks):
                     doc_metadata = {
                         **metadata,
-                        'chunk_type': chunk_info['type'],
-                        'section_title': chunk_info.get('title', ''),
+                        'chunk_type': chunk_info.type,
+                        'section_title': chunk_info.title,
                         'sub_chunk_index': i
                     }
                     documents.append(Document(page_content=sub_chunk, metadata=doc_metadata))
             else:
                 doc_metadata = {
                     **metadata,
-                    'chunk_type': chunk_info['type'],
-                    'section_title': chunk_info.get('title', '')
+                    'chunk_type': chunk_info.type,
+                    'section_title': chunk_info.title
                 }
-                documents.append(Document(page_content=chunk_info['content'], metadata=doc_metadata))
+                documents.append(Document(page_content=chunk_info.content, metadata=doc_metadata))
         
         return documents
     
-    def _identify_document_structure(self, text: str) -> List[Dict]:
+    def _identify_document_structure(self, text: str) -> List[StructureChunk]:
         """识别文档结构"""
         chunks = []
-        lines = text.split('\n')
-        current_chunk = {'content': '', 'type': 'paragraph', 'title': ''}
+        # 当前块的行先缓存在列表中，结束时一次性拼接，避免逐行 += 反复复制字符串
+        current_lines, current_type, current_title = [], 'paragraph', ''
         
-        for line in lines:
+        for line in text.split('\n'):
             line = line.strip()
             if not line:
                 continue
             
-            # 识别标题
-            if self._is_title(line):
-                if current_chunk['content']:
-                    chunks.append(current_chunk)
-                current_chunk = {'content': line, 'type': 'title', 'title': line}
-            
-            # 识别列表
-            elif self._is_list_item(line):
-                if current_chunk['type'] != 'list':
-                    if current_chunk['content']:
-                        chunks.append(current_chunk)
-                    current_chunk = {'content': line, 'type': 'list', 'title': ''}
-                else:
-                    current_chunk['content'] += '\n' + line
-            
-            # 识别表格
-            elif self._is_table_row(line):
-                if current_chunk['type'] != 'table':
-                    if current_chunk['content']:
-                        chunks.append(current_chunk)
-                    current_chunk = {'content': line, 'type': 'table', 'title': ''}
-                else:
-                    current_chunk['content'] += '\n' + line
+            line_type = self._classify_line(line)
+            # 同类行并入当前块；普通段落还可并入标题块
+            if line_type != 'title' and (line_type == current_type or (line_type == 'paragraph' and current_type == 'title')):
+                current_lines.append(line)
+                continue
             
-            # 普通段落
-            else:
-                if current_chunk['type'] not in ['paragraph', 'title']:
-                    if current_chunk['content']:
-                        chunks.append(current_chunk)
-                    current_chunk = {'content': line, 'type': 'paragraph', 'title': ''}
-                else:
-                    if current_chunk['content']:
-                        current_chunk['content'] += '\n' + line
-                    else:
-                        current_chunk['content'] = line
+            if current_lines:
+                chunks.append(StructureChunk('\n'.join(current_lines), current_type, current_title))
+            current_lines, current_type = [line], line_type
+            current_title = line if line_type == 'title' else ''
         
-        if current_chunk['content']:
-            chunks.append(current_chunk)
+        if current_lines:
+            chunks.append(StructureChunk('\n'.join(current_lines), current_type, current_title))
         
         return chunks
     
+    def _classify_line(self, line: str) -> str:
+        """单次判定行类型：title / list / table / paragraph
+
+        先按首字符过滤，只有可能命中时才运行对应正则，普通段落行通常无需任何正则匹配
+        """
+        first = line[0]
+        if first.isdigit() or '\u4e00' <= first <= '\u9fff':
+            if self._is_title(line):
+                return 'title'
+        if first.isdigit() or (first.isascii() and first.isalpha()) or first in self._LIST_LEADS:
+            if self._is_list_item(line):
+                return 'list'
+        if self._is_table_row(line):
+            return 'table'
+        return 'paragraph'
+    
     def _is_title(self, line: str) -> bool:
         """判断是否为标题"""
-        # 标题模式：数字编号、短文本、特定关键词
-        title_patterns = [
-            r'^\d+[\.\、]\s*[\u4e00-\u9fff]+',  # 数字编号
-            r'^[一二三四五六七八九十]+[\.\、]\s*[\u4e00-\u9fff]+',  # 中文数字编号
-            r'^[\u4e00-\u9fff]{2,20}$',  # 短文本
-        ]
-        
-        return any(re.match(pattern, line) for pattern in title_patterns) and len(line) < 50
+        if len(line) >= 50:
+            return False
+        # 非数字/中文数字开头时只可能命中“短文本”模式（整行 2-20 个汉字），长句直接排除
+        first = line[0]
+        if len(line) > 20 and not first.isdigit() and first not in self._CN_NUMERALS:
+            return False
+        return self._TITLE_RE.match(line) is not None
     
     def _is_list_item(self, line: str) -> bool:
         """判断是否为列表项"""
-        list_patterns = [
-            r'^[•·▪▫◦‣⁃]\s+',  # 项目符号
-            r'^\d+[\.\)]\s+',   # 数字列表
-            r'^[a-zA-Z][\.\)]\s+',  # 字母列表
-            r'^[\(（]\d+[\)）]\s+',  # 括号数字
-        ]
-        return any(re.match(pattern, line) for pattern in list_patterns)
+        return self._LIST_RE.match(line) is not None
     
     def _is_table_row(self, line: str) -> bool:
         """判断是否为表格行"""
         # 简单的表格识别：包含多个分隔符
-        separators = ['|', '\t', '  ']
-        return any(sep in line and line.count(sep) >= 2 for sep in separators)
+        return line.count('|') >= 2 or line.count('\t') >= 2 or line.count('  ') >= 2
 
 class MedicalDocumentPreprocessor:
     """医疗文档预处理器主类"""
@@ -6,6 +6,8 @@
 
 import json
 import logging
+import threading
+import time
 from typing import Dict, Any, List, Optional, Tuple
 from .qwen_intent_service import QwenMedicalIntentRecognizer
 from .medical_intent_service import MedicalIntentRecognizer
@@ -18,6 +20,9 @@ from services.medical_taxonomy import MedicalDepartment, DocumentType, DiseaseCa
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 系统资源及其派生索引的有效期（秒）
+RESOURCE_TTL_SECONDS = 60
+
 class SmartMedicalIntentRecognizer:
     """智能医疗意图识别器"""
     
@@ -29,6 +34,11 @@ class SmartMedicalIntentRecognizer:
         # 缓存系统资源信息
         self._system_resources = None
         self._last_resource_update = None
+        # 随资源刷新一次性构建的疾病分类索引：(store_details, 科室->疾病分类, 全部疾病分类) 整体替换，
+        # 读取方拿到的索引与其对应的 store_details 始终一致
+        self._category_snapshot: Tuple[Optional[Dict[str, Any]], Dict[str, List[str]], List[str]] = (None, {}, [])
+        # 合并并发刷新：同一时刻只有一个线程访问索引服务
+        self._resource_lock = threading.Lock()
         
         # 启用简化分类体系
         self.use_simplified_classification = True
@@ -228,28 +238,43 @@ class SmartMedicalIntentRecognizer:
             if v == dis and k not in candidates["candidate_disease_categories"]:
                 candidates["candidate_disease_categories"].append(k)
         # 系统资源中如果有疾病分类信息
-        for store in system_resources.get("store_details", {}).values():
-            c = store.get("disease_category")
-            if c and c not in candidates["candidate_disease_categories"]:
+        _, all_categories = self._category_indexes(system_resources.get("store_details", {}))
+        for c in all_categories:
+            if c not in candidates["candidate_disease_categories"]:
                 candidates["candidate_disease_categories"].append(c)
         candidates["candidate_disease_categories"] = candidates["candidate_disease_categories"][:3]
         
         return candidates
     
     def get_system_resources(self) -> Dict[str, Any]:
-        """获取系统实际资源信息"""
+        """获取系统实际资源信息（有效期内直接复用上次结果）"""
+        if self._system_resources and time.monotonic() - self._last_resource_update < RESOURCE_TTL_SECONDS:
+            return self._system_resources
+        with self._resource_lock:
+            return self._refresh_system_resources()
+    
+    def _refresh_system_resources(self) -> Dict[str, Any]:
+        """从索引服务重新加载资源并重建派生索引（调用方持有 _resource_lock）"""
+        now = time.monotonic()
+        # 等锁期间其他线程可能已完成刷新
+        if self._system_resources and now - self._last_resource_update < RESOURCE_TTL_SECONDS:
+            return self._system_resources
         try:
             # 直接调用底层服务获取实际资源，避免HTTP循环调用
             stats = enhanced_index_service.get_vector_store_statistics()
             
             if stats and stats.get("total_stores", 0) > 0:
-                self._system_resources = {
+                resources = {
                     "departments": stats.get("departments", []),
                     "document_types": stats.get("document_types", []),
                     "store_details": stats.get("store_details", {}),
                     "total_stores": stats.get("total_stores", 0)
                 }
-                logger.info(f"获取系统资源成功: {self._system_resources}")
+                # 先建索引、写时间戳，最后发布资源，无锁读取方看到的始终是完整状态
+                self._build_category_indexes(resources["store_details"])
+                self._last_resource_update = now
+                self._system_resources = resources
+                logger.info("获取系统资源成功: %s", self._system_resources)
                 return self._system_resources
             else:
                 logger.warning("系统中没有可用的向量库")
@@ -258,8 +283,34 @@ class SmartMedicalIntentRecognizer:
             logger.error(f"获取系统资源时发生错误: {str(e)}")
             return self._get_default_resources()
     
+    def _build_category_indexes(self, store_details: Dict[str, Any]) -> None:
+        """构建并保存当前资源快照的疾病分类索引"""
+        self._category_snapshot = (store_details, *self._index_categories(store_details))
+    
+    @staticmethod
+    def _index_categories(store_details: Dict[str, Any]) -> Tuple[Dict[str, List[str]], List[str]]:
+        """单次遍历 store_details，构建 科室->疾病分类 与 全部疾病分类 索引（保持首次出现顺序）"""
+        dept_to_categories: Dict[str, List[str]] = {}
+        all_categories: Dict[str, None] = {}
+        for info in store_details.values():
+            category = info.get("disease_category")
+            if not category:
+                continue
+            all_categories.setdefault(category)
+            categories = dept_to_categories.setdefault(info.get("department"), [])
+            if category not in categories:
+                categories.append(category)
+        return dept_to_categories, list(all_categories)
+    
+    def _category_indexes(self, store_details: Dict[str, Any]) -> Tuple[Dict[str, List[str]], List[str]]:
+        """获取 store_details 对应的疾病分类索引：是当前资源快照时复用缓存，否则现场构建"""
+        snapshot_details, dept_to_categories, all_categories = self._category_snapshot
+        if store_details is snapshot_details:
+            return dept_to_categories, all_categories
+        return self._index_categories(store_details)
+    
     def _get_default_resources(self) -> Dict[str, Any]:
-        """获取默认资源配置"""
+        """获取默认资源配置（不修改已发布快照的分类索引）"""
         return {
             "departments": ["内科", "骨科", "心血管科"],
             "document_types": ["临床指南"],
@@ -277,19 +328,19 @@ class SmartMedicalIntentRecognizer:
         if target_department in self.department_mapping:
             for mapped_dept in self.department_mapping[target_department]:
                 if mapped_dept in available_departments:
-                    logger.info(f"科室映射: {target_department} -> {mapped_dept}")
+                    logger.info("科室映射: %s -> %s", target_department, mapped_dept)
                     return mapped_dept
         
         # 3. 模糊匹配（包含关系）
         for dept in available_departments:
             if target_department in dept or dept in target_department:
-                logger.info(f"科室模糊匹配: {target_department} -> {dept}")
+                logger.info("科室模糊匹配: %s -> %s", target_department, dept)
                 return dept
         
         # 4. 默认选择第一个可用科室
         if available_departments:
             default_dept = available_departments[0]
-            logger.info(f"科室默认匹配: {target_department} -> {default_dept}")
+            logger.info("科室默认匹配: %s -> %s", target_department, default_dept)
             return default_dept
         
         return None
@@ -304,24 +355,20 @@ class SmartMedicalIntentRecognizer:
         if target_type in self.document_type_mapping:
             mapped_type = self.document_type_mapping[target_type]
             if mapped_type in available_types:
-                logger.info(f"文档类型映射: {target_type} -> {mapped_type}")
+                logger.info("文档类型映射: %s -> %s", target_type, mapped_type)
                 return mapped_type
         
         # 3. 默认选择第一个可用类型
         if available_types:
             default_type = available_types[0]
-            logger.info(f"文档类型默认匹配: {target_type} -> {default_type}")
+            logger.info("文档类型默认匹配: %s -> %s", target_type, default_type)
             return default_type
         
         return None
     
     def find_best_disease_category_match(self, target_category: str, store_details: Dict[str, Any]) -> Optional[str]:
-        """寻找最佳疾病分类匹配"""
-        # 获取所有可用的疾病分类
-        available_categories = set()
-        for store_info in store_details.values():
-            if store_info.get("disease_category"):
-                available_categories.add(store_info.get("disease_category"))
+        """寻找最佳疾病分类匹配（store_details 为当前资源快照时复用刷新时构建的索引）"""
+        _, available_categories = self._category_indexes(store_details)
         
         if target_category in available_categories:
             return target_category
@@ -329,21 +376,18 @@ class SmartMedicalIntentRecognizer:
         # 尝试使用简化映射
         mapped = self.simplified_disease_category_mapping.get(target_category)
         if mapped and mapped in available_categories:
-            logger.info(f"疾病分类映射: {target_category} -> {mapped}")
+            logger.info("疾病分类映射: %s -> %s", target_category, mapped)
             return mapped
         
         # 回退到默认：任意可用疾病分类
         if available_categories:
-            return list(available_categories)[0]
+            return available_categories[0]
         return None
     
     def _get_disease_categories_for_department(self, department: str, store_details: Dict[str, Any]) -> List[str]:
         """获取指定科室下的疾病分类集合"""
-        categories = set()
-        for key, info in store_details.items():
-            if info.get("department") == department and info.get("disease_category"):
-                categories.add(info["disease_category"])
-        return list(categories)
+        dept_to_categories, _ = self._category_indexes(store_details)
+        return dept_to_categories.get(department, [])
     
     def _find_best_disease_category_for_department(self, target_category: str, department: str, store_details: Dict[str, Any]) -> Optional[str]:
         """在指定科室内寻找最佳疾病分类匹配"""
@@ -108,7 +108,7 @@ class CacheService:
         for key in expired_keys:
             del cache_dict[key]
         
-        logger.debug(f"清理了 {len(expired_keys)} 个过期缓存条目")
+        logger.debug("清理了 %s 个过期缓存条目", len(expired_keys))
     
     def _evict_lru(self, cache_dict, max_size):
         """LRU淘汰策略"""
@@ -125,7 +125,7 @@ class CacheService:
                 key = sorted_items[i][0]
                 del cache_dict[key]
             
-            logger.debug(f"LRU淘汰了 {evict_count} 个缓存条目")
+            logger.debug("LRU淘汰了 %s 个缓存条目", evict_count)
     
     # 内存缓存方法（原有逻辑）
     def _memory_get(self, cache_type: str, key_data: Any) -> Optional[Any]:
@@ -136,12 +136,12 @@ class CacheService:
             entry = self._cache_impl._cache[key]
             if not entry.is_expired():
                 entry.access()
-                logger.debug(f"缓存命中: {cache_type}")
+                logger.debug("缓存命中: %s", cache_type)
                 return entry.data
             else:
                 # 删除过期条目
                 del self._cache_impl._cache[key]
-                logger.debug(f"缓存过期: {cache_type}")
+                logger.debug("缓存过期: %s", cache_type)
         
         return None
     
@@ -164,7 +164,7 @@ class CacheService:
         )
         
         self._cache_impl._cache[key] = entry
-        logger.debug(f"缓存设置: {cache_type}, TTL: {ttl}s")
+        logger.debug("缓存设置: %s, TTL: %ss", cache_type, ttl)
     
     def _memory_invalidate(self, cache_type: str, key_data: Any = None) -> None:
         """内存缓存失效"""
@@ -173,12 +173,12 @@ class CacheService:
             keys_to_remove = [k for k in self._cache_impl._cache.keys() if k.startswith(f"{cache_type}:")]
             for key in keys_to_remove:
                 del self._cache_impl._cache[key]
-            logger.debug(f"失效所有 {cache_type} 缓存")
+            logger.debug("失效所有 %s 缓存", cache_type)
         else:
             key = self._generate_key(cache_type, key_data)
             if key in self._cache_impl._cache:
                 del self._cache_impl._cache[key]
-                logger.debug(f"失效缓存: {cache_type}")
+                logger.debug("失效缓存: %s", cache_type)
     
     def _memory_get_stats(self) -> Dict[str, Any]:
         """内存缓存统计信息"""
@@ -211,6 +211,13 @@ class CacheService:
         """获取缓存"""
         return self._cache_impl.get(cache_type, key_data)
     
+    async def aget(self, cache_type: str, key_data: Any) -> Optional[Any]:
+        """异步获取缓存（async 调用方使用：Redis 适配器会在后台事件循环上读取 Redis）"""
+        aget = getattr(self._cache_impl, 'aget', None)
+        if aget is not None:
+            return await aget(cache_type, key_data)
+        return self._cache_impl.get(cache_type, key_data)
+    
     def set(self, cache_type: str, key_data: Any, value: Any, ttl: Optional[int] = None) -> None:
         """设置缓存"""
         return self._cache_impl.set(cache_type, key_data, value, ttl)
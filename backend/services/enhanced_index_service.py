@@ -296,11 +296,13 @@ class EnhancedMedicalIndexService:
                 # 清理相关缓存
                 try:
                     from .cache_service import cache_service
+                    from .smart_intent_service import smart_intent_recognizer
                     
                     # 清理查询结果缓存
                     cache_service.invalidate('query_result')
                     cache_service.invalidate('medical_association')
                     cache_service.invalidate('kg_expansion')
+                    smart_intent_recognizer.reload_resources()
                     
                     logger.info(f"已清理相关缓存: department={department}, document_type={document_type}")
                 except Exception as cache_error:
@@ -350,9 +352,11 @@ class EnhancedMedicalIndexService:
                 # 与整库删除保持一致，清理相关缓存
                 try:
                     from .cache_service import cache_service
+                    from .smart_intent_service import smart_intent_recognizer
                     cache_service.invalidate('query_result')
                     cache_service.invalidate('medical_association')
                     cache_service.invalidate('kg_expansion')
+                    smart_intent_recognizer.reload_resources()
                 except Exception as cache_error:
                     logger.warning(f"清理缓存时出现警告: {cache_error}")
                 
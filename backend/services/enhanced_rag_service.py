@@ -237,7 +237,7 @@ class EnhancedMedicalRAGService:
             }
             
             # 检查缓存
-            cached_result = cache_service.get('query_result', cache_key)
+            cached_result = await cache_service.aget('query_result', cache_key)
             if cached_result:
                 logging.info("使用缓存的查询结果")
                 return cached_result
@@ -245,12 +245,12 @@ class EnhancedMedicalRAGService:
             # 1. 智能意图识别（如果未提供department等参数）
             intent_result = None
             if not department and not document_type and not disease_category:
-                from .smart_intent_service import recognize_medical_intent as recognize_smart_medical_intent
+                from .smart_intent_service import arecognize_medical_intent as arecognize_smart_medical_intent
                 from .qwen_intent_service import recognize_qwen_medical_intent
                 from .medical_intent_service import recognize_medical_intent
                 
                 if intent_method == "smart":
-                    intent = recognize_smart_medical_intent(question)
+                    intent = await arecognize_smart_medical_intent(question)
                     department_str = intent.get('department')
                     document_type_str = intent.get('document_type')
                     disease_category_str = intent.get('disease_category')
@@ -374,7 +374,7 @@ class EnhancedMedicalRAGService:
                         with ThreadPoolExecutor(max_workers=2) as executor:
                             # 检查实体提取缓存
                             entity_cache_key = {'text': question}
-                            cached_entities = cache_service.get('entity_extraction', entity_cache_key)
+                            cached_entities = await cache_service.aget('entity_extraction', entity_cache_key)
                             
                             if cached_entities:
                                 extracted_entities = cached_entities
@@ -412,7 +412,7 @@ class EnhancedMedicalRAGService:
                                             'entity_type': entity_type,
                                             'intent_confidence': intent_confidence
                                         }
-                                        cached_suggestions = cache_service.get('kg_expansion', suggestion_cache_key)
+                                        cached_suggestions = await cache_service.aget('kg_expansion', suggestion_cache_key)
                                         
                                         if cached_suggestions:
                                             kg_suggestions.extend(cached_suggestions[:2])
@@ -429,7 +429,7 @@ class EnhancedMedicalRAGService:
                                     
                                     # 获取实体关系
                                     relation_cache_key = {'entity_name': entity_name}
-                                    cached_relations = cache_service.get('entity_relations', relation_cache_key)
+                                    cached_relations = await cache_service.aget('entity_relations', relation_cache_key)
                                     
                                     if cached_relations:
                                         kg_relations.extend(cached_relations[:2])
@@ -498,7 +498,7 @@ class EnhancedMedicalRAGService:
                         'disease_category': disease_category.value if disease_category else None
                     }
                     
-                    cached_associations = cache_service.get('medical_associations', association_cache_key)
+                    cached_associations = await cache_service.aget('medical_associations', association_cache_key)
                     if cached_associations:
                         medical_associations = cached_associations
                         logging.info(f"使用缓存的医疗关联: {len(medical_associations)}个")
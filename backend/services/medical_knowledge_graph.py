@@ -1,5 +1,6 @@
 # services/medical_knowledge_graph.py
 from __future__ import annotations
+import copy
 import json
 import re
 from typing import Dict, List, Set, Tuple, Optional, Any
@@ -18,6 +19,8 @@ except ImportError:
     NEO4jAdapter = None
     NEO4J_ADAPTER_AVAILABLE = False
 
+from .cache_service import cache_service
+
 class EntityType(Enum):
     """实体类型枚举"""
     DISEASE = "disease"
@@ -223,8 +226,7 @@ class MedicalKnowledgeGraph:
         ]
         
         # 添加实体
-        for entity in basic_entities:
-            self.add_entity(entity)
+        self.add_entities(basic_entities)
         
         # 添加基础关系
         basic_relations = [
@@ -243,13 +245,32 @@ class MedicalKnowledgeGraph:
             MedicalRelation("disease_002", "disease_003", RelationType.ASSOCIATED_WITH, 0.6),
         ]
         
-        for relation in basic_relations:
-            self.add_relation(relation)
+        self.add_relations(basic_relations)
         
         self._save_graph()
 
     def add_entity(self, entity: MedicalEntity) -> bool:
         """添加实体"""
+        if not self._add_entity_local(entity):
+            return False
+        
+        # 如果使用Neo4j，也添加到Neo4j
+        if self.use_neo4j and self.neo4j_adapter:
+            self.neo4j_adapter.add_entity(entity)
+        
+        return True
+
+    def add_entities(self, entities: List[MedicalEntity]) -> int:
+        """批量添加实体（Neo4j 侧单次写入），返回成功添加的数量"""
+        added = [entity for entity in entities if self._add_entity_local(entity)]
+        
+        if added and self.use_neo4j and self.neo4j_adapter:
+            self.neo4j_adapter.add_entities(added)
+        
+        return len(added)
+
+    def _add_entity_local(self, entity: MedicalEntity) -> bool:
+        """添加实体到NetworkX并更新索引"""
         try:
             # 添加到NetworkX（始终保持）
             self.entities[entity.id] = entity
@@ -261,10 +282,6 @@ class MedicalKnowledgeGraph:
                 self.entity_index[alias.lower()].add(entity.id)
             self.type_index[entity.entity_type].add(entity.id)
             
-            # 如果使用Neo4j，也添加到Neo4j
-            if self.use_neo4j and self.neo4j_adapter:
-                self.neo4j_adapter.add_entity(entity)
-            
             return True
         except Exception as e:
             print(f"Error adding entity {entity.id}: {e}")
@@ -272,6 +289,26 @@ class MedicalKnowledgeGraph:
 
     def add_relation(self, relation: MedicalRelation) -> bool:
         """添加关系"""
+        if not self._add_relation_local(relation):
+            return False
+        
+        # 如果使用Neo4j，也添加到Neo4j
+        if self.use_neo4j and self.neo4j_adapter:
+            self.neo4j_adapter.add_relation(relation)
+        
+        return True
+
+    def add_relations(self, relations: List[MedicalRelation]) -> int:
+        """批量添加关系（Neo4j 侧单次写入），返回成功添加的数量"""
+        added = [relation for relation in relations if self._add_relation_local(relation)]
+        
+        if added and self.use_neo4j and self.neo4j_adapter:
+            self.neo4j_adapter.add_relations(added)
+        
+        return len(added)
+
+    def _add_relation_local(self, relation: MedicalRelation) -> bool:
+        """添加关系到NetworkX"""
         try:
             if relation.source_id not in self.entities or relation.target_id not in self.entities:
                 return False
@@ -286,10 +323,6 @@ class MedicalKnowledgeGraph:
                 **relation.attributes
             )
             
-            # 如果使用Neo4j，也添加到Neo4j
-            if self.use_neo4j and self.neo4j_adapter:
-                self.neo4j_adapter.add_relation(relation)
-            
             return True
         except Exception as e:
             print(f"Error adding relation: {e}")
@@ -627,7 +660,8 @@ class MedicalKnowledgeGraph:
                     if self.add_entity(entity):
                         new_entities += 1
             
-            # 提取关系（基于模式）
+            # 提取关系（基于模式），每篇文档批量写入
+            doc_relations: List[MedicalRelation] = []
             for relation_type, patterns in self.relation_patterns.items():
                 for pattern in patterns:
                     matches = re.finditer(pattern, doc, re.IGNORECASE)
@@ -641,15 +675,14 @@ class MedicalKnowledgeGraph:
                             
                             for source_entity in source_entities:
                                 for target_entity in target_entities:
-                                    relation = MedicalRelation(
+                                    doc_relations.append(MedicalRelation(
                                         source_id=source_entity.id,
                                         target_id=target_entity.id,
                                         relation_type=relation_type,
                                         confidence=0.7,
                                         evidence=[doc[:200]]  # 保存证据片段
-                                    )
-                                    if self.add_relation(relation):
-                                        new_relations += 1
+                                    ))
+            new_relations += self.add_relations(doc_relations)
         
         if new_entities > 0 or new_relations > 0:
             self._save_graph()
@@ -671,7 +704,16 @@ class MedicalKnowledgeGraphService:
         self.kg = medical_kg
     
     async def enhance_query_with_kg(self, query: str) -> Dict[str, Any]:
-        """使用知识图谱增强查询"""
+        """使用知识图谱增强查询（相同查询命中 kg_enhancement 缓存时直接返回）"""
+        cached = await cache_service.aget('kg_enhancement', query)
+        if cached is not None:
+            return copy.deepcopy(cached)
+
+        result = self._enhance_query_uncached(query)
+        cache_service.set('kg_enhancement', query, copy.deepcopy(result), ttl=600)
+        return result
+    
+    def _enhance_query_uncached(self, query: str) -> Dict[str, Any]:
         # 提取查询中的实体
         entities = self.kg.extract_entities_from_text(query)
         
@@ -754,7 +796,10 @@ class MedicalKnowledgeGraphService:
     
     async def update_kg_from_documents(self, documents: List[str]) -> Dict[str, Any]:
         """从文档更新知识图谱"""
-        return self.kg.update_from_documents(documents)
+        result = self.kg.update_from_documents(documents)
+        # 图谱已变化，之前的增强结果不再可靠
+        cache_service.invalidate('kg_enhancement')
+        return result
 
 # 全局服务实例
 kg_service = MedicalKnowledgeGraphService()
\ No newline at end of file
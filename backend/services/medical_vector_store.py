@@ -9,8 +9,10 @@ import pickle
 from typing import List, Dict, Optional, Tuple, Any
 from pathlib import Path
 import numpy as np
+import faiss
 from dataclasses import dataclass, asdict
 import logging
+from functools import lru_cache
 
 from langchain.vectorstores import FAISS
 from langchain.embeddings.base import Embeddings
@@ -20,6 +22,16 @@ from .medical_taxonomy import MedicalDepartment, DocumentType, DiseaseCategory
 
 logger = logging.getLogger(__name__)
 
+# FAISS OpenMP 线程数（进程级设置，仅在导入时应用一次；未配置时保持 FAISS 默认值）
+if os.getenv("FAISS_OMP_THREADS"):
+    faiss.omp_set_num_threads(int(os.getenv("FAISS_OMP_THREADS")))
+
+def _v(e: Any) -> Optional[str]:
+    """安全地获取枚举值（兼容已是字符串的情况），None 保持为 None"""
+    if e is None:
+        return None
+    return getattr(e, 'value', None) or str(e)
+
 @dataclass
 class VectorStoreMetadata:
     """向量存储元数据"""
@@ -33,6 +45,17 @@ class VectorStoreMetadata:
 class MedicalVectorStoreManager:
     """医疗分层向量存储管理器"""
     
+    # 全局索引检索时的候选放大倍数（用于抵消元数据过滤带来的损耗）
+    SEARCH_OVERSAMPLE = 4
+    # 增量日志（WAL）段数量达到该值时合并回 index.faiss
+    WAL_COMPACT_THRESHOLD = 8
+    # 查询向量 LRU 缓存容量
+    EMBED_CACHE_SIZE = 1024
+    # 文档数低于该值的存储在 optimize_stores 中会被合并
+    SMALL_STORE_THRESHOLD = 100
+    # 全局索引中已移除条目占比超过该值时重建
+    GLOBAL_TOMBSTONE_RATIO = 0.25
+    
     def __init__(self, 
                  base_path: str = "data/vector_stores",
                  embeddings: Optional[Embeddings] = None):
@@ -42,6 +65,19 @@ class MedicalVectorStoreManager:
         self.vector_stores: Dict[str, FAISS] = {}
         self.metadata_cache: Dict[str, VectorStoreMetadata] = {}
         
+        # 全局检索索引：所有存储的向量汇总到一个 IndexIDMap2 中，按存储编码过滤
+        self._global_index: Optional[faiss.IndexIDMap2] = None
+        self._global_store_codes = np.empty(0, dtype=np.int32)
+        self._global_entries: List[Tuple[str, str]] = []  # 全局ID -> (store_key, docstore_id)
+        self._store_codes: Dict[str, int] = {}
+        self._global_dirty = True
+        self._global_pending: set = set()  # 尚未加入全局索引（加载或追加失败）的存储，检索时重试
+        
+        # 相同查询只向 embedding 服务请求一次
+        self._cached_embed_query = lru_cache(maxsize=self.EMBED_CACHE_SIZE)(
+            lambda text: tuple(self.embeddings.embed_query(text))
+        )
+        
         # 加载现有的向量存储
         self._load_existing_stores()
     
@@ -65,7 +101,8 @@ class MedicalVectorStoreManager:
             return
             
         for store_dir in self.base_path.iterdir():
-            if store_dir.is_dir():
+            # 跳过以 . 开头的内部目录（如合并用的 .merging）
+            if store_dir.is_dir() and not store_dir.name.startswith('.'):
                 try:
                     # 加载元数据
                     metadata_file = store_dir / "metadata.json"
@@ -109,6 +146,7 @@ class MedicalVectorStoreManager:
                 self.embeddings,
                 allow_dangerous_deserialization=True
             )
+            self._replay_wal(store_path, vector_store)
             self.vector_stores[store_key] = vector_store
             logger.info(f"成功加载向量存储: {store_key}")
             return vector_store
@@ -116,8 +154,226 @@ class MedicalVectorStoreManager:
         except Exception as e:
             logger.error(f"加载向量存储 {store_key} 失败: {e}")
             return None
-    
-    def add_documents(self, 
+
+    def _list_wal_segments(self, store_path: Path) -> List[Path]:
+        """按序列号列出存储目录下的增量日志段"""
+        return sorted(store_path.glob("wal_*.npy"))
+
+    def _replay_wal(self, store_path: Path, vector_store: FAISS):
+        """在基础索引之上依次回放增量日志段；损坏或不完整的段隔离后跳过，不影响存储加载"""
+        for vectors_file in self._list_wal_segments(store_path):
+            docs_file = vectors_file.with_suffix(".json")
+            try:
+                vectors = np.load(vectors_file)
+                with open(docs_file, 'r', encoding='utf-8') as f:
+                    entries = json.load(f)
+                if vectors.ndim != 2 or len(vectors) != len(entries):
+                    raise ValueError(f"向量数 {len(vectors)} 与文档数 {len(entries)} 不一致")
+            except (OSError, EOFError, ValueError) as e:
+                logger.warning(f"增量日志段 {vectors_file} 不完整，已隔离并跳过: {e}")
+                self._quarantine_wal_segment(vectors_file)
+                continue
+            vector_store.add_embeddings(
+                [(e["page_content"], vec) for e, vec in zip(entries, vectors.tolist())],
+                metadatas=[e["metadata"] for e in entries],
+                ids=[e["id"] for e in entries]
+            )
+
+    def _quarantine_wal_segment(self, vectors_file: Path):
+        """将损坏的增量日志段改名为 *.corrupt，保留现场且不再参与回放"""
+        for path in (vectors_file, vectors_file.with_suffix(".json")):
+            if path.exists():
+                os.replace(path, path.with_name(path.name + ".corrupt"))
+
+    def _append_wal(self, store_path: Path, vector_store: FAISS, start: int):
+        """将 [start, ntotal) 区间新增的向量与文档写为一个增量日志段"""
+        n = vector_store.index.ntotal - start
+        if n <= 0:
+            return
+        segments = self._list_wal_segments(store_path)
+        seq = int(segments[-1].stem.split("_")[1]) + 1 if segments else 0
+        vectors_file = store_path / f"wal_{seq:04d}.npy"
+
+        entries = []
+        for i in range(start, start + n):
+            doc_id = vector_store.index_to_docstore_id[i]
+            doc = vector_store.docstore.search(doc_id)
+            entries.append({"id": doc_id, "page_content": doc.page_content, "metadata": doc.metadata})
+        try:
+            payload = json.dumps(entries, ensure_ascii=False)
+        except TypeError as e:
+            # 元数据含非 JSON 类型时改为完整保存（docstore 以 pickle 持久化，类型不丢失）
+            logger.warning(f"增量日志无法序列化文档元数据，改为完整保存: {e}")
+            self._save_full(store_path, vector_store)
+            return
+
+        # 两个文件都先写临时文件再原子替换，向量最后就位：回放以 .npy 为准，不会读到半个段
+        docs_file = vectors_file.with_suffix(".json")
+        docs_tmp = docs_file.with_name(docs_file.name + ".tmp")
+        with open(docs_tmp, 'w', encoding='utf-8') as f:
+            f.write(payload)
+        os.replace(docs_tmp, docs_file)
+        vectors_tmp = vectors_file.with_name(vectors_file.name + ".tmp")
+        with open(vectors_tmp, 'wb') as f:
+            np.save(f, vector_store.index.reconstruct_n(start, n))
+        os.replace(vectors_tmp, vectors_file)
+
+        if len(segments) + 1 >= self.WAL_COMPACT_THRESHOLD:
+            self._save_full(store_path, vector_store)
+
+    def _save_full(self, store_path: Path, vector_store: FAISS):
+        """完整保存向量存储，并清理已被合并的增量日志段"""
+        store_path.mkdir(parents=True, exist_ok=True)
+        vector_store.save_local(str(store_path))
+        # 同时清理中断写入残留的临时文件与孤立文档文件（隔离的 *.corrupt 保留）
+        for wal_file in store_path.glob("wal_*"):
+            if not wal_file.name.endswith(".corrupt"):
+                wal_file.unlink(missing_ok=True)
+
+    def compact_store(self, store_key: str) -> bool:
+        """将存储的增量日志段合并回 index.faiss"""
+        store_path = self._get_store_path(store_key)
+        if not self._list_wal_segments(store_path):
+            return True
+        vector_store = self._load_vector_store(store_key)
+        if vector_store is None:
+            return False
+        self._save_full(store_path, vector_store)
+        logger.info(f"已合并向量存储增量日志: {store_key}")
+        return True
+
+    def _save_metadata(self, store_path: Path, metadata: VectorStoreMetadata):
+        """保存存储元数据到 metadata.json"""
+        # 转换枚举为字符串以便JSON序列化
+        metadata_dict = asdict(metadata)
+        metadata_dict['department'] = metadata.department.value if metadata.department else None
+        metadata_dict['document_type'] = metadata.document_type.value if metadata.document_type else None
+        metadata_dict['disease_category'] = metadata.disease_category.value if metadata.disease_category else None
+        
+        with open(store_path / "metadata.json", 'w', encoding='utf-8') as f:
+            json.dump(metadata_dict, f, ensure_ascii=False, indent=2)
+
+    def _get_store_code(self, store_key: str) -> int:
+        """获取存储在全局索引中的数值编码"""
+        code = self._store_codes.get(store_key)
+        if code is None:
+            code = len(self._store_codes)
+            self._store_codes[store_key] = code
+        return code
+
+    def _append_to_global_index(self, store_key: str, vector_store: FAISS, start: int = 0):
+        """将存储中 [start, ntotal) 区间的向量追加到全局索引"""
+        n = vector_store.index.ntotal - start
+        if n <= 0:
+            return
+        vectors = vector_store.index.reconstruct_n(start, n)
+        if self._global_index is None:
+            self._global_index = faiss.IndexIDMap2(faiss.IndexFlatL2(vectors.shape[1]))
+        elif self._global_index.d != vectors.shape[1]:
+            logger.warning(f"向量存储 {store_key} 维度 {vectors.shape[1]} 与全局索引不一致，跳过")
+            return
+
+        offset = len(self._global_entries)
+        ids = np.arange(offset, offset + n, dtype=np.int64)
+        self._global_index.add_with_ids(np.ascontiguousarray(vectors, dtype=np.float32), ids)
+        self._global_entries.extend(
+            (store_key, vector_store.index_to_docstore_id[i]) for i in range(start, start + n)
+        )
+        codes = np.full(n, self._get_store_code(store_key), dtype=np.int32)
+        self._global_store_codes = np.concatenate([self._global_store_codes, codes])
+
+    def _remove_from_global_index(self, store_key: str):
+        """从全局索引中移除指定存储的全部向量"""
+        if self._global_index is None or store_key not in self._store_codes:
+            return
+        mask = self._global_store_codes == self._store_codes[store_key]
+        if mask.any():
+            self._global_index.remove_ids(np.nonzero(mask)[0].astype(np.int64))
+            self._global_store_codes[mask] = -1
+            # 已移除条目仍占用 _global_entries / _global_store_codes，累积过多时下次检索重建
+            tombstones = np.count_nonzero(self._global_store_codes == -1)
+            if tombstones > self.GLOBAL_TOMBSTONE_RATIO * len(self._global_store_codes):
+                self._global_dirty = True
+
+    def _ensure_global_index(self) -> Optional[faiss.IndexIDMap2]:
+        """按需（重新）构建全局索引，并重试之前未能加入的存储"""
+        if self._global_dirty:
+            self._global_index = None
+            self._global_store_codes = np.empty(0, dtype=np.int32)
+            self._global_entries = []
+            self._global_pending = set(self.metadata_cache)
+            self._global_dirty = False
+        if not self._global_pending:
+            return self._global_index
+
+        for store_key in [sk for sk in self.metadata_cache if sk in self._global_pending]:
+            vector_store = self._load_vector_store(store_key)
+            if vector_store is None:
+                continue
+            try:
+                self._append_to_global_index(store_key, vector_store)
+            except Exception as e:
+                logger.error(f"向量存储 {store_key} 加入全局索引失败: {e}")
+                continue
+            self._global_pending.discard(store_key)
+        self._global_pending &= self.metadata_cache.keys()
+        if self._global_pending:
+            logger.warning(f"{len(self._global_pending)} 个向量存储未能加入全局索引，将在下次检索时重试")
+        logger.info(f"全局索引构建完成: {len(self._global_entries)} 个向量")
+        return self._global_index
+
+    def _search_global(self,
+                       queries: List[str],
+                       k: int,
+                       target_groups: List[List[str]],
+                       score_threshold: float = 0.0) -> List[List[Tuple[Document, float]]]:
+        """在全局索引中对多个查询执行一次批量检索，再按各自的目标存储过滤"""
+        batch_results: List[List[Tuple[Document, float]]] = [[] for _ in queries]
+        index = self._ensure_global_index()
+        if index is None or index.ntotal == 0:
+            return batch_results
+
+        target_codes = [
+            np.array([self._store_codes[sk] for sk in set(stores) if sk in self._store_codes], dtype=np.int32)
+            for stores in target_groups
+        ]
+        rows = [i for i, codes in enumerate(target_codes) if codes.size > 0]
+        if not rows:
+            return batch_results
+
+        query_matrix = np.asarray(
+            [self._cached_embed_query(queries[i]) for i in rows], dtype=np.float32
+        )
+
+        # 过滤会丢弃部分候选，先按比例多取，不足时再扩大范围
+        fetch = min(index.ntotal, k * self.SEARCH_OVERSAMPLE)
+        while True:
+            distances, ids = index.search(query_matrix, fetch)
+            hits = []
+            for row, i in enumerate(rows):
+                valid = ids[row] >= 0
+                row_distances, row_ids = distances[row][valid], ids[row][valid]
+                mask = np.isin(self._global_store_codes[row_ids], target_codes[i]) & (row_distances >= score_threshold)
+                hits.append((row_ids[mask][:k], row_distances[mask][:k]))
+            if fetch >= index.ntotal or all(len(row_ids) >= k for row_ids, _ in hits):
+                break
+            fetch = min(index.ntotal, fetch * 4)
+
+        for i, (row_ids, row_distances) in zip(rows, hits):
+            for gid, score in zip(row_ids, row_distances):
+                store_key, docstore_id = self._global_entries[gid]
+                doc = self.vector_stores[store_key].docstore.search(docstore_id)
+                if not isinstance(doc, Document):
+                    continue
+                # 添加存储信息到文档元数据
+                if 'store_key' not in doc.metadata:
+                    doc.metadata['store_key'] = store_key
+                    doc.metadata['department'] = self.metadata_cache[store_key].department.value
+                    doc.metadata['document_type'] = self.metadata_cache[store_key].document_type.value
+                batch_results[i].append((doc, float(score)))
+        return batch_results
+
+    def add_documents(self,
                      documents: List[Document],
                      department: MedicalDepartment,
                      document_type: DocumentType,
@@ -138,18 +394,26 @@ class MedicalVectorStoreManager:
             
             if vector_store is None:
                 # 创建新的向量存储
+                start = 0
                 vector_store = FAISS.from_documents(documents, self.embeddings)
                 self.vector_stores[store_key] = vector_store
                 logger.info(f"创建新的向量存储: {store_key}")
             else:
                 # 添加到现有向量存储
+                start = vector_store.index.ntotal
                 vector_store.add_documents(documents)
                 logger.info(f"向现有向量存储添加 {len(documents)} 个文档: {store_key}")
             
-            # 保存向量存储
+            # 同步追加到全局索引（未构建或该存储待重试时，等待下次检索再整体加入）
+            if not self._global_dirty and store_key not in self._global_pending:
+                self._append_to_global_index(store_key, vector_store, start)
+            
+            # 保存向量存储：新建时写完整索引，追加时只写本次新增的增量日志段
             store_path = self._get_store_path(store_key)
-            store_path.mkdir(parents=True, exist_ok=True)
-            vector_store.save_local(str(store_path))
+            if start == 0:
+                self._save_full(store_path, vector_store)
+            else:
+                self._append_wal(store_path, vector_store, start)
             
             # 更新元数据
             from datetime import datetime
@@ -171,15 +435,7 @@ class MedicalVectorStoreManager:
                 self.metadata_cache[store_key] = metadata
             
             # 保存元数据
-            metadata_file = store_path / "metadata.json"
-            # 转换枚举为字符串以便JSON序列化
-            metadata_dict = asdict(metadata)
-            metadata_dict['department'] = metadata.department.value if metadata.department else None
-            metadata_dict['document_type'] = metadata.document_type.value if metadata.document_type else None
-            metadata_dict['disease_category'] = metadata.disease_category.value if metadata.disease_category else None
-            
-            with open(metadata_file, 'w', encoding='utf-8') as f:
-                json.dump(metadata_dict, f, ensure_ascii=False, indent=2)
+            self._save_metadata(store_path, metadata)
             
             return True
             
@@ -195,10 +451,43 @@ class MedicalVectorStoreManager:
                         disease_category: Optional[DiseaseCategory] = None,
                         score_threshold: float = 0.0) -> List[Tuple[Document, float]]:
         """在指定的向量存储中搜索文档"""
-        results = []
+        target_stores = self._resolve_target_stores(department, document_type, disease_category)
         
-        # 确定要搜索的向量存储
+        # 在全局索引中一次检索，按目标存储过滤
+        try:
+            return self._search_global([query], k, [target_stores], score_threshold)[0]
+        except Exception as e:
+            logger.error(f"全局索引检索失败: {e}")
+            return []
+    
+    def search_documents_batch(self,
+                               searches: List[Dict[str, Any]],
+                               k: int = 5,
+                               score_threshold: float = 0.0) -> List[List[Tuple[Document, float]]]:
+        """批量搜索：每项包含 query 及可选的 department/document_type/disease_category，
+        所有查询合并为一次 FAISS 调用，结果按输入顺序返回"""
+        queries = [item["query"] for item in searches]
+        target_groups = [
+            self._resolve_target_stores(
+                item.get("department"), item.get("document_type"), item.get("disease_category")
+            )
+            for item in searches
+        ]
+        try:
+            return self._search_global(queries, k, target_groups, score_threshold)
+        except Exception as e:
+            logger.error(f"全局索引批量检索失败: {e}")
+            return [[] for _ in searches]
+    
+    def _resolve_target_stores(self,
+                               department: Optional[MedicalDepartment],
+                               document_type: Optional[DocumentType],
+                               disease_category: Optional[DiseaseCategory]) -> List[str]:
+        """确定要搜索的向量存储"""
         target_stores: List[str] = []
+        dept_val = _v(department)
+        dtype_val = _v(document_type)
+        dcat_val = _v(disease_category)
         
         if department and document_type:
             # 精确匹配
@@ -207,112 +496,46 @@ class MedicalVectorStoreManager:
                 target_stores.append(store_key)
             else:
                 # 回退：聚合该科室+文档类型下的所有疾病类别存储
-                fallback_candidates: List[str] = []
-                for sk, metadata in self.metadata_cache.items():
-                    meta_dept = metadata.department.value if hasattr(metadata.department, 'value') else str(metadata.department)
-                    meta_dtype = metadata.document_type.value if hasattr(metadata.document_type, 'value') else str(metadata.document_type)
-                    dept_val = department.value if hasattr(department, 'value') else str(department)
-                    dtype_val = document_type.value if hasattr(document_type, 'value') else str(document_type)
-                    if meta_dept == dept_val and meta_dtype == dtype_val:
-                        # 若用户指定了疾病类别，则优先尝试仅匹配该类别
-                        if disease_category is None:
-                            fallback_candidates.append(sk)
-                        else:
-                            meta_dcat = metadata.disease_category.value if (metadata.disease_category and hasattr(metadata.disease_category, 'value')) else (str(metadata.disease_category) if metadata.disease_category else None)
-                            dcat_val = disease_category.value if hasattr(disease_category, 'value') else str(disease_category)
-                            if meta_dcat == dcat_val:
-                                fallback_candidates.append(sk)
-                            fallback_candidates.append(sk)
-
-                # 如果按指定疾病类别仍无候选，则进一步忽略疾病类别进行聚合
-                if not fallback_candidates and disease_category is not None:
-                    for sk, metadata in self.metadata_cache.items():
-                        meta_dept = metadata.department.value if hasattr(metadata.department, 'value') else str(metadata.department)
-                        meta_dtype = metadata.document_type.value if hasattr(metadata.document_type, 'value') else str(metadata.document_type)
-                        dept_val = department.value if hasattr(department, 'value') else str(department)
-                        dtype_val = document_type.value if hasattr(document_type, 'value') else str(document_type)
-                        if meta_dept == dept_val and meta_dtype == dtype_val:
-                            fallback_candidates.append(sk)
+                same_dept_dtype = [
+                    sk for sk, metadata in self.metadata_cache.items()
+                    if _v(metadata.department) == dept_val and _v(metadata.document_type) == dtype_val
+                ]
+                # 若用户指定了疾病类别，则优先尝试仅匹配该类别；仍无候选时忽略疾病类别进行聚合
+                fallback_candidates = same_dept_dtype
+                if dcat_val is not None:
+                    fallback_candidates = [
+                        sk for sk in same_dept_dtype
+                        if _v(self.metadata_cache[sk].disease_category) == dcat_val
+                    ] or same_dept_dtype
 
                 if fallback_candidates:
                     target_stores.extend(fallback_candidates)
-                    try:
-                        dept_val = department.value if hasattr(department, 'value') else str(department)
-                        dtype_val = document_type.value if hasattr(document_type, 'value') else str(document_type)
-                        dcat_val = disease_category.value if (disease_category and hasattr(disease_category, 'value')) else (str(disease_category) if disease_category else None)
-                        logger.info(
-                            f"未找到精确存储键 {store_key}，触发回退：聚合 '{dept_val}_{dtype_val}_*' 共 {len(fallback_candidates)} 个存储"
-                            + (f"（原疾病类别: {dcat_val}）" if dcat_val else "")
-                        )
-                    except Exception:
-                        # 记录日志失败不影响检索
-                        pass
+                    logger.info(
+                        f"未找到精确存储键 {store_key}，触发回退：聚合 '{dept_val}_{dtype_val}_*' 共 {len(fallback_candidates)} 个存储"
+                        + (f"（原疾病类别: {dcat_val}）" if dcat_val else "")
+                    )
         else:
             # 模糊匹配
             for store_key, metadata in self.metadata_cache.items():
-                meta_dept = metadata.department.value if hasattr(metadata.department, 'value') else str(metadata.department)
-                meta_dtype = metadata.document_type.value if hasattr(metadata.document_type, 'value') else str(metadata.document_type)
-                meta_dcat = metadata.disease_category.value if (metadata.disease_category and hasattr(metadata.disease_category, 'value')) else (str(metadata.disease_category) if metadata.disease_category else None)
-                dept_val = department.value if (department and hasattr(department, 'value')) else (str(department) if department else None)
-                dtype_val = document_type.value if (document_type and hasattr(document_type, 'value')) else (str(document_type) if document_type else None)
-                dcat_val = disease_category.value if (disease_category and hasattr(disease_category, 'value')) else (str(disease_category) if disease_category else None)
-                if dept_val and meta_dept != dept_val:
+                if dept_val and _v(metadata.department) != dept_val:
                     continue
-                if dtype_val and meta_dtype != dtype_val:
+                if dtype_val and _v(metadata.document_type) != dtype_val:
                     continue
-                if dcat_val and meta_dcat != dcat_val:
+                if dcat_val and _v(metadata.disease_category) != dcat_val:
                     continue
                 target_stores.append(store_key)
         
-        # 在每个目标存储中搜索
-        for store_key in target_stores:
-            vector_store = self._load_vector_store(store_key)
-            if vector_store is None:
-                continue
-            
-            try:
-                # 执行相似性搜索
-                store_results = vector_store.similarity_search_with_score(query, k=k)
-                
-                # 过滤低分结果
-                filtered_results = [
-                    (doc, score) for doc, score in store_results 
-                    if score >= score_threshold
-                ]
-                
-                # 添加存储信息到文档元数据
-                for doc, score in filtered_results:
-                    if 'store_key' not in doc.metadata:
-                        doc.metadata['store_key'] = store_key
-                        doc.metadata['department'] = self.metadata_cache[store_key].department.value
-                        doc.metadata['document_type'] = self.metadata_cache[store_key].document_type.value
-                
-                results.extend(filtered_results)
-                
-            except Exception as e:
-                logger.error(f"在向量存储 {store_key} 中搜索失败: {e}")
-        
-        # 按分数排序并返回前k个结果
-        # FAISS返回的是距离分数，距离越小表示越相似，所以使用升序排序
-        results.sort(key=lambda x: x[1], reverse=False)
-        return results[:k]
+        return target_stores
     
     def get_store_statistics(self) -> Dict[str, Dict]:
         """获取所有向量存储的统计信息"""
         stats = {}
         
         for store_key, metadata in self.metadata_cache.items():
-            # 安全地获取枚举值
-            department_value = metadata.department.value if hasattr(metadata.department, 'value') else str(metadata.department)
-            document_type_value = metadata.document_type.value if hasattr(metadata.document_type, 'value') else str(metadata.document_type)
-            disease_category_value = None
-            if metadata.disease_category:
-                disease_category_value = metadata.disease_category.value if hasattr(metadata.disease_category, 'value') else str(metadata.disease_category)
-            
             stats[store_key] = {
-                'department': department_value,
-                'document_type': document_type_value,
-                'disease_category': disease_category_value,
+                'department': _v(metadata.department),
+                'document_type': _v(metadata.document_type),
+                'disease_category': _v(metadata.disease_category) if metadata.disease_category else None,
                 'document_count': metadata.document_count,
                 'created_at': metadata.created_at,
                 'last_updated': metadata.last_updated,
@@ -327,9 +550,14 @@ class MedicalVectorStoreManager:
                     disease_category: Optional[DiseaseCategory] = None) -> bool:
         """删除指定的向量存储"""
         store_key = self._get_store_key(department, document_type, disease_category)
-        
+        return self._delete_store_by_key(store_key)
+
+    def _delete_store_by_key(self, store_key: str) -> bool:
+        """按存储键删除向量存储"""
         try:
             # 从内存中移除
+            self._remove_from_global_index(store_key)
+            self._global_pending.discard(store_key)
             if store_key in self.vector_stores:
                 del self.vector_stores[store_key]
             
@@ -399,10 +627,12 @@ class MedicalVectorStoreManager:
             
             # 重建存储（最简安全做法）
             new_store = FAISS.from_documents(keep_docs, self.embeddings)
+            self._remove_from_global_index(store_key)
             self.vector_stores[store_key] = new_store
+            if not self._global_dirty and store_key not in self._global_pending:
+                self._append_to_global_index(store_key, new_store)
             store_path = self._get_store_path(store_key)
-            store_path.mkdir(parents=True, exist_ok=True)
-            new_store.save_local(str(store_path))
+            self._save_full(store_path, new_store)
             
             # 更新并保存元数据
             from datetime import datetime
@@ -423,13 +653,7 @@ class MedicalVectorStoreManager:
                 )
                 self.metadata_cache[store_key] = meta
             
-            metadata_file = store_path / "metadata.json"
-            meta_dict = asdict(meta)
-            meta_dict['department'] = meta.department.value if meta.department else None
-            meta_dict['document_type'] = meta.document_type.value if meta.document_type else None
-            meta_dict['disease_category'] = meta.disease_category.value if meta.disease_category else None
-            with open(metadata_file, 'w', encoding='utf-8') as f:
-                json.dump(meta_dict, f, ensure_ascii=False, indent=2)
+            self._save_metadata(store_path, meta)
             
             logger.info(f"按文档删除完成: store={store_key}, file_id={file_id}, 删除条目={delete_count}, 保留条目={len(keep_docs)}")
             return delete_count
@@ -517,27 +741,109 @@ class MedicalVectorStoreManager:
             pass
         return docs
 
-def optimize_stores(self):
+    def optimize_stores(self):
         """优化向量存储（合并小存储、重建索引等）"""
         logger.info("开始优化向量存储...")
         
-        # 统计每个科室的文档数量
-        department_stats = {}
+        # 按 科室+文档类型+疾病类别 分组统计小存储；分类不同的存储不能合并，否则会破坏检索过滤
+        small_groups: Dict[Tuple[MedicalDepartment, DocumentType, Optional[DiseaseCategory]], List[str]] = {}
         for store_key, metadata in self.metadata_cache.items():
-            dept = metadata.department.value
-            if dept not in department_stats:
-                department_stats[dept] = []
-            department_stats[dept].append((store_key, metadata.document_count))
-        
-        # 合并小的向量存储
-        for dept, stores in department_stats.items():
-            small_stores = [(key, count) for key, count in stores if count < 100]
-            if len(small_stores) > 1:
-                logger.info(f"发现 {dept} 科室有 {len(small_stores)} 个小向量存储，考虑合并")
-                # 这里可以实现合并逻辑
+            if metadata.document_count < self.SMALL_STORE_THRESHOLD:
+                group = (metadata.department, metadata.document_type, metadata.disease_category)
+                small_groups.setdefault(group, []).append(store_key)
+        
+        # 合并同一分类下的多个小向量存储（如历史遗留的同分类目录）
+        for (department, document_type, disease_category), store_keys in small_groups.items():
+            if len(store_keys) > 1:
+                target_key = self._get_store_key(department, document_type, disease_category)
+                logger.info(f"发现 {target_key} 有 {len(store_keys)} 个小向量存储，开始合并")
+                try:
+                    self._merge_stores(store_keys, department, document_type, disease_category)
+                except Exception as e:
+                    logger.error(f"合并向量存储 {store_keys} 失败: {e}", exc_info=True)
+        
+        # 将各存储（包括未参与合并的疾病类别存储）的增量日志合并回 index.faiss
+        for store_key in list(self.metadata_cache):
+            self.compact_store(store_key)
         
         logger.info("向量存储优化完成")
 
+    def _merge_stores(self,
+                      store_keys: List[str],
+                      department: MedicalDepartment,
+                      document_type: DocumentType,
+                      disease_category: Optional[DiseaseCategory] = None):
+        """将同一分类下多个存储的向量（无需重新 embedding）合并为一个存储
+
+        任一源存储无法加载时抛出异常且不删除任何存储，避免丢失数据。
+        合并结果先完整写入临时目录再重命名为目标存储，之后才删除其余源存储。
+        """
+        import shutil
+        from datetime import datetime
+        target_key = self._get_store_key(department, document_type, disease_category)
+        # 目标存储已存在（例如文档较多未被列为小存储）时一并合并，避免被覆盖
+        if target_key in self.metadata_cache and target_key not in store_keys:
+            store_keys = store_keys + [target_key]
+        
+        text_embeddings: List[Tuple[str, List[float]]] = []
+        metadatas: List[dict] = []
+        ids: List[str] = []
+        created_at = []
+        for store_key in store_keys:
+            vector_store = self._load_vector_store(store_key)
+            if vector_store is None:
+                raise RuntimeError(f"向量存储无法加载，放弃合并: {store_key}")
+            vectors = vector_store.index.reconstruct_n(0, vector_store.index.ntotal)
+            for i, vec in enumerate(vectors.tolist()):
+                doc_id = vector_store.index_to_docstore_id[i]
+                doc = vector_store.docstore.search(doc_id)
+                text_embeddings.append((doc.page_content, vec))
+                # 复制元数据，并去掉检索时写入的 store_key（合并后已失效）
+                metadata = dict(doc.metadata)
+                metadata.pop('store_key', None)
+                metadatas.append(metadata)
+                ids.append(doc_id)
+            created_at.append(self.metadata_cache[store_key].created_at)
+        
+        merged = FAISS.from_embeddings(text_embeddings, self.embeddings, metadatas=metadatas, ids=ids)
+        metadata = VectorStoreMetadata(
+            department=department,
+            document_type=document_type,
+            disease_category=disease_category,
+            created_at=min(created_at),
+            document_count=len(ids),
+            last_updated=datetime.now().isoformat()
+        )
+        
+        # 临时目录不含 metadata.json，启动扫描时不会被当作存储加载
+        staging_dir = self.base_path / ".merging"
+        tmp_path = staging_dir / target_key
+        old_path = staging_dir / f"{target_key}.old"
+        for path in (tmp_path, old_path):
+            if path.exists():
+                shutil.rmtree(path)
+        self._save_full(tmp_path, merged)
+        self._save_metadata(tmp_path, metadata)
+        
+        # 同一文件系统内重命名；旧目标存储先移走，合并结果就位后再清理
+        store_path = self._get_store_path(target_key)
+        if store_path.exists():
+            os.replace(store_path, old_path)
+        os.replace(tmp_path, store_path)
+        
+        for store_key in store_keys:
+            if store_key != target_key:
+                self._delete_store_by_key(store_key)
+        self._remove_from_global_index(target_key)
+        self._global_pending.discard(target_key)
+        self.vector_stores[target_key] = merged
+        self.metadata_cache[target_key] = metadata
+        if not self._global_dirty:
+            self._append_to_global_index(target_key, merged)
+        if old_path.exists():
+            shutil.rmtree(old_path)
+        logger.info(f"已合并 {len(store_keys)} 个向量存储到 {target_key}，共 {len(ids)} 个文档块")
+
 class MedicalSearchEngine:
     """医疗搜索引擎，整合分层向量存储"""
     
@@ -612,27 +918,18 @@ class MedicalSearchEngine:
         """基于症状搜索相关疾病和治疗方案"""
         query = " ".join(symptoms)
         
-        # 优先搜索诊断指南和临床路径
-        results = []
-        
-        # 搜索诊断指南
-        diagnosis_results = self.vector_store_manager.search_documents(
-            query=query,
-            k=k//2,
-            document_type=DocumentType.CLINICAL_GUIDELINE
-        )
-        results.extend(diagnosis_results)
-        
-        # 搜索治疗方案
-        pathway_results = self.vector_store_manager.search_documents(
-            query=query,
-            k=k//2,
-            document_type=DocumentType.TREATMENT_PROTOCOL
+        # 诊断指南与治疗方案合并为一次批量检索
+        diagnosis_results, pathway_results = self.vector_store_manager.search_documents_batch(
+            [
+                {"query": query, "document_type": DocumentType.CLINICAL_GUIDELINE},
+                {"query": query, "document_type": DocumentType.TREATMENT_PROTOCOL},
+            ],
+            k=k//2
         )
-        results.extend(pathway_results)
+        results = diagnosis_results + pathway_results
         
-        # 按分数排序
-        results.sort(key=lambda x: x[1], reverse=True)
+        # 按分数排序（FAISS 返回距离，越小越相似）
+        results.sort(key=lambda x: x[1])
         return results[:k]
     
     def search_drug_interactions(self, drug_name: str, k: int = 10) -> List[Tuple[Document, float]]:
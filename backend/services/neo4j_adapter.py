@@ -1,355 +1,752 @@
 # services/neo4j_adapter.py
 from __future__ import annotations
 import os
+import re
+import copy
 import json
+import time
+import functools
+import threading
 from typing import Dict, List, Set, Tuple, Optional, Any
-from dataclasses import asdict
 import asyncio
-from collections import defaultdict
+from collections import OrderedDict
 
 # 尝试导入Neo4j，如果失败则设置标志
 try:
-    from neo4j import GraphDatabase, Driver
+    from neo4j import AsyncGraphDatabase, AsyncDriver, READ_ACCESS
     from neo4j.exceptions import ServiceUnavailable, AuthError
     NEO4J_AVAILABLE = True
 except ImportError:
     NEO4J_AVAILABLE = False
-    GraphDatabase = None
-    Driver = None
+    AsyncGraphDatabase = None
+    AsyncDriver = None
+    READ_ACCESS = "READ"
+
+# 可选的 orjson（C 实现），未安装时回退到标准库 json；两者输出的 JSON 文本互相兼容
+try:
+    import orjson
+
+    def _json_dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+
+    _json_loads = orjson.loads
+except ImportError:
+    _json_dumps = json.dumps
+    _json_loads = json.loads
+
+# 大多数实体/关系没有附加属性，空字典直接使用预序列化常量，跳过编解码
+_EMPTY_JSON = "{}"
+
+def _encode_attributes(attributes: Optional[Dict[str, Any]]) -> str:
+    return _json_dumps(attributes) if attributes else _EMPTY_JSON
+
+def _decode_attributes(raw: Optional[str]) -> Dict[str, Any]:
+    return _json_loads(raw) if raw and raw != _EMPTY_JSON else {}
 
 from .medical_knowledge_graph import (
     MedicalEntity, MedicalRelation, EntityType, RelationType
 )
 
+# 进程内共享的异步驱动（按 uri+用户名 区分）及其专属事件循环
+_drivers: Dict[Tuple[str, str], "AsyncDriver"] = {}
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """获取运行Neo4j异步I/O的后台事件循环（首次调用时启动）"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="neo4j-adapter-loop", daemon=True).start()
+    return _loop
+
+# 启动时确保存在的约束与索引
+SCHEMA_STATEMENTS = (
+    "CREATE CONSTRAINT entity_id IF NOT EXISTS FOR (e:Entity) REQUIRE e.id IS UNIQUE",
+    "CREATE INDEX entity_type IF NOT EXISTS FOR (e:Entity) ON (e.entity_type)",
+    "CREATE FULLTEXT INDEX entity_name IF NOT EXISTS FOR (e:Entity) ON EACH [e.name, e.alias_text]",
+)
+
+# 为建立全文索引之前写入的实体补齐 alias_text（与写入路径的 " ".join(aliases) 一致）
+BACKFILL_ALIAS_TEXT = """
+MATCH (e:Entity) WHERE e.alias_text IS NULL
+CALL {
+    WITH e
+    SET e.alias_text = reduce(s = '', a IN coalesce(e.aliases, []) | CASE s WHEN '' THEN a ELSE s + ' ' + a END)
+} IN TRANSACTIONS OF 10000 ROWS
+"""
+
+_LUCENE_SPECIAL = re.compile(r'([+\-!(){}\[\]^"~*?:\\/&|])')
+
+def _fulltext_query(name: str) -> str:
+    """构造全文索引的短语查询：名称或别名（alias_text）与输入忽略大小写相同时分词结果一致，必然命中"""
+    escaped = _LUCENE_SPECIAL.sub(r'\\\1', name.strip().lower())
+    return f'"{escaped}"'
+
+# 枚举值 -> 枚举成员，读路径上直接查表
+_ENTITY_TYPES = {t.value: t for t in EntityType}
+_RELATION_TYPES = {t.value: t for t in RelationType}
+
+def _entity_columns(var: str) -> str:
+    """实体属性的 RETURN 投影，使结果为纯字典而非 Node 对象"""
+    return ", ".join(
+        f"{var}.{prop} AS {prop}"
+        for prop in ("id", "name", "entity_type", "aliases", "description", "confidence", "attributes")
+    )
+
+class _ReadCache:
+    """带TTL的LRU读缓存（线程安全）
+
+    写操作通过递增 generation 使旧条目整体失效（键中包含 generation），无需遍历清理。
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.generation = 0
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return _MISS
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return _MISS
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self):
+        with self._lock:
+            self.generation += 1
+
+_MISS = object()
+_read_cache = _ReadCache(
+    maxsize=int(os.getenv("NEO4J_CACHE_SIZE", "4096")),
+    ttl=float(os.getenv("NEO4J_CACHE_TTL", "300"))
+)
+
+def _freeze(value):
+    """将参数转换为可哈希的缓存键"""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+def _cached_read(default, error: str):
+    """只读查询的结果缓存；查询失败时打印错误并返回默认值（失败结果不缓存）
+
+    缓存为进程级共享，返回深拷贝，调用方修改实体或行字典不会影响后续读取。
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(self, *args):
+            # 缓存为进程级共享，键中包含连接目标，避免不同实例/数据库之间串读
+            key = (_read_cache.generation, self.uri, self.database, fn.__name__, _freeze(args))
+            cached = _read_cache.get(key)
+            if cached is not _MISS:
+                return copy.deepcopy(cached)
+            try:
+                value = await fn(self, *args)
+            except Exception as e:
+                print(f"{error}: {e}")
+                return default() if callable(default) else default
+            _read_cache.put(key, value)
+            return copy.deepcopy(value)
+        return wrapper
+    return decorator
+
 class Neo4jAdapter:
-    """Neo4j图数据库适配器，提供与NetworkX兼容的接口"""
-    
-    def __init__(self, uri: str = None, username: str = None, password: str = None):
+    """Neo4j图数据库适配器，提供与NetworkX兼容的接口
+
+    所有数据库I/O都在后台事件循环上通过 AsyncDriver 执行：
+    异步调用方使用 a* 方法（不阻塞调用方事件循环），同步调用方使用同名的同步方法。
+    """
+
+    # 驱动连接池配置（可通过环境变量调整）
+    MAX_CONNECTION_POOL_SIZE = int(os.getenv("NEO4J_POOL_SIZE", "64"))
+    CONNECTION_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_POOL_TIMEOUT", "60"))
+    MAX_CONNECTION_LIFETIME = float(os.getenv("NEO4J_MAX_LIFETIME", "3600"))
+
+    # 批量写入/删除时单个事务处理的行数
+    WRITE_BATCH_SIZE = 1000
+    DELETE_BATCH_SIZE = 5000
+
+    def __init__(self, uri: str = None, username: str = None, password: str = None, database: str = None):
         self.uri = uri or os.getenv("NEO4J_URI", "bolt://localhost:7687")
         self.username = username or os.getenv("NEO4J_USERNAME", "neo4j")
         self.password = password or os.getenv("NEO4J_PASSWORD", "password")
-        self.driver: Optional[Driver] = None
+        # 为空时使用服务端默认数据库
+        self.database = database or os.getenv("NEO4J_DATABASE") or None
+        self.driver: Optional[AsyncDriver] = None
         self.connected = False
-        
+
         if NEO4J_AVAILABLE:
-            self._connect()
-    
-    def _connect(self):
-        """连接到Neo4j数据库"""
+            self._run(self._async_connect())
+
+    def _run(self, coro):
+        """同步等待协程在后台事件循环上完成"""
+        return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result()
+
+    async def _submit(self, coro):
+        """在调用方事件循环中等待协程在后台事件循环上完成"""
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, _get_loop()))
+
+    async def _async_connect(self):
+        """连接到Neo4j数据库（复用进程内共享驱动）"""
+        driver_key = (self.uri, self.username)
         try:
-            self.driver = GraphDatabase.driver(
-                self.uri, 
-                auth=(self.username, self.password)
-            )
-            # 测试连接
-            with self.driver.session() as session:
-                session.run("RETURN 1")
+            driver = _drivers.get(driver_key)
+            if driver is None:
+                driver = AsyncGraphDatabase.driver(
+                    self.uri,
+                    auth=(self.username, self.password),
+                    max_connection_pool_size=self.MAX_CONNECTION_POOL_SIZE,
+                    connection_acquisition_timeout=self.CONNECTION_ACQUISITION_TIMEOUT,
+                    max_connection_lifetime=self.MAX_CONNECTION_LIFETIME,
+                    keep_alive=True
+                )
+                # 测试连接
+                await driver.verify_connectivity()
+                await self._async_ensure_schema(driver)
+                _drivers[driver_key] = driver
+            self.driver = driver
             self.connected = True
             print(f"Successfully connected to Neo4j at {self.uri}")
         except (ServiceUnavailable, AuthError, Exception) as e:
             print(f"Failed to connect to Neo4j: {e}")
             self.connected = False
-            if self.driver:
-                self.driver.close()
-                self.driver = None
-    
+            if driver is not None and _drivers.get(driver_key) is not driver:
+                await driver.close()
+            self.driver = None
+
+    async def _async_ensure_schema(self, driver: AsyncDriver):
+        """创建实体的唯一约束、类型索引与名称全文索引（已存在时跳过），并补齐旧实体的 alias_text"""
+        async with driver.session(database=self.database) as session:
+            for statement in SCHEMA_STATEMENTS:
+                try:
+                    result = await session.run(statement)
+                    await result.consume()
+                except Exception as e:
+                    print(f"Error creating Neo4j schema ({statement.split(' IF ')[0]}): {e}")
+            try:
+                result = await session.run(BACKFILL_ALIAS_TEXT)
+                await result.consume()
+            except Exception as e:
+                print(f"Error backfilling entity alias_text: {e}")
+
     def is_available(self) -> bool:
         """检查Neo4j是否可用"""
         return NEO4J_AVAILABLE and self.connected and self.driver is not None
-    
+
     def close(self):
         """关闭连接"""
         if self.driver:
-            self.driver.close()
+            _drivers.pop((self.uri, self.username), None)
+            self._run(self.driver.close())
+            self.driver = None
             self.connected = False
-    
+
+    def warmup(self, n: int = 4):
+        """预先建立 n 个连接放入连接池，避免首个请求承担握手延迟"""
+        if not self.is_available() or n <= 0:
+            return
+        self._run(self._async_warmup(n))
+
+    async def awarmup(self, n: int = 4):
+        """预先建立 n 个连接（异步，不阻塞调用方事件循环）"""
+        if not self.is_available() or n <= 0:
+            return
+        await self._submit(self._async_warmup(n))
+
+    async def _async_warmup(self, n: int):
+        async def ping():
+            async with self.driver.session(database=self.database) as session:
+                result = await session.run("RETURN 1")
+                await result.consume()
+        try:
+            await asyncio.gather(*(ping() for _ in range(n)))
+        except Exception as e:
+            print(f"Error warming up Neo4j connections: {e}")
+
+    async def _execute_read(self, work, *args):
+        """在只读托管事务中执行 work；遇到瞬时错误（如主节点切换、连接中断）时驱动会自动重试"""
+        async with self.driver.session(database=self.database, default_access_mode=READ_ACCESS) as session:
+            return await session.execute_read(work, *args)
+
+    async def _read_rows(self, query: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """执行单条只读查询并返回全部行"""
+        async def work(tx):
+            result = await tx.run(query, params)
+            return await result.data()
+        return await self._execute_read(work)
+
+    async def _write(self, query: str, params: Dict[str, Any]):
+        """在托管写事务中执行单条写语句（瞬时错误自动重试）"""
+        async def work(tx):
+            result = await tx.run(query, params)
+            await result.consume()
+        async with self.driver.session(database=self.database) as session:
+            await session.execute_write(work)
+
+    def _rows_to_entities(self, rows: List[Dict[str, Any]]) -> List[MedicalEntity]:
+        """将 _entity_columns 投影出的行转换为医疗实体"""
+        return [
+            MedicalEntity(
+                id=r["id"],
+                name=r["name"],
+                entity_type=_ENTITY_TYPES[r["entity_type"]],
+                aliases=r["aliases"] or [],
+                description=r["description"] or "",
+                confidence=1.0 if r["confidence"] is None else r["confidence"],
+                attributes=_decode_attributes(r["attributes"])
+            )
+            for r in rows
+        ]
+
     def add_entity(self, entity: MedicalEntity) -> bool:
         """添加实体到Neo4j"""
         if not self.is_available():
             return False
-        
+        return self._run(self._async_add_entity(entity))
+
+    async def aadd_entity(self, entity: MedicalEntity) -> bool:
+        """添加实体到Neo4j（异步）"""
+        if not self.is_available():
+            return False
+        return await self._submit(self._async_add_entity(entity))
+
+    async def _async_add_entity(self, entity: MedicalEntity) -> bool:
         try:
-            with self.driver.session() as session:
-                query = """
-                MERGE (e:Entity {id: $id})
-                SET e.name = $name,
-                    e.entity_type = $entity_type,
-                    e.aliases = $aliases,
-                    e.description = $description,
-                    e.confidence = $confidence,
-                    e.attributes = $attributes
-                """
-                session.run(query, {
-                    "id": entity.id,
-                    "name": entity.name,
-                    "entity_type": entity.entity_type.value,
-                    "aliases": entity.aliases,
-                    "description": entity.description,
-                    "confidence": entity.confidence,
-                    "attributes": json.dumps(entity.attributes)
-                })
+            await self._write("""
+            MERGE (e:Entity {id: $id})
+            SET e.name = $name,
+                e.entity_type = $entity_type,
+                e.aliases = $aliases,
+                e.alias_text = $alias_text,
+                e.description = $description,
+                e.confidence = $confidence,
+                e.attributes = $attributes
+            """, {
+                "id": entity.id,
+                "name": entity.name,
+                "entity_type": entity.entity_type.value,
+                "aliases": entity.aliases,
+                "alias_text": " ".join(entity.aliases),
+                "description": entity.description,
+                "confidence": entity.confidence,
+                "attributes": _encode_attributes(entity.attributes)
+            })
             return True
         except Exception as e:
             print(f"Error adding entity to Neo4j: {e}")
             return False
-    
+        finally:
+            # 写入后使读缓存失效
+            _read_cache.invalidate()
+
     def add_relation(self, relation: MedicalRelation) -> bool:
         """添加关系到Neo4j"""
         if not self.is_available():
             return False
-        
+        return self._run(self._async_add_relation(relation))
+
+    async def aadd_relation(self, relation: MedicalRelation) -> bool:
+        """添加关系到Neo4j（异步）"""
+        if not self.is_available():
+            return False
+        return await self._submit(self._async_add_relation(relation))
+
+    async def _async_add_relation(self, relation: MedicalRelation) -> bool:
         try:
-            with self.driver.session() as session:
-                query = """
-                MATCH (source:Entity {id: $source_id})
-                MATCH (target:Entity {id: $target_id})
-                MERGE (source)-[r:RELATES {type: $relation_type}]->(target)
-                SET r.confidence = $confidence,
-                    r.evidence = $evidence,
-                    r.attributes = $attributes
-                """
-                session.run(query, {
-                    "source_id": relation.source_id,
-                    "target_id": relation.target_id,
-                    "relation_type": relation.relation_type.value,
-                    "confidence": relation.confidence,
-                    "evidence": relation.evidence,
-                    "attributes": json.dumps(relation.attributes)
-                })
+            await self._write("""
+            MATCH (source:Entity {id: $source_id})
+            MATCH (target:Entity {id: $target_id})
+            MERGE (source)-[r:RELATES {type: $relation_type}]->(target)
+            SET r.confidence = $confidence,
+                r.evidence = $evidence,
+                r.attributes = $attributes
+            """, {
+                "source_id": relation.source_id,
+                "target_id": relation.target_id,
+                "relation_type": relation.relation_type.value,
+                "confidence": relation.confidence,
+                "evidence": relation.evidence,
+                "attributes": _encode_attributes(relation.attributes)
+            })
             return True
         except Exception as e:
             print(f"Error adding relation to Neo4j: {e}")
             return False
-    
+        finally:
+            # 写入后使读缓存失效
+            _read_cache.invalidate()
+
+    def add_entities(self, entities: List[MedicalEntity]) -> bool:
+        """批量添加实体到Neo4j（单次往返）"""
+        if not self.is_available():
+            return False
+        if not entities:
+            return True
+        return self._run(self._async_add_entities(entities))
+
+    async def aadd_entities(self, entities: List[MedicalEntity]) -> bool:
+        """批量添加实体到Neo4j（异步）"""
+        if not self.is_available():
+            return False
+        if not entities:
+            return True
+        return await self._submit(self._async_add_entities(entities))
+
+    async def _async_add_entities(self, entities: List[MedicalEntity]) -> bool:
+        rows = [
+            {
+                "id": entity.id,
+                "name": entity.name,
+                "entity_type": entity.entity_type.value,
+                "aliases": entity.aliases,
+                "alias_text": " ".join(entity.aliases),
+                "description": entity.description,
+                "confidence": entity.confidence,
+                "attributes": _encode_attributes(entity.attributes)
+            }
+            for entity in entities
+        ]
+
+        async def work(tx, rows):
+            result = await tx.run("""
+            UNWIND $rows AS r
+            MERGE (e:Entity {id: r.id})
+            SET e.name = r.name,
+                e.entity_type = r.entity_type,
+                e.aliases = r.aliases,
+                e.alias_text = r.alias_text,
+                e.description = r.description,
+                e.confidence = r.confidence,
+                e.attributes = r.attributes
+            """, {"rows": rows})
+            await result.consume()
+
+        try:
+            # 大批量按批次拆分为多个事务，避免单个事务占满事务日志
+            async with self.driver.session(database=self.database) as session:
+                for i in range(0, len(rows), self.WRITE_BATCH_SIZE):
+                    await session.execute_write(work, rows[i:i + self.WRITE_BATCH_SIZE])
+            return True
+        except Exception as e:
+            print(f"Error adding entities to Neo4j: {e}")
+            return False
+        finally:
+            # 写入后使读缓存失效
+            _read_cache.invalidate()
+
+    def add_relations(self, relations: List[MedicalRelation]) -> bool:
+        """批量添加关系到Neo4j（单次往返）"""
+        if not self.is_available():
+            return False
+        if not relations:
+            return True
+        return self._run(self._async_add_relations(relations))
+
+    async def aadd_relations(self, relations: List[MedicalRelation]) -> bool:
+        """批量添加关系到Neo4j（异步）"""
+        if not self.is_available():
+            return False
+        if not relations:
+            return True
+        return await self._submit(self._async_add_relations(relations))
+
+    async def _async_add_relations(self, relations: List[MedicalRelation]) -> bool:
+        rows = [
+            {
+                "source_id": relation.source_id,
+                "target_id": relation.target_id,
+                "relation_type": relation.relation_type.value,
+                "confidence": relation.confidence,
+                "evidence": relation.evidence,
+                "attributes": _encode_attributes(relation.attributes)
+            }
+            for relation in relations
+        ]
+
+        async def work(tx, rows):
+            result = await tx.run("""
+            UNWIND $rows AS r
+            MATCH (source:Entity {id: r.source_id})
+            MATCH (target:Entity {id: r.target_id})
+            MERGE (source)-[rel:RELATES {type: r.relation_type}]->(target)
+            SET rel.confidence = r.confidence,
+                rel.evidence = r.evidence,
+                rel.attributes = r.attributes
+            """, {"rows": rows})
+            await result.consume()
+
+        try:
+            # 大批量按批次拆分为多个事务，避免单个事务占满事务日志
+            async with self.driver.session(database=self.database) as session:
+                for i in range(0, len(rows), self.WRITE_BATCH_SIZE):
+                    await session.execute_write(work, rows[i:i + self.WRITE_BATCH_SIZE])
+            return True
+        except Exception as e:
+            print(f"Error adding relations to Neo4j: {e}")
+            return False
+        finally:
+            # 写入后使读缓存失效
+            _read_cache.invalidate()
+
     def find_entities_by_name(self, name: str, fuzzy: bool = True) -> List[MedicalEntity]:
         """根据名称查找实体"""
         if not self.is_available():
             return []
-        
-        try:
-            with self.driver.session() as session:
-                if fuzzy:
-                    query = """
-                    MATCH (e:Entity)
-                    WHERE toLower(e.name) CONTAINS toLower($name)
-                       OR any(alias IN e.aliases WHERE toLower(alias) CONTAINS toLower($name))
-                    RETURN e
-                    """
-                else:
-                    query = """
-                    MATCH (e:Entity)
-                    WHERE toLower(e.name) = toLower($name)
-                       OR toLower($name) IN [alias IN e.aliases | toLower(alias)]
-                    RETURN e
-                    """
-                
-                result = session.run(query, {"name": name})
-                entities = []
-                
-                for record in result:
-                    node = record["e"]
-                    entity = MedicalEntity(
-                        id=node["id"],
-                        name=node["name"],
-                        entity_type=EntityType(node["entity_type"]),
-                        aliases=node.get("aliases", []),
-                        description=node.get("description", ""),
-                        confidence=node.get("confidence", 1.0),
-                        attributes=json.loads(node.get("attributes", "{}"))
-                    )
-                    entities.append(entity)
-                
-                return entities
-        except Exception as e:
-            print(f"Error finding entities by name: {e}")
+        return self._run(self._async_find_entities_by_name(name, fuzzy))
+
+    async def afind_entities_by_name(self, name: str, fuzzy: bool = True) -> List[MedicalEntity]:
+        """根据名称查找实体（异步）"""
+        if not self.is_available():
             return []
-    
+        return await self._submit(self._async_find_entities_by_name(name, fuzzy))
+
+    @_cached_read(default=list, error="Error finding entities by name")
+    async def _async_find_entities_by_name(self, name: str, fuzzy: bool) -> List[MedicalEntity]:
+        if fuzzy:
+            predicate = """
+            toLower(e.name) CONTAINS toLower($name)
+               OR any(alias IN e.aliases WHERE toLower(alias) CONTAINS toLower($name))
+            """
+        else:
+            predicate = """
+            toLower(e.name) = toLower($name)
+               OR toLower($name) IN [alias IN e.aliases | toLower(alias)]
+            """
+
+        # 全文索引只用于精确查找：模糊查找是任意子串匹配，分词边界外的子串（如 IL-1-beta 中的 "1-b"）
+        # 无法通过索引召回，必须扫描才能与 CONTAINS 语义一致；不含任何词字符的输入分词后为空，同样扫描
+        if not fuzzy and re.search(r'\w', name):
+            try:
+                # 先用全文索引取候选，再按原匹配语义精确过滤
+                rows = await self._read_rows(f"""
+                CALL db.index.fulltext.queryNodes('entity_name', $q) YIELD node AS e
+                WHERE {predicate}
+                RETURN {_entity_columns("e")}
+                """, {"name": name, "q": _fulltext_query(name)})
+                return self._rows_to_entities(rows)
+            except Exception as e:
+                print(f"Fulltext lookup failed, falling back to scan: {e}")
+
+        rows = await self._read_rows(f"""
+        MATCH (e:Entity)
+        WHERE {predicate}
+        RETURN {_entity_columns("e")}
+        """, {"name": name})
+        return self._rows_to_entities(rows)
+
     def find_entities_by_type(self, entity_type: EntityType) -> List[MedicalEntity]:
         """根据类型查找实体"""
         if not self.is_available():
             return []
-        
-        try:
-            with self.driver.session() as session:
-                query = """
-                MATCH (e:Entity {entity_type: $entity_type})
-                RETURN e
-                """
-                result = session.run(query, {"entity_type": entity_type.value})
-                entities = []
-                
-                for record in result:
-                    node = record["e"]
-                    entity = MedicalEntity(
-                        id=node["id"],
-                        name=node["name"],
-                        entity_type=EntityType(node["entity_type"]),
-                        aliases=node.get("aliases", []),
-                        description=node.get("description", ""),
-                        confidence=node.get("confidence", 1.0),
-                        attributes=json.loads(node.get("attributes", "{}"))
-                    )
-                    entities.append(entity)
-                
-                return entities
-        except Exception as e:
-            print(f"Error finding entities by type: {e}")
+        return self._run(self._async_find_entities_by_type(entity_type))
+
+    async def afind_entities_by_type(self, entity_type: EntityType) -> List[MedicalEntity]:
+        """根据类型查找实体（异步）"""
+        if not self.is_available():
             return []
-    
+        return await self._submit(self._async_find_entities_by_type(entity_type))
+
+    @_cached_read(default=list, error="Error finding entities by type")
+    async def _async_find_entities_by_type(self, entity_type: EntityType) -> List[MedicalEntity]:
+        rows = await self._read_rows(f"""
+        MATCH (e:Entity {{entity_type: $entity_type}})
+        RETURN {_entity_columns("e")}
+        """, {"entity_type": entity_type.value})
+        return self._rows_to_entities(rows)
+
     def get_related_entities(
-        self, 
-        entity_id: str, 
+        self,
+        entity_id: str,
         relation_types: Optional[List[RelationType]] = None,
         max_depth: int = 2
     ) -> Dict[str, List[Tuple[MedicalEntity, RelationType, float]]]:
         """获取相关实体"""
         if not self.is_available():
             return {}
-        
-        try:
-            with self.driver.session() as session:
-                # 构建关系类型过滤条件
-                type_filter = ""
-                if relation_types:
-                    type_values = [rt.value for rt in relation_types]
-                    type_filter = f"AND r.type IN {type_values}"
-                
-                query = f"""
-                MATCH path = (start:Entity {{id: $entity_id}})-[r:RELATES*1..{max_depth}]-(related:Entity)
-                WHERE true {type_filter}
-                RETURN related, r, length(path) as depth
-                """
-                
-                result = session.run(query, {"entity_id": entity_id})
-                related = defaultdict(list)
-                
-                for record in result:
-                    node = record["related"]
-                    relations = record["r"]
-                    depth = record["depth"]
-                    
-                    # 获取最后一个关系的信息
-                    last_rel = relations[-1] if isinstance(relations, list) else relations
-                    
-                    entity = MedicalEntity(
-                        id=node["id"],
-                        name=node["name"],
-                        entity_type=EntityType(node["entity_type"]),
-                        aliases=node.get("aliases", []),
-                        description=node.get("description", ""),
-                        confidence=node.get("confidence", 1.0),
-                        attributes=json.loads(node.get("attributes", "{}"))
-                    )
-                    
-                    rel_type = RelationType(last_rel["type"])
-                    confidence = last_rel.get("confidence", 0.0)
-                    
-                    related[f"depth_{depth}"].append((entity, rel_type, confidence))
-                
-                return dict(related)
-        except Exception as e:
-            print(f"Error getting related entities: {e}")
+        return self._run(self._async_get_related_entities(entity_id, relation_types, max_depth))
+
+    async def aget_related_entities(
+        self,
+        entity_id: str,
+        relation_types: Optional[List[RelationType]] = None,
+        max_depth: int = 2
+    ) -> Dict[str, List[Tuple[MedicalEntity, RelationType, float]]]:
+        """获取相关实体（异步）"""
+        if not self.is_available():
             return {}
-    
+        return await self._submit(self._async_get_related_entities(entity_id, relation_types, max_depth))
+
+    @_cached_read(default=dict, error="Error getting related entities")
+    async def _async_get_related_entities(
+        self,
+        entity_id: str,
+        relation_types: Optional[List[RelationType]],
+        max_depth: int
+    ) -> Dict[str, List[Tuple[MedicalEntity, RelationType, float]]]:
+        # 逐层有界BFS：每个实体只在其最短深度出现一次，避免变长路径枚举的组合爆炸
+        query = f"""
+        UNWIND $frontier AS fid
+        MATCH (:Entity {{id: fid}})-[r:RELATES]-(n:Entity)
+        WHERE NOT n.id IN $visited AND ($types IS NULL OR r.type IN $types)
+        WITH n, collect(r)[0] AS r
+        RETURN {_entity_columns("n")}, r.type AS relation_type, r.confidence AS relation_confidence
+        """
+        types = [rt.value for rt in relation_types] if relation_types else None
+
+        async def work(tx):
+            # 各层查询放在同一个读事务中；事务重试时从头重新遍历
+            related: Dict[str, List[Tuple[MedicalEntity, RelationType, float]]] = {}
+            visited = [entity_id]
+            frontier = [entity_id]
+            for depth in range(1, max_depth + 1):
+                result = await tx.run(query, {
+                    "frontier": frontier,
+                    "visited": visited,
+                    "types": types
+                })
+                rows = await result.data()
+                if not rows:
+                    break
+                related[f"depth_{depth}"] = [
+                    (
+                        entity,
+                        _RELATION_TYPES[r["relation_type"]],
+                        0.0 if r["relation_confidence"] is None else r["relation_confidence"]
+                    )
+                    for entity, r in zip(self._rows_to_entities(rows), rows)
+                ]
+                frontier = [r["id"] for r in rows]
+                visited.extend(frontier)
+            return related
+
+        return await self._execute_read(work)
+
     def find_shortest_path(self, source_id: str, target_id: str) -> Optional[List[str]]:
         """查找最短路径"""
         if not self.is_available():
             return None
-        
-        try:
-            with self.driver.session() as session:
-                query = """
-                MATCH path = shortestPath((source:Entity {id: $source_id})-[*]-(target:Entity {id: $target_id}))
-                RETURN [node IN nodes(path) | node.id] as path
-                """
-                result = session.run(query, {
-                    "source_id": source_id,
-                    "target_id": target_id
-                })
-                
-                record = result.single()
-                return record["path"] if record else None
-        except Exception as e:
-            print(f"Error finding shortest path: {e}")
+        return self._run(self._async_find_shortest_path(source_id, target_id))
+
+    async def afind_shortest_path(self, source_id: str, target_id: str) -> Optional[List[str]]:
+        """查找最短路径（异步）"""
+        if not self.is_available():
             return None
-    
+        return await self._submit(self._async_find_shortest_path(source_id, target_id))
+
+    @_cached_read(default=None, error="Error finding shortest path")
+    async def _async_find_shortest_path(self, source_id: str, target_id: str) -> Optional[List[str]]:
+        rows = await self._read_rows("""
+        MATCH path = shortestPath((source:Entity {id: $source_id})-[*]-(target:Entity {id: $target_id}))
+        RETURN [node IN nodes(path) | node.id] as path
+        """, {
+            "source_id": source_id,
+            "target_id": target_id
+        })
+        return rows[0]["path"] if rows else None
+
     def get_entity_neighbors(self, entity_id: str, relation_type: Optional[RelationType] = None) -> List[MedicalEntity]:
         """获取实体的邻居"""
         if not self.is_available():
             return []
-        
-        try:
-            with self.driver.session() as session:
-                type_filter = ""
-                if relation_type:
-                    type_filter = f"AND r.type = '{relation_type.value}'"
-                
-                query = f"""
-                MATCH (e:Entity {{id: $entity_id}})-[r:RELATES]-(neighbor:Entity)
-                WHERE true {type_filter}
-                RETURN DISTINCT neighbor
-                """
-                
-                result = session.run(query, {"entity_id": entity_id})
-                neighbors = []
-                
-                for record in result:
-                    node = record["neighbor"]
-                    entity = MedicalEntity(
-                        id=node["id"],
-                        name=node["name"],
-                        entity_type=EntityType(node["entity_type"]),
-                        aliases=node.get("aliases", []),
-                        description=node.get("description", ""),
-                        confidence=node.get("confidence", 1.0),
-                        attributes=json.loads(node.get("attributes", "{}"))
-                    )
-                    neighbors.append(entity)
-                
-                return neighbors
-        except Exception as e:
-            print(f"Error getting entity neighbors: {e}")
+        return self._run(self._async_get_entity_neighbors(entity_id, relation_type))
+
+    async def aget_entity_neighbors(self, entity_id: str, relation_type: Optional[RelationType] = None) -> List[MedicalEntity]:
+        """获取实体的邻居（异步）"""
+        if not self.is_available():
             return []
-    
+        return await self._submit(self._async_get_entity_neighbors(entity_id, relation_type))
+
+    @_cached_read(default=list, error="Error getting entity neighbors")
+    async def _async_get_entity_neighbors(self, entity_id: str, relation_type: Optional[RelationType]) -> List[MedicalEntity]:
+        rows = await self._read_rows(f"""
+        MATCH (e:Entity {{id: $entity_id}})-[r:RELATES]-(neighbor:Entity)
+        WHERE $relation_type IS NULL OR r.type = $relation_type
+        WITH DISTINCT neighbor
+        RETURN {_entity_columns("neighbor")}
+        """, {
+            "entity_id": entity_id,
+            "relation_type": relation_type.value if relation_type else None
+        })
+        return self._rows_to_entities(rows)
+
     def get_statistics(self) -> Dict[str, Any]:
         """获取图统计信息"""
         if not self.is_available():
             return {}
-        
-        try:
-            with self.driver.session() as session:
-                # 获取实体数量
-                entity_result = session.run("MATCH (e:Entity) RETURN count(e) as count")
-                entity_count = entity_result.single()["count"]
-                
-                # 获取关系数量
-                relation_result = session.run("MATCH ()-[r:RELATES]->() RETURN count(r) as count")
-                relation_count = relation_result.single()["count"]
-                
-                # 获取实体类型分布
-                type_result = session.run("""
-                MATCH (e:Entity)
-                RETURN e.entity_type as type, count(e) as count
-                """)
-                type_distribution = {record["type"]: record["count"] for record in type_result}
-                
-                return {
-                    "total_entities": entity_count,
-                    "total_relations": relation_count,
-                    "entity_type_distribution": type_distribution,
-                    "backend": "neo4j"
-                }
-        except Exception as e:
-            print(f"Error getting statistics: {e}")
+        return self._run(self._async_get_statistics())
+
+    async def aget_statistics(self) -> Dict[str, Any]:
+        """获取图统计信息（异步）"""
+        if not self.is_available():
             return {}
-    
+        return await self._submit(self._async_get_statistics())
+
+    @_cached_read(default=dict, error="Error getting statistics")
+    async def _async_get_statistics(self) -> Dict[str, Any]:
+        async def work(tx):
+            # 获取实体数量
+            entity_result = await tx.run("MATCH (e:Entity) RETURN count(e) as count")
+            entity_count = (await entity_result.single())["count"]
+
+            # 获取关系数量
+            relation_result = await tx.run("MATCH ()-[r:RELATES]->() RETURN count(r) as count")
+            relation_count = (await relation_result.single())["count"]
+
+            # 获取实体类型分布
+            type_result = await tx.run("""
+            MATCH (e:Entity)
+            RETURN e.entity_type as type, count(e) as count
+            """)
+            type_distribution = {record["type"]: record["count"] async for record in type_result}
+
+            return {
+                "total_entities": entity_count,
+                "total_relations": relation_count,
+                "entity_type_distribution": type_distribution,
+                "backend": "neo4j"
+            }
+
+        return await self._execute_read(work)
+
     def clear_all(self):
         """清空所有数据"""
         if not self.is_available():
             return
-        
+        self._run(self._async_clear_all())
+
+    async def aclear_all(self):
+        """清空所有数据（异步）"""
+        if not self.is_available():
+            return
+        await self._submit(self._async_clear_all())
+
+    async def _async_clear_all(self):
         try:
-            with self.driver.session() as session:
-                session.run("MATCH (n) DETACH DELETE n")
+            # 服务端分批删除（CALL ... IN TRANSACTIONS 需在自动提交事务中执行）
+            async with self.driver.session(database=self.database) as session:
+                result = await session.run(f"""
+                MATCH (n)
+                CALL {{ WITH n DETACH DELETE n }} IN TRANSACTIONS OF {self.DELETE_BATCH_SIZE} ROWS
+                """)
+                await result.consume()
         except Exception as e:
-            print(f"Error clearing Neo4j data: {e}")
\ No newline at end of file
+            print(f"Error clearing Neo4j data: {e}")
+        finally:
+            # 写入后使读缓存失效
+            _read_cache.invalidate()
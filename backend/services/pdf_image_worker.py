@@ -0,0 +1,89 @@
+# services/pdf_image_worker.py
+"""
+PDF 进程池 worker：页面渲染、叠框与图片导出
+
+PyMuPDF 不支持多线程使用，按页并行只能放在进程中；spawn 启动的 worker 只需导入本模块，
+因此这里只依赖 fitz 与 PIL，
+不要引入 pdf_service（unstructured 等）或任何服务级模块。
+"""
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Any, List
+import fitz
+from PIL import Image, ImageDraw, ImageFont
+
+def render_original_page(pdf_path: str, idx: int, out_dir: Path, dpi: int):
+    """渲染单页为 PNG（fitz 文档不能跨进程共享，各自打开）"""
+    with fitz.open(pdf_path) as doc:
+        page = doc.load_page(idx - 1)
+        mat = fitz.Matrix(dpi/72, dpi/72)
+        pix = page.get_pixmap(matrix=mat)
+        pix.save(str(out_dir / f"page-{idx:04d}.png"))
+
+CATEGORY_TO_COLOR = {
+    "Title": "orchid",
+    "Image": "forestgreen",
+    "Table": "tomato",
+}
+DEFAULT_BOX_COLOR = "deepskyblue"
+
+@lru_cache(maxsize=16)
+def _legend_image(categories: tuple) -> Image.Image:
+    """图例只依赖出现的类别组合，预渲染一次后复用"""
+    labels = [("Text", DEFAULT_BOX_COLOR)] + [
+        (cat, color) for cat, color in CATEGORY_TO_COLOR.items() if cat in categories
+    ]
+    font = ImageFont.load_default()
+    row_h, swatch, pad = 16, 10, 6
+    width = pad * 3 + swatch + max(int(font.getlength(label)) for label, _ in labels)
+    legend = Image.new("RGB", (width, pad * 2 + row_h * len(labels)), "white")
+    draw = ImageDraw.Draw(legend)
+    draw.rectangle([0, 0, legend.width - 1, legend.height - 1], outline="lightgray")
+    for i, (label, color) in enumerate(labels):
+        y = pad + i * row_h
+        draw.rectangle([pad, y + 2, pad + swatch, y + 2 + swatch], fill=color)
+        draw.text((pad * 2 + swatch, y), label, fill="black", font=font)
+    return legend
+
+def _draw_boxes(pil: Image.Image, segments: List[Dict[str, Any]]) -> None:
+    """直接在页图上画多边形框，并在右上角贴图例"""
+    draw = ImageDraw.Draw(pil)
+    categories = set()
+    for seg in segments:
+        points = seg["coordinates"]["points"]
+        lw = seg["coordinates"]["layout_width"]
+        lh = seg["coordinates"]["layout_height"]
+        scaled = [(x * pil.width / lw, y * pil.height / lh) for x, y in points]
+        color = CATEGORY_TO_COLOR.get(seg.get("category"), DEFAULT_BOX_COLOR)
+        categories.add(seg.get("category", "Text"))
+        draw.polygon(scaled, outline=color, width=2)
+
+    legend = _legend_image(tuple(sorted(c for c in categories if c in CATEGORY_TO_COLOR)))
+    pil.paste(legend, (max(pil.width - legend.width - 8, 0), 8))
+
+def render_parsed_page(pdf_path: str, page_number: int, out_path: Path, dpi: int,
+                       segments: List[Dict[str, Any]]) -> None:
+    """渲染单页并叠加版面框"""
+    with fitz.open(pdf_path) as doc:
+        page = doc.load_page(page_number - 1)
+        mat = fitz.Matrix(dpi/72, dpi/72)
+        pix = page.get_pixmap(matrix=mat)
+    pil = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+    _draw_boxes(pil, segments)
+    pil.save(out_path, "PNG", optimize=False)
+
+def extract_page_images(pdf_path: str, page_num: int, xrefs: List[int], img_dir: str) -> List[str]:
+    """导出单页内的图片，返回文件名列表（fitz 文档不能跨进程共享，各自打开）"""
+    names = []
+    with fitz.open(pdf_path) as doc:
+        for img_index, xref in enumerate(xrefs, start=1):
+            pix = fitz.Pixmap(doc, xref)
+            img_path = Path(img_dir) / f"page{page_num}_img{img_index}.png"
+            if pix.n < 5:
+                pix.save(str(img_path))
+            else:
+                # CMYK 等色彩空间先转 RGB 再直接落盘
+                fitz.Pixmap(fitz.csRGB, pix).save(str(img_path))
+            pix = None
+            names.append(img_path.name)  # 只保存文件名
+    return names
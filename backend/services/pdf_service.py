@@ -1,14 +1,14 @@
 # services/pdf_service.py
 from __future__ import annotations
 import os, io, math, json
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 from typing import Dict, Any, List
 import fitz
-from PIL import Image
-import matplotlib
-matplotlib.use("Agg")  # 服务器无头
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
+from .pdf_image_worker import render_original_page, render_parsed_page, extract_page_images
 
 # 配置Hugging Face镜像 - 确保unstructured库使用镜像下载模型
 os.environ['HF_ENDPOINT'] = os.getenv('HF_ENDPOINT', 'https://hf-mirror.com')
@@ -16,7 +16,6 @@ os.environ['HUGGINGFACE_HUB_CACHE'] = os.getenv('HUGGINGFACE_HUB_CACHE', '/tmp/h
 os.environ['TRANSFORMERS_CACHE'] = os.getenv('HUGGINGFACE_HUB_CACHE', '/tmp/huggingface_cache')
 os.environ['TIMM_CACHE_DIR'] = os.getenv('HUGGINGFACE_HUB_CACHE', '/tmp/huggingface_cache')
 
-from langchain_unstructured import UnstructuredLoader
 from unstructured.partition.pdf import partition_pdf
 from html2text import html2text
 
@@ -54,141 +53,166 @@ def save_upload(file_id: str, upload_bytes: bytes, filename: str) -> Dict[str, A
         pages = doc.page_count
     return {"fileId": file_id, "name": filename, "pages": pages}
 
+# 页数不少于该值时才交给进程池；更少时在当前线程串行处理，省去任务序列化与首次拉起 worker 的开销
+# （PyMuPDF 不支持多线程，因此不使用线程池）。默认值为经验值，可按部署机器调整
+PROCESS_POOL_MIN_PAGES = int(os.getenv("PDF_PROCESS_POOL_MIN_PAGES", "8"))
+
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    """按页处理 PDF 的进程池（首次使用时创建，所有 PDF 复用）
+
+    服务进程是多线程的，fork 会把其他线程持有的锁带进子进程，因此使用 spawn 启动 worker。
+    worker 只导入轻量的 pdf_image_worker 模块；服务需以 `python -m uvicorn app:app` 启动，
+    否则 spawn 会在每个 worker 中以 __mp_main__ 重新执行 app.py 的全部模块级初始化。
+    """
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            _pdf_pool = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 1,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pdf_pool
+
+def _discard_pdf_pool(pool: ProcessPoolExecutor) -> None:
+    """worker 异常退出后进程池不可再用，丢弃以便下次重建"""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is pool:
+            _pdf_pool = None
+    pool.shutdown(wait=False)
+
+def _run_per_page(fn, tasks: List[tuple]) -> List[Any]:
+    """按页执行 worker 函数，结果与 tasks 顺序一致"""
+    if len(tasks) < PROCESS_POOL_MIN_PAGES:
+        return [fn(*args) for args in tasks]
+    pool = _get_pdf_pool()
+    try:
+        futures = [pool.submit(fn, *args) for args in tasks]
+        return [f.result() for f in futures]
+    except BrokenProcessPool:
+        _discard_pdf_pool(pool)
+        raise
+
 def render_original_pages(file_id: str, dpi: int = 144):
-    """把原始 PDF 渲染为 PNG，存到 pages/original/"""
-    pdf_path = original_pdf_path(file_id)
+    """把原始 PDF 渲染为 PNG，存到 pages/original/（页数多时在进程池中按页并行）"""
+    pdf_path = str(original_pdf_path(file_id))
     out_dir = dir_original_pages(file_id)
     with fitz.open(pdf_path) as doc:
-        for idx, page in enumerate(doc, start=1):
-            mat = fitz.Matrix(dpi/72, dpi/72)
-            pix = page.get_pixmap(matrix=mat)
-            (out_dir / f"page-{idx:04d}.png").write_bytes(pix.tobytes("png"))
-
-def _plot_boxes_to_ax(ax, pix, segments):
-    category_to_color = {
-        "Title": "orchid",
-        "Image": "forestgreen",
-        "Table": "tomato",
-    }
-    categories = set()
-    for seg in segments:
-        points = seg["coordinates"]["points"]
-        lw = seg["coordinates"]["layout_width"]
-        lh = seg["coordinates"]["layout_height"]
-        scaled = [(x * pix.width / lw, y * pix.height / lh) for x, y in points]
-        color = category_to_color.get(seg.get("category"), "deepskyblue")
-        categories.add(seg.get("category", "Text"))
-        poly = patches.Polygon(scaled, linewidth=1, edgecolor=color, facecolor="none")
-        ax.add_patch(poly)
-
-    legend_handles = [patches.Patch(color="deepskyblue", label="Text")]
-    for cat, color in category_to_color.items():
-        if cat in categories:
-            legend_handles.append(patches.Patch(color=color, label=cat))
-    ax.legend(handles=legend_handles, loc="upper right")
+        page_count = doc.page_count
+    _run_per_page(render_original_page, [(pdf_path, idx, out_dir, dpi) for idx in range(1, page_count + 1)])
 
 def render_parsed_pages_with_boxes(file_id: str, docs_local: List[Dict[str, Any]], dpi: int = 144):
     """
     根据 UnstructuredLoader 的 metadata（含坐标）在原图上叠框，输出到 pages/parsed/
     """
-    pdf_path = original_pdf_path(file_id)
+    pdf_path = str(original_pdf_path(file_id))
     out_dir = dir_parsed_pages(file_id)
+    # 预聚合：按 page_number 分组 segments
+    segments_by_page: Dict[int, List[Dict[str, Any]]] = {}
+    for d in docs_local:
+        meta = d.metadata if hasattr(d, "metadata") else d["metadata"]
+        pno = meta.get("page_number")
+        if pno is None or not meta.get("coordinates"): continue
+        segments_by_page.setdefault(pno, []).append(meta)
+
     with fitz.open(pdf_path) as doc:
-        # 预聚合：按 page_number 分组 segments
-        segments_by_page: Dict[int, List[Dict[str, Any]]] = {}
-        for d in docs_local:
-            meta = d.metadata if hasattr(d, "metadata") else d["metadata"]
-            pno = meta.get("page_number")
-            if pno is None: continue
-            segments_by_page.setdefault(pno, []).append(meta)
-
-        for page_number in range(1, doc.page_count + 1):
-            page = doc.load_page(page_number - 1)
-            mat = fitz.Matrix(dpi/72, dpi/72)
-            pix = page.get_pixmap(matrix=mat)
-            pil = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-            fig, ax = plt.subplots(1, figsize=(10, 10))
-            ax.imshow(pil)
-            ax.axis("off")
-            _plot_boxes_to_ax(ax, pix, segments_by_page.get(page_number, []))
-            fig.tight_layout()
-            fig.savefig(out_dir / f"page-{page_number:04d}.png", bbox_inches="tight", pad_inches=0)
-            plt.close(fig)
-
-def unstructured_segments(file_id: str) -> List[Any]:
-    """用 UnstructuredLoader 产生高分辨率布局段"""
+        page_count = doc.page_count
+
+    _run_per_page(render_parsed_page, [
+        (pdf_path, pno, out_dir / f"page-{pno:04d}.png", dpi, segments_by_page.get(pno, []))
+        for pno in range(1, page_count + 1)
+    ])
+
+def partition_elements(file_id: str) -> List[Any]:
+    """hi_res 版面解析（整个流程中最耗时的一步），结果供叠框图和 Markdown 共用"""
     pdf_path = str(original_pdf_path(file_id))
-    loader = UnstructuredLoader(
-        file_path=pdf_path,
-        strategy="hi_res",
+    return partition_pdf(
+        filename=pdf_path,
         infer_table_structure=True,
+        strategy="hi_res",
         ocr_languages="chi_sim+eng",
         ocr_engine="paddleocr",  # 如果装不上可换成 'auto' 或注释掉
     )
-    out = []
-    for d in loader.lazy_load():
-        out.append(d)
-    return out
 
-def pdf_to_markdown(file_id: str):
+def unstructured_segments(file_id: str, elements: List[Any] = None) -> List[Dict[str, Any]]:
+    """
+    产生高分辨率布局段（与 UnstructuredLoader 的 metadata 结构一致）
+    传入 elements 时直接复用，不再重复解析
+    """
+    if elements is None:
+        elements = partition_elements(file_id)
+    return [
+        {"metadata": {**el.metadata.to_dict(), "category": el.category}}
+        for el in elements
+    ]
+
+# ---- Markdown 输出：按元素类别分派 ----
+def _emit_text(text, meta, md_lines, image_map, inserted_images):
+    md_lines.append(text + "\n")
+
+def _emit_title(text, meta, md_lines, image_map, inserted_images):
+    md_lines.append((text if text.startswith("- ") else f"# {text}") + "\n")
+
+def _emit_h2(text, meta, md_lines, image_map, inserted_images):
+    md_lines.append(f"## {text}\n")
+
+def _emit_table(text, meta, md_lines, image_map, inserted_images):
+    html = getattr(meta, "text_as_html", None) if meta else None
+    md_lines.append((html2text(html) if html else text) + "\n")
+
+def _emit_image(text, meta, md_lines, image_map, inserted_images):
+    page_num = getattr(meta, "page_number", None) if meta else None
+    if not page_num:
+        md_lines.append(text + "\n")
+        return
+    for name in image_map.get(page_num, []):
+        if (page_num, name) not in inserted_images:
+            md_lines.append(f"![Image](./images/{name})\n")
+            inserted_images.add((page_num, name))
+
+_MD_EMITTERS = {
+    "Title": _emit_title,
+    "Header": _emit_h2,
+    "Subheader": _emit_h2,
+    "Table": _emit_table,
+    "Image": _emit_image,
+}
+
+def pdf_to_markdown(file_id: str, elements: List[Any] = None):
     pdf_path = str(original_pdf_path(file_id))
     out_md = markdown_output(file_id)
     img_dir = images_dir(file_id)
 
-    elements = partition_pdf(
-        filename=pdf_path,
-        infer_table_structure=True,
-        strategy="hi_res",
-        ocr_languages="chi_sim+eng",
-        ocr_engine="paddleocr"  # 同上
-    )
+    if elements is None:
+        elements = partition_elements(file_id)
 
-    # 提取图片
-    image_map = {}
+    # 提取图片：主进程只收集 xref，PNG 编码按页分发
+    image_map: Dict[int, List[str]] = {}
+    page_xrefs = []
     with fitz.open(pdf_path) as doc:
         for page_num, page in enumerate(doc, start=1):
             image_map[page_num] = []
-            for img_index, img in enumerate(page.get_images(full=True), start=1):
-                xref = img[0]
-                pix = fitz.Pixmap(doc, xref)
-                img_path = img_dir / f"page{page_num}_img{img_index}.png"
-                if pix.n < 5:
-                    pix.save(str(img_path))
-                else:
-                    pix = fitz.Pixmap(fitz.csRGB, pix)
-                    pix.save(str(img_path))
-                image_map[page_num].append(img_path.name)  # 只保存文件名
+            xrefs = [img[0] for img in page.get_images(full=True)]
+            if xrefs:
+                page_xrefs.append((page_num, xrefs))
+
+    names = _run_per_page(extract_page_images, [
+        (pdf_path, page_num, xrefs, str(img_dir)) for page_num, xrefs in page_xrefs
+    ])
+    for (page_num, _), page_names in zip(page_xrefs, names):
+        image_map[page_num] = page_names
 
     md_lines: List[str] = []
     inserted_images = set()
     for el in elements:
         cat = getattr(el, "category", None)
-        text = (getattr(el, "text", "") or "").strip()
-        meta = getattr(el, "metadata", None)
-        page_num = getattr(meta, "page_number", None) if meta else None
-
+        text = (el.text or "").strip()
         if not text and cat != "Image":
             continue
-
-        if cat == "Title" and text.startswith("- "):
-            md_lines.append(text + "\n")
-        elif cat == "Title":
-            md_lines.append(f"# {text}\n")
-        elif cat in ["Header", "Subheader"]:
-            md_lines.append(f"## {text}\n")
-        elif cat == "Table":
-            html = getattr(meta, "text_as_html", None) if meta else None
-            if html:
-                md_lines.append(html2text(html) + "\n")
-            else:
-                md_lines.append((text or "") + "\n")
-        elif cat == "Image" and page_num:
-            for name in image_map.get(page_num, []):
-                if (page_num, name) not in inserted_images:
-                    md_lines.append(f"![Image](./images/{name})\n")
-                    inserted_images.add((page_num, name))
-        else:
-            md_lines.append(text + "\n")
+        _MD_EMITTERS.get(cat, _emit_text)(text, el.metadata, md_lines, image_map, inserted_images)
 
     out_md.write_text("\n".join(md_lines), encoding="utf-8")
     return {"markdown": out_md.name, "images_dir": "images"}
@@ -199,7 +223,9 @@ def run_full_parse_pipeline(file_id: str) -> Dict[str, Any]:
     返回用于 /status 的统计或元信息
     """
     render_original_pages(file_id)
-    docs = unstructured_segments(file_id)
+    # 版面解析只做一次，叠框图与 Markdown 共用同一份 elements
+    elements = partition_elements(file_id)
+    docs = unstructured_segments(file_id, elements)
     render_parsed_pages_with_boxes(file_id, docs)
-    md_info = pdf_to_markdown(file_id)
+    md_info = pdf_to_markdown(file_id, elements)
     return {"md": md_info["markdown"]}
@@ -3,21 +3,82 @@
 提供更智能、更准确的意图识别能力
 """
 
+import asyncio
+import copy
 import json
 import os
 import logging
-from typing import Dict, Any, Optional
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
 from dashscope import Generation
 import dashscope
+
+# 较新版本的 dashscope 提供异步接口；旧版本回退到线程池中调用同步接口
+try:
+    from dashscope import AioGeneration
+except ImportError:
+    AioGeneration = None
 from .medical_taxonomy import get_all_departments, get_all_document_types, get_all_disease_categories
 
+# 可选的 diskcache：配置 QWEN_INTENT_CACHE_DIR 后用于跨进程重启持久化意图结果
+try:
+    import diskcache
+    DISKCACHE_AVAILABLE = True
+except ImportError:
+    diskcache = None
+    DISKCACHE_AVAILABLE = False
+
+# 可选的 orjson（C 实现），未安装时回退到标准库 json
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _extract_json_object(text: str) -> Optional[str]:
+    """按括号深度扫描出第一个完整的最外层 JSON 对象（跳过字符串内的括号）"""
+    depth = 0
+    start = -1
+    in_string = False
+    escaped = False
+    for i, c in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif c == '\\':
+                escaped = True
+            elif c == '"':
+                in_string = False
+        elif c == '"':
+            if depth > 0:
+                in_string = True
+        elif c == '{':
+            if depth == 0:
+                start = i
+            depth += 1
+        elif c == '}' and depth > 0:
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return None
+
+
 class QwenMedicalIntentRecognizer:
     """基于千问的医疗意图识别器"""
-    
+
+    # 意图结果缓存（按用户问题文本为键）
+    INTENT_CACHE_SIZE = int(os.getenv("QWEN_INTENT_CACHE_SIZE", "10000"))
+    INTENT_CACHE_TTL = int(os.getenv("QWEN_INTENT_CACHE_TTL", "604800"))  # 7 天，仅用于磁盘缓存
+    INTENT_CACHE_DIR = os.getenv("QWEN_INTENT_CACHE_DIR")
+
+    # 批量识别时的最大并发请求数，避免触发接口限流
+    BATCH_CONCURRENCY = int(os.getenv("QWEN_INTENT_CONCURRENCY", "16"))
+
     def __init__(self):
         """初始化千问意图识别器"""
         # 从环境变量获取API密钥
@@ -35,12 +96,28 @@ class QwenMedicalIntentRecognizer:
         
         # 采用统一的文档类型集合（简化枚举）
         self.document_types = get_all_document_types()
-    
-    def create_intent_prompt(self, query: str) -> str:
-        """创建意图识别的提示词（包含是否为医疗问题与候选项）"""
-        prompt = f"""你是一个专业的医疗意图识别专家。请先判断该问题是否属于医疗健康领域，然后识别最相关的科室、疾病类别和文档类型，并给出候选项。
 
-用户问题：{query}
+        # 解析响应时做大量合法性判断，预先构建集合避免逐个扫描列表
+        self._departments_set = frozenset(self.departments)
+        self._disease_categories_set = frozenset(self.disease_categories)
+        self._document_types_set = frozenset(self.document_types)
+
+        # 候选目录是静态的，只构建一次并作为 system 提示词发送（便于服务端前缀缓存）
+        self._system_prompt = self._build_system_prompt()
+
+        # 进程内 LRU 缓存 + 可选磁盘缓存
+        self._intent_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._intent_cache_lock = threading.Lock()
+        self._disk_cache = None
+        if self.INTENT_CACHE_DIR and DISKCACHE_AVAILABLE:
+            try:
+                self._disk_cache = diskcache.Cache(self.INTENT_CACHE_DIR)
+            except Exception as e:
+                logger.warning(f"意图磁盘缓存初始化失败，仅使用内存缓存: {str(e)}")
+
+    def _build_system_prompt(self) -> str:
+        """构建包含候选目录与输出格式的系统提示词"""
+        return f"""你是一个专业的医疗意图识别专家。请先判断用户问题是否属于医疗健康领域，然后识别最相关的科室、疾病类别和文档类型，并给出候选项。
 
 可选科室：{', '.join(self.departments)}
 可选疾病类别：{', '.join(self.disease_categories)}
@@ -70,30 +147,58 @@ class QwenMedicalIntentRecognizer:
 4. reasoning 简要说明分析过程与选择依据。
 5. 输出必须为纯 JSON，不要包含多余文本。
 """
-        return prompt
-    
+
+    def create_intent_prompt(self, query: str) -> str:
+        """创建意图识别的用户提示词（候选项与规则已在系统提示词中）"""
+        return f"用户问题：{query}"
+
+    def _generation_kwargs(self, prompt: str) -> Dict[str, Any]:
+        """同步/异步调用共用的千问请求参数"""
+        return dict(
+            model='qwen-turbo',  # 使用qwen-turbo模型，速度快且效果好
+            messages=[
+                {"role": "system", "content": self._system_prompt},
+                {"role": "user", "content": prompt},
+            ],
+            result_format='message',
+            max_tokens=1000,
+            temperature=0.1,  # 低温度确保输出稳定
+            top_p=0.8,
+            seed=42  # 固定种子确保结果可重现
+        )
+
+    def _response_text(self, response) -> Optional[str]:
+        if response.status_code == 200:
+            return response.output.choices[0].message.content.strip()
+        logger.error(f"千问API调用失败: {response.status_code}, {response.message}")
+        return None
+
     def call_qwen_api(self, prompt: str) -> Optional[str]:
         """调用千问API"""
         try:
             if not self.api_key:
                 logger.warning("API密钥未配置，无法调用千问API")
                 return None
-                
-            response = Generation.call(
-                model='qwen-turbo',  # 使用qwen-turbo模型，速度快且效果好
-                prompt=prompt,
-                max_tokens=1000,
-                temperature=0.1,  # 低温度确保输出稳定
-                top_p=0.8,
-                seed=42  # 固定种子确保结果可重现
-            )
-            
-            if response.status_code == 200:
-                return response.output.text.strip()
-            else:
-                logger.error(f"千问API调用失败: {response.status_code}, {response.message}")
+
+            response = Generation.call(**self._generation_kwargs(prompt))
+            return self._response_text(response)
+
+        except Exception as e:
+            logger.error(f"调用千问API时发生错误: {str(e)}")
+            return None
+
+    async def acall_qwen_api(self, prompt: str) -> Optional[str]:
+        """异步调用千问API"""
+        if AioGeneration is None:
+            return await asyncio.to_thread(self.call_qwen_api, prompt)
+        try:
+            if not self.api_key:
+                logger.warning("API密钥未配置，无法调用千问API")
                 return None
-                
+
+            response = await AioGeneration.call(**self._generation_kwargs(prompt))
+            return self._response_text(response)
+
         except Exception as e:
             logger.error(f"调用千问API时发生错误: {str(e)}")
             return None
@@ -102,13 +207,13 @@ class QwenMedicalIntentRecognizer:
         """解析千问的响应，补充 is_medical 与候选项，并进行基本校验"""
         try:
             # 提取JSON部分（容错）
-            start_idx = response_text.find('{')
-            end_idx = response_text.rfind('}') + 1
-            if start_idx == -1 or end_idx <= start_idx:
+            json_str = _extract_json_object(response_text)
+            if json_str is None:
                 raise ValueError("响应中未找到有效的JSON格式")
 
-            json_str = response_text[start_idx:end_idx]
-            result = json.loads(json_str)
+            result = _json_loads(json_str)
+            if not isinstance(result, dict):
+                raise ValueError("响应JSON不是对象")
 
             # 验证必要字段存在（允许为 None，但必须有键）
             required_fields = ['department', 'disease_category', 'document_type', 'confidence']
@@ -137,25 +242,25 @@ class QwenMedicalIntentRecognizer:
 
             # 跨字段纠错：将误放的值归位
             # 若 document_type 是科室（如“精神科”），而 department 为空或非法，则归到 department
-            if doc_type and doc_type in self.departments and (not dept or dept not in self.departments):
+            if doc_type and doc_type in self._departments_set and (not dept or dept not in self._departments_set):
                 dept = doc_type
                 doc_type = None
             # 若 department 是文档类型（如“临床指南”），而 document_type 为空或非法，则归到 document_type
-            if dept and dept in self.document_types and (not doc_type or doc_type not in self.document_types):
+            if dept and dept in self._document_types_set and (not doc_type or doc_type not in self._document_types_set):
                 doc_type = dept
                 dept = None
             # 若某字段值属于疾病类别但放错了位置，优先归到 disease_category
-            if dept and dept in self.disease_categories and (not dis_cat or dis_cat not in self.disease_categories):
+            if dept and dept in self._disease_categories_set and (not dis_cat or dis_cat not in self._disease_categories_set):
                 dis_cat = dept
                 dept = None
-            if doc_type and doc_type in self.disease_categories and (not dis_cat or dis_cat not in self.disease_categories):
+            if doc_type and doc_type in self._disease_categories_set and (not dis_cat or dis_cat not in self._disease_categories_set):
                 dis_cat = doc_type
                 doc_type = None
 
             # 仅保留合法分类值
-            result['department'] = dept if dept in self.departments else None
-            result['document_type'] = doc_type if doc_type in self.document_types else None
-            result['disease_category'] = dis_cat if dis_cat in self.disease_categories else None
+            result['department'] = dept if dept in self._departments_set else None
+            result['document_type'] = doc_type if doc_type in self._document_types_set else None
+            result['disease_category'] = dis_cat if dis_cat in self._disease_categories_set else None
 
             # 归一化候选项结构并过滤到合法集合
             candidates = result.get('candidates') or {}
@@ -166,17 +271,17 @@ class QwenMedicalIntentRecognizer:
             # 将主预测值放到候选首位并去重、限长
             if result['department']:
                 cand_depts = [result['department']] + cand_depts
-            cand_depts = [x for x in cand_depts if x in self.departments]
+            cand_depts = [x for x in cand_depts if x in self._departments_set]
             cand_depts = list(dict.fromkeys(cand_depts))[:3]
 
             if result['document_type']:
                 cand_docs = [result['document_type']] + cand_docs
-            cand_docs = [x for x in cand_docs if x in self.document_types]
+            cand_docs = [x for x in cand_docs if x in self._document_types_set]
             cand_docs = list(dict.fromkeys(cand_docs))[:3]
 
             if result['disease_category']:
                 cand_cats = [result['disease_category']] + cand_cats
-            cand_cats = [x for x in cand_cats if x in self.disease_categories]
+            cand_cats = [x for x in cand_cats if x in self._disease_categories_set]
             cand_cats = list(dict.fromkeys(cand_cats))[:3]
 
             result['candidates'] = {
@@ -211,11 +316,10 @@ class QwenMedicalIntentRecognizer:
     
     def fallback_recognition(self, query: str) -> Dict[str, Any]:
         """降级方案：基于关键词的简单识别"""
-        from .medical_intent_service import MedicalIntentRecognizer
+        from .medical_intent_service import medical_intent_recognizer
         
         logger.info("使用降级方案进行意图识别")
-        fallback_recognizer = MedicalIntentRecognizer()
-        mi = fallback_recognizer.recognize_intent(query)
+        mi = medical_intent_recognizer.recognize_intent(query)
         return {
             "is_medical": True,
             "department": getattr(mi, 'department', None),
@@ -231,35 +335,119 @@ class QwenMedicalIntentRecognizer:
             }
         }
     
+    def _get_cached_intent(self, query: str) -> Optional[Dict[str, Any]]:
+        """读取意图缓存：先查内存 LRU，再查磁盘缓存"""
+        with self._intent_cache_lock:
+            result = self._intent_cache.get(query)
+            if result is not None:
+                self._intent_cache.move_to_end(query)
+                return copy.deepcopy(result)
+        if self._disk_cache is not None:
+            try:
+                result = self._disk_cache.get(query)
+            except Exception as e:
+                logger.warning(f"读取意图磁盘缓存失败: {str(e)}")
+                result = None
+            if result is not None:
+                self._put_memory_cache(query, result)
+                return copy.deepcopy(result)
+        return None
+
+    def _put_memory_cache(self, query: str, result: Dict[str, Any]):
+        with self._intent_cache_lock:
+            self._intent_cache[query] = result
+            self._intent_cache.move_to_end(query)
+            while len(self._intent_cache) > self.INTENT_CACHE_SIZE:
+                self._intent_cache.popitem(last=False)
+
+    def _set_cached_intent(self, query: str, result: Dict[str, Any]):
+        """写入意图缓存；只缓存千问成功识别的结果，降级结果不缓存"""
+        result = copy.deepcopy(result)
+        self._put_memory_cache(query, result)
+        if self._disk_cache is not None:
+            try:
+                self._disk_cache.set(query, result, expire=self.INTENT_CACHE_TTL)
+            except Exception as e:
+                logger.warning(f"写入意图磁盘缓存失败: {str(e)}")
+
+    def _build_result(self, query: str, response_text: Optional[str]) -> Dict[str, Any]:
+        """根据千问响应生成识别结果；无响应时走降级方案"""
+        if response_text:
+            # 解析响应
+            result = self.parse_qwen_response(response_text)
+            result['method'] = 'qwen_llm'
+            logger.info(f"千问意图识别成功: {result}")
+            # 解析失败时 confidence 为 0，不写入缓存
+            if result.get('confidence'):
+                self._set_cached_intent(query, result)
+            return result
+
+        # 使用降级方案
+        result = self.fallback_recognition(query)
+        result['method'] = 'fallback'
+        logger.info(f"使用降级方案识别意图: {result}")
+        return result
+
+    def _error_result(self, query: str, e: Exception) -> Dict[str, Any]:
+        logger.error(f"意图识别过程中发生错误: {str(e)}")
+        # 使用降级方案
+        result = self.fallback_recognition(query)
+        result['method'] = 'fallback'
+        result['error'] = str(e)
+        return result
+
     def recognize_intent(self, query: str) -> Dict[str, Any]:
         """识别医疗意图"""
+        cached = self._get_cached_intent(query)
+        if cached is not None:
+            return cached
+
         try:
-            # 创建提示词
-            prompt = self.create_intent_prompt(query)
-            
-            # 调用千问API
-            response_text = self.call_qwen_api(prompt)
-            
-            if response_text:
-                # 解析响应
-                result = self.parse_qwen_response(response_text)
-                result['method'] = 'qwen_llm'
-                logger.info(f"千问意图识别成功: {result}")
-                return result
-            else:
-                # 使用降级方案
-                result = self.fallback_recognition(query)
-                result['method'] = 'fallback'
-                logger.info(f"使用降级方案识别意图: {result}")
-                return result
-                
+            # 创建提示词并调用千问API
+            response_text = self.call_qwen_api(self.create_intent_prompt(query))
+            return self._build_result(query, response_text)
         except Exception as e:
-            logger.error(f"意图识别过程中发生错误: {str(e)}")
-            # 使用降级方案
-            result = self.fallback_recognition(query)
-            result['method'] = 'fallback'
-            result['error'] = str(e)
-            return result
+            return self._error_result(query, e)
+
+    async def arecognize_intent(self, query: str) -> Dict[str, Any]:
+        """异步识别医疗意图"""
+        cached = self._get_cached_intent(query)
+        if cached is not None:
+            return cached
+
+        try:
+            response_text = await self.acall_qwen_api(self.create_intent_prompt(query))
+            return self._build_result(query, response_text)
+        except Exception as e:
+            return self._error_result(query, e)
+
+    async def recognize_batch(self, queries: List[str]) -> List[Dict[str, Any]]:
+        """
+        并发识别一批问题的意图，结果顺序与输入一致
+
+        相同问题只请求一次；并发数受 BATCH_CONCURRENCY 限制
+        """
+        semaphore = asyncio.Semaphore(self.BATCH_CONCURRENCY)
+
+        async def _one(query: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.arecognize_intent(query)
+
+        unique_queries = list(dict.fromkeys(queries))
+        results = await asyncio.gather(*[_one(q) for q in unique_queries])
+        by_query = dict(zip(unique_queries, results))
+        return [copy.deepcopy(by_query[q]) for q in queries]
+
+
+_default_recognizer: Optional[QwenMedicalIntentRecognizer] = None
+
+
+def get_qwen_recognizer() -> QwenMedicalIntentRecognizer:
+    """获取共享的识别器实例（复用系统提示词与意图缓存）"""
+    global _default_recognizer
+    if _default_recognizer is None:
+        _default_recognizer = QwenMedicalIntentRecognizer()
+    return _default_recognizer
 
 
 def recognize_qwen_medical_intent(query: str) -> Dict[str, Any]:
@@ -272,8 +460,20 @@ def recognize_qwen_medical_intent(query: str) -> Dict[str, Any]:
     Returns:
         包含识别结果的字典
     """
-    recognizer = QwenMedicalIntentRecognizer()
-    return recognizer.recognize_intent(query)
+    return get_qwen_recognizer().recognize_intent(query)
+
+
+async def recognize_qwen_medical_intent_batch(queries: List[str]) -> List[Dict[str, Any]]:
+    """
+    使用千问并发识别多个问题的医疗意图
+
+    Args:
+        queries: 用户问题列表
+
+    Returns:
+        与输入顺序一致的识别结果列表
+    """
+    return await get_qwen_recognizer().recognize_batch(queries)
 
 
 # 测试函数
@@ -9,45 +9,174 @@ import json
 import time
 import hashlib
 import asyncio
+import functools
+import threading
+import weakref
+from collections import OrderedDict, defaultdict
+from functools import lru_cache
 from typing import Any, Dict, Optional
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 import logging
 
 logger = logging.getLogger(__name__)
 
 # 可选Redis支持
 try:
-    from redis.asyncio import Redis
+    from redis.asyncio import Redis, ConnectionPool
     _REDIS_AVAILABLE = True
 except ImportError:
     Redis = None
+    ConnectionPool = None
     _REDIS_AVAILABLE = False
 
+# 缓存键只需要分布均匀，不需要密码学强度：优先使用 xxhash，未安装时回退到 md5
+try:
+    import xxhash
+
+    def _digest(data: bytes) -> str:
+        return xxhash.xxh3_128_hexdigest(data)
+except ImportError:
+    def _digest(data: bytes) -> str:
+        return hashlib.md5(data).hexdigest()
+
+# 可选的 orjson（C 实现，直接输出 UTF-8 字节），未安装时回退到标准库 json
+try:
+    import orjson
+
+    def _canonical_json(data: Dict[str, Any]) -> bytes:
+        return orjson.dumps(data, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+
+    def _dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, default=str)
+
+    _loads = orjson.loads
+except ImportError:
+    def _canonical_json(data: Dict[str, Any]) -> bytes:
+        return json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj, default=str, ensure_ascii=False).encode('utf-8')
+
+    _loads = json.loads
+
+# 所有 Redis I/O 都在一个常驻的后台事件循环上执行，同步接口通过 run_coroutine_threadsafe 提交
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """获取运行Redis异步I/O的后台事件循环（首次调用时启动）"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="redis-cache-loop", daemon=True).start()
+    return _loop
+
+def _in_event_loop() -> bool:
+    """当前线程是否正在运行事件循环（此时不能同步阻塞等待Redis）"""
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+# Redis 中的值格式版本：v2 起直接存放序列化后的数据本身（不再包裹 CacheEntry）
+_VALUE_FORMAT = "v2"
+
+# Redis 未命中标记（缓存的数据本身可能为 None/空值）
+_MISS = object()
+
+@lru_cache(maxsize=4096)
+def _hash_key(prefix: str, canonical: bytes) -> str:
+    """规范化后的键数据 -> 缓存键；同一请求内 get 未命中后紧接着 set 时可复用"""
+    return f"cache:{prefix}:{_VALUE_FORMAT}:{_digest(canonical)}"
+
 @dataclass
 class CacheEntry:
-    """缓存条目（与原版保持一致）"""
+    """内存回退缓存条目（Redis 中只存数据本身）"""
+    __slots__ = ("data", "timestamp", "ttl")
     data: Any
     timestamp: float
     ttl: int  # 生存时间（秒）
-    access_count: int = 0
     
-    def is_expired(self) -> bool:
-        """检查是否过期"""
-        return time.time() - self.timestamp > self.ttl
-    
-    def access(self):
-        """记录访问"""
-        self.access_count += 1
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        """检查是否过期；timestamp 为 time.monotonic() 时间，批量检查时可传入同一个 now"""
+        if now is None:
+            now = time.monotonic()
+        return now - self.timestamp > self.ttl
+
+class TinyLFU:
+    """
+    基于 Count-Min Sketch 的访问频率估计（TinyLFU 准入过滤）
+
+    4 行计数器，每个计数器上限 15（等价于 4 位计数）；
+    累计记录次数达到 sample_size 后所有计数减半，使频率随时间衰减
+    """
+
+    DEPTH = 4
+    MAX_COUNT = 15
+
+    def __init__(self, capacity: int):
+        width = 1024
+        while width < capacity:
+            width <<= 1
+        self._mask = width - 1
+        self._rows = [bytearray(width) for _ in range(self.DEPTH)]
+        self._sample_size = max(capacity, 1) * 10
+        self._additions = 0
+
+    def _indexes(self, key: str):
+        return [hash((seed, key)) & self._mask for seed in range(self.DEPTH)]
+
+    def increment(self, key: str) -> None:
+        """记录一次访问"""
+        for row, idx in zip(self._rows, self._indexes(key)):
+            if row[idx] < self.MAX_COUNT:
+                row[idx] += 1
+        self._additions += 1
+        if self._additions >= self._sample_size:
+            self._reset()
+
+    def estimate(self, key: str) -> int:
+        """估计访问频率（取各行最小值）"""
+        return min(row[idx] for row, idx in zip(self._rows, self._indexes(key)))
+
+    def _reset(self) -> None:
+        for row in self._rows:
+            for i, count in enumerate(row):
+                if count:
+                    row[i] = count >> 1
+        self._additions //= 2
+
 
 class RedisCacheAdapter:
     """Redis缓存适配器，与原CacheService接口完全兼容"""
+
+    # 写队列：同步 set/invalidate 只负责入队，由后台单个 worker 批量写入 Redis；队列满时丢弃
+    WRITE_QUEUE_SIZE = int(os.getenv("REDIS_WRITE_QUEUE_SIZE", "10000"))
+    WRITE_BATCH_SIZE = 100
+    # 每写入 1024 次内存缓存清理一次过期条目
+    CLEANUP_INTERVAL_MASK = 0x3FF
+    # Redis 可用时的进程内 L1：只保留少量热点键，且最多缓存 L1_TTL 秒，避免长期持有其他进程已失效的数据
+    L1_SIZE = 128
+    L1_TTL = 30
     
     def __init__(self, max_size: int = 1000, default_ttl: int = 3600):
         self.max_size = max_size
         self.default_ttl = default_ttl
-        self._memory_cache: Dict[str, CacheEntry] = {}  # 内存回退缓存
-        self._redis: Optional[Redis] = None
+        self._memory_cache: "OrderedDict[str, CacheEntry]" = OrderedDict()  # 内存回退缓存（按最近使用排序）
+        self._memory_hits: Dict[str, int] = defaultdict(int)  # 按缓存类型统计内存命中次数
+        self._admission = TinyLFU(max_size)  # 内存缓存满时的准入过滤
+        self._memory_sets = 0  # 内存缓存写入计数，用于触发周期清理
+        self._l1: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        # L1、内存回退缓存及准入过滤会被线程池线程、主事件循环和后台写入循环同时访问，统一由该锁保护
+        self._memory_lock = threading.RLock()
+        # Redis 客户端及其连接池绑定在创建时的事件循环上，按事件循环分别维护
+        self._redis_url: Optional[str] = None
+        self._redis_by_loop: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Redis]" = weakref.WeakKeyDictionary()
+        self._redis_lock = threading.Lock()
         self._redis_available = False
+        self._write_queue: Optional[asyncio.Queue] = None  # 在后台事件循环上创建
         
         # 不同类型缓存的TTL设置（与原版保持一致）
         self.ttl_config = {
@@ -69,144 +198,226 @@ class RedisCacheAdapter:
         
         try:
             redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-            self._redis = Redis.from_url(redis_url, decode_responses=True)
+            # 提前解析一次 URL，配置错误时直接回退到内存缓存
+            ConnectionPool.from_url(redis_url)
+            self._redis_url = redis_url
             self._redis_available = True
-            logger.info(f"Redis缓存适配器初始化成功: {redis_url}")
+            logger.info("Redis缓存适配器初始化成功: %s", redis_url)
         except Exception as e:
             logger.warning(f"Redis连接失败，使用内存缓存回退: {e}")
             self._redis_available = False
     
+    def _client(self) -> Optional[Redis]:
+        """获取当前事件循环对应的 Redis 客户端（asyncio 连接不能跨事件循环复用）"""
+        if not self._redis_available:
+            return None
+        loop = asyncio.get_running_loop()
+        with self._redis_lock:
+            client = self._redis_by_loop.get(loop)
+            if client is None:
+                # 并发请求各自占用池中的连接；安装 hiredis 后 redis-py 会自动使用 C 实现的协议解析
+                pool = ConnectionPool.from_url(
+                    self._redis_url,
+                    max_connections=int(os.getenv("REDIS_POOL_SIZE", "32"))
+                )
+                client = Redis(connection_pool=pool)
+                self._redis_by_loop[loop] = client
+        return client
+
     def _generate_key(self, prefix: str, data: Any) -> str:
         """生成缓存键（与原版保持一致）"""
         if isinstance(data, dict):
             # 对字典进行排序以确保一致性
-            sorted_data = json.dumps(data, sort_keys=True, ensure_ascii=False)
+            sorted_data = _canonical_json(data)
         else:
-            sorted_data = str(data)
+            sorted_data = str(data).encode('utf-8')
         
-        hash_obj = hashlib.md5(sorted_data.encode('utf-8'))
-        return f"cache:{prefix}:{hash_obj.hexdigest()}"
+        return _hash_key(prefix, sorted_data)
     
-    async def _redis_get(self, key: str) -> Optional[CacheEntry]:
-        """从Redis获取缓存条目"""
-        if not self._redis_available or not self._redis:
-            return None
+    async def _redis_get(self, key: str) -> Any:
+        """从Redis获取缓存数据，未命中返回 _MISS（过期由 Redis 的 TTL 负责）"""
+        client = self._client()
+        if client is None:
+            return _MISS
         
         try:
-            data = await self._redis.get(key)
-            if data:
-                entry_dict = json.loads(data)
-                entry = CacheEntry(**entry_dict)
-                if not entry.is_expired():
-                    entry.access()
-                    # 更新访问计数到Redis
-                    entry_dict['access_count'] = entry.access_count
-                    await self._redis.set(key, json.dumps(entry_dict, default=str), ex=entry.ttl)
-                    return entry
-                else:
-                    # 删除过期条目
-                    await self._redis.delete(key)
-            return None
+            data = await client.get(key)
+            if data is None:
+                return _MISS
+            return _loads(data)
         except Exception as e:
             logger.warning(f"Redis获取失败: {e}")
-            return None
-    
-    async def _redis_set(self, key: str, entry: CacheEntry) -> bool:
-        """向Redis设置缓存条目"""
-        if not self._redis_available or not self._redis:
-            return False
-        
-        try:
-            entry_dict = asdict(entry)
-            await self._redis.set(key, json.dumps(entry_dict, default=str), ex=entry.ttl)
-            return True
-        except Exception as e:
-            logger.warning(f"Redis设置失败: {e}")
-            return False
+            return _MISS
     
     async def _redis_delete(self, key: str) -> bool:
         """从Redis删除缓存条目"""
-        if not self._redis_available or not self._redis:
+        client = self._client()
+        if client is None:
             return False
         
         try:
-            await self._redis.delete(key)
+            await client.delete(key)
             return True
         except Exception as e:
             logger.warning(f"Redis删除失败: {e}")
             return False
     
     def _cleanup_expired_memory(self):
-        """清理内存中的过期缓存"""
-        expired_keys = []
-        for key, entry in self._memory_cache.items():
-            if entry.is_expired():
-                expired_keys.append(key)
+        """清理内存中的过期缓存（调用方需持有 _memory_lock）"""
+        now = time.monotonic()
+        expired_keys = [key for key, entry in self._memory_cache.items() if now - entry.timestamp > entry.ttl]
         
         for key in expired_keys:
             del self._memory_cache[key]
         
         if expired_keys:
-            logger.debug(f"清理了 {len(expired_keys)} 个过期内存缓存条目")
-    
-    def _evict_lru_memory(self):
-        """内存缓存LRU淘汰策略"""
-        if len(self._memory_cache) >= self.max_size:
-            # 按访问次数和时间排序，淘汰最少使用的
-            sorted_items = sorted(
-                self._memory_cache.items(),
-                key=lambda x: (x[1].access_count, x[1].timestamp)
-            )
-            
-            # 淘汰前10%的条目
-            evict_count = max(1, len(sorted_items) // 10)
-            for i in range(evict_count):
-                key = sorted_items[i][0]
-                del self._memory_cache[key]
-            
-            logger.debug(f"内存缓存LRU淘汰了 {evict_count} 个条目")
+            logger.debug("清理了 %s 个过期内存缓存条目", len(expired_keys))
     
     def _sync_redis_operation(self, async_func, *args, **kwargs):
-        """同步执行异步Redis操作"""
+        """在后台事件循环上同步执行异步Redis操作"""
+        future = asyncio.run_coroutine_threadsafe(async_func(*args, **kwargs), _get_loop())
         try:
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                # 如果事件循环正在运行，创建新的线程来执行
-                import concurrent.futures
-                with concurrent.futures.ThreadPoolExecutor() as executor:
-                    future = executor.submit(asyncio.run, async_func(*args, **kwargs))
-                    return future.result(timeout=5.0)
-            else:
-                return loop.run_until_complete(async_func(*args, **kwargs))
+            return future.result(timeout=5.0)
         except Exception as e:
+            future.cancel()
             logger.warning(f"Redis操作失败，使用内存缓存: {e}")
             return None
+
+    def _enqueue_write(self, op: tuple) -> None:
+        """从任意线程把写操作投递到写队列，不等待结果"""
+        _get_loop().call_soon_threadsafe(self._put_write, op)
+
+    def _put_write(self, op: tuple) -> None:
+        """入队（在后台事件循环上执行）；首次调用时启动写入 worker"""
+        if self._write_queue is None:
+            self._write_queue = asyncio.Queue(maxsize=self.WRITE_QUEUE_SIZE)
+            _get_loop().create_task(self._drain_writes())
+        try:
+            self._write_queue.put_nowait(op)
+        except asyncio.QueueFull:
+            logger.warning("Redis写队列已满，丢弃写操作")
+
+    async def _drain_writes(self) -> None:
+        """写入 worker：每次取出最多 WRITE_BATCH_SIZE 个操作批量执行"""
+        queue = self._write_queue
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.WRITE_BATCH_SIZE and not queue.empty():
+                batch.append(queue.get_nowait())
+            try:
+                await self._apply_writes(batch)
+            except Exception as e:
+                logger.warning(f"Redis批量写入失败，写入内存缓存兜底: {e}")
+                # _memory_store 在 _memory_lock 下写入，可安全地从后台写入循环调用
+                for op in batch:
+                    if op[0] == "set":
+                        self._memory_store(op[1], _loads(op[2]), op[3])
+
+    async def _apply_writes(self, batch: list) -> None:
+        """按顺序执行一批写操作；同一键的 set/delete 合并为最后一次"""
+        pending: Dict[str, tuple] = {}  # key -> (payload, ttl)，payload 为 None 表示删除
+        for op in batch:
+            kind = op[0]
+            if kind == "set":
+                pending[op[1]] = (op[2], op[3])
+            elif kind == "delete":
+                pending[op[1]] = (None, None)
+            else:
+                # 按模式批量删除：先落盘之前的写入，保证先后顺序
+                await self._flush_writes(pending)
+                pending = {}
+                await op[1]()
+        await self._flush_writes(pending)
+
+    async def _flush_writes(self, pending: Dict[str, tuple]) -> None:
+        """用一个非事务 pipeline 执行合并后的 set/delete"""
+        if not pending:
+            return
+        client = self._client()
+        if client is None:
+            # 入队后 Redis 变为不可用：抛出异常，由 _drain_writes 写入内存缓存兜底
+            raise ConnectionError("Redis不可用")
+        async with client.pipeline(transaction=False) as pipe:
+            for key, (payload, ttl) in pending.items():
+                if payload is None:
+                    pipe.delete(key)
+                else:
+                    # 只存数据本身，过期时间交给 Redis 原生 TTL
+                    pipe.set(key, payload, ex=ttl)
+            await pipe.execute()
+        logger.debug("Redis批量写入 %s 个键", len(pending))
+    
+    def _l1_get(self, key: str) -> Any:
+        """查询进程内 L1，未命中或过期返回 _MISS"""
+        with self._memory_lock:
+            entry = self._l1.get(key)
+            if entry is None:
+                return _MISS
+            if entry.is_expired():
+                self._l1.pop(key, None)
+                return _MISS
+            self._l1.move_to_end(key)
+            return entry.data
+    
+    def _l1_put(self, key: str, value: Any, ttl: int) -> None:
+        """写入进程内 L1，超出 L1_SIZE 时淘汰最久未使用的键"""
+        entry = CacheEntry(data=value, timestamp=time.monotonic(), ttl=min(ttl, self.L1_TTL))
+        with self._memory_lock:
+            self._l1[key] = entry
+            self._l1.move_to_end(key)
+            while len(self._l1) > self.L1_SIZE:
+                self._l1.popitem(last=False)
     
     def get(self, cache_type: str, key_data: Any) -> Optional[Any]:
         """获取缓存（同步接口，与原版兼容）"""
-        # 使用asyncio.run来处理异步操作，保持同步接口
+        key = self._generate_key(cache_type, key_data)
+        data = self._l1_get(key)
+        if data is not _MISS:
+            return data
+        # 在事件循环线程中调用时不阻塞等待Redis，直接使用内存缓存
+        if self._redis_available and not _in_event_loop():
+            data = self._sync_redis_operation(self._redis_get, key)
+            if data is not None and data is not _MISS:
+                logger.debug("Redis缓存命中: %s", cache_type)
+                self._l1_put(key, data, self.ttl_config.get(cache_type, self.default_ttl))
+                return data
+        return self._sync_get_fallback(cache_type, key_data)
+    
+    async def aget(self, cache_type: str, key_data: Any) -> Optional[Any]:
+        """
+        异步获取缓存（供运行在事件循环中的调用方使用）
+
+        同步 get() 在事件循环线程中不能阻塞等待 Redis；这里把读取提交到后台事件循环并 await 结果，
+        不阻塞调用方的事件循环，超时或失败时回退到内存缓存
+        """
+        key = self._generate_key(cache_type, key_data)
+        data = self._l1_get(key)
+        if data is not _MISS:
+            return data
+        if not self._redis_available:
+            return self._sync_get_fallback(cache_type, key_data)
+        
+        future = asyncio.run_coroutine_threadsafe(self._async_get(cache_type, key_data), _get_loop())
         try:
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                # 如果已经在事件循环中，创建任务
-                task = asyncio.create_task(self._async_get(cache_type, key_data))
-                # 由于我们在同步方法中，需要特殊处理
-                return self._sync_get_fallback(cache_type, key_data)
-            else:
-                return asyncio.run(self._async_get(cache_type, key_data))
-        except Exception:
-            # 如果异步操作失败，回退到内存缓存
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=5.0)
+        except Exception as e:
+            future.cancel()
+            logger.warning(f"Redis操作失败，使用内存缓存: {e}")
             return self._sync_get_fallback(cache_type, key_data)
     
     async def _async_get(self, cache_type: str, key_data: Any) -> Optional[Any]:
-        """异步获取缓存"""
+        """异步获取缓存（在后台事件循环上执行）"""
         key = self._generate_key(cache_type, key_data)
+        data = self._l1_get(key)
+        if data is not _MISS:
+            return data
         
         # 首先尝试从Redis获取
-        entry = await self._redis_get(key)
-        if entry:
-            logger.debug(f"Redis缓存命中: {cache_type}")
-            return entry.data
+        data = await self._redis_get(key)
+        if data is not _MISS:
+            logger.debug("Redis缓存命中: %s", cache_type)
+            self._l1_put(key, data, self.ttl_config.get(cache_type, self.default_ttl))
+            return data
         
         # Redis未命中，尝试内存缓存
         return self._sync_get_fallback(cache_type, key_data)
@@ -214,83 +425,90 @@ class RedisCacheAdapter:
     def _sync_get_fallback(self, cache_type: str, key_data: Any) -> Optional[Any]:
         """同步内存缓存回退"""
         key = self._generate_key(cache_type, key_data)
-        
-        if key in self._memory_cache:
-            entry = self._memory_cache[key]
-            if not entry.is_expired():
-                entry.access()
-                logger.debug(f"内存缓存命中: {cache_type}")
-                return entry.data
-            else:
-                # 删除过期条目
-                del self._memory_cache[key]
-                logger.debug(f"内存缓存过期: {cache_type}")
+        with self._memory_lock:
+            self._admission.increment(key)
+            
+            entry = self._memory_cache.get(key)
+            if entry is not None:
+                if not entry.is_expired():
+                    self._memory_cache.move_to_end(key)
+                    self._memory_hits[cache_type] += 1
+                    logger.debug("内存缓存命中: %s", cache_type)
+                    return entry.data
+                else:
+                    # 删除过期条目
+                    del self._memory_cache[key]
+                    logger.debug("内存缓存过期: %s", cache_type)
         
         return None
     
     def set(self, cache_type: str, key_data: Any, value: Any, ttl: Optional[int] = None) -> None:
-        """设置缓存（同步接口，与原版兼容）"""
-        try:
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                # 如果已经在事件循环中，创建任务但不等待
-                asyncio.create_task(self._async_set(cache_type, key_data, value, ttl))
+        """
+        设置缓存（同步接口，与原版兼容）
+
+        Redis 可用时入队写 Redis 并更新小容量 L1，不再写内存回退缓存（批量写入失败时由
+        _drain_writes 补写）；事件循环中的调用方应使用 aget() 读取，才能命中 Redis 中的值
+        """
+        if self._redis_available:
+            key = self._generate_key(cache_type, key_data)
+            ttl = ttl or self.ttl_config.get(cache_type, self.default_ttl)
+            try:
+                payload = _dumps(value)
+            except Exception as e:
+                logger.warning(f"Redis缓存序列化失败: {e}")
             else:
-                asyncio.run(self._async_set(cache_type, key_data, value, ttl))
-        except Exception:
-            # 如果异步操作失败，回退到内存缓存
-            pass
+                self._enqueue_write(("set", key, payload, ttl))
+                # 写队列异步落盘，L1 保证本进程紧随其后的读取能命中
+                self._l1_put(key, value, ttl)
+                return
         
-        # 同时设置内存缓存作为回退
         self._sync_set_fallback(cache_type, key_data, value, ttl)
     
-    async def _async_set(self, cache_type: str, key_data: Any, value: Any, ttl: Optional[int] = None) -> None:
-        """异步设置缓存"""
-        key = self._generate_key(cache_type, key_data)
-        ttl = ttl or self.ttl_config.get(cache_type, self.default_ttl)
-        
-        entry = CacheEntry(
-            data=value,
-            timestamp=time.time(),
-            ttl=ttl
-        )
-        
-        # 尝试设置到Redis
-        success = await self._redis_set(key, entry)
-        if success:
-            logger.debug(f"Redis缓存设置: {cache_type}, TTL: {ttl}s")
-    
     def _sync_set_fallback(self, cache_type: str, key_data: Any, value: Any, ttl: Optional[int] = None) -> None:
         """同步内存缓存回退设置"""
-        # 定期清理过期缓存
-        if len(self._memory_cache) % 100 == 0:
-            self._cleanup_expired_memory()
-        
-        # 检查是否需要淘汰
-        self._evict_lru_memory()
-        
         key = self._generate_key(cache_type, key_data)
         ttl = ttl or self.ttl_config.get(cache_type, self.default_ttl)
-        
+        if self._memory_store(key, value, ttl):
+            logger.debug("内存缓存设置: %s, TTL: %ss", cache_type, ttl)
+        else:
+            logger.debug("内存缓存拒绝准入: %s", cache_type)
+    
+    def _memory_store(self, key: str, value: Any, ttl: int) -> bool:
+        """写入内存回退缓存，被准入过滤拒绝时返回 False（线程安全）"""
         entry = CacheEntry(
             data=value,
-            timestamp=time.time(),
+            timestamp=time.monotonic(),
             ttl=ttl
         )
         
-        self._memory_cache[key] = entry
-        logger.debug(f"内存缓存设置: {cache_type}, TTL: {ttl}s")
+        with self._memory_lock:
+            # 定期清理过期缓存（按写入次数计数；按缓存长度取模在缓存写满后会每次都触发全量扫描）
+            self._memory_sets += 1
+            if self._memory_sets & self.CLEANUP_INTERVAL_MASK == 0:
+                self._cleanup_expired_memory()
+
+            # 缓存已满时，新键的访问频率须高于即将淘汰的条目才准入，减少一次性查询造成的抖动
+            self._admission.increment(key)
+            if key not in self._memory_cache and len(self._memory_cache) >= self.max_size:
+                victim = next(iter(self._memory_cache))
+                if self._admission.estimate(key) <= self._admission.estimate(victim):
+                    return False
+
+            self._memory_cache[key] = entry
+            self._memory_cache.move_to_end(key)
+
+            # LRU淘汰：最久未使用的条目位于头部
+            while len(self._memory_cache) > self.max_size:
+                self._memory_cache.popitem(last=False)
+        return True
     
     def invalidate(self, cache_type: str, key_data: Any = None) -> None:
         """失效缓存（与原版兼容）"""
-        try:
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                asyncio.create_task(self._async_invalidate(cache_type, key_data))
+        if self._redis_available:
+            if key_data is None:
+                self._enqueue_write(("call", functools.partial(self._async_invalidate, cache_type)))
             else:
-                asyncio.run(self._async_invalidate(cache_type, key_data))
-        except Exception:
-            pass
+                self._enqueue_write(("delete", self._generate_key(cache_type, key_data)))
         
         # 同时清理内存缓存
         self._sync_invalidate_fallback(cache_type, key_data)
@@ -299,48 +517,69 @@ class RedisCacheAdapter:
         """异步失效缓存"""
         if key_data is None:
             # 失效所有该类型的缓存 - Redis中需要扫描键
-            if self._redis_available and self._redis:
+            client = self._client()
+            if client is not None:
                 try:
-                    pattern = f"cache:{cache_type}:*"
-                    keys = []
-                    async for key in self._redis.scan_iter(match=pattern):
-                        keys.append(key)
-                    if keys:
-                        await self._redis.delete(*keys)
-                        logger.debug(f"Redis失效所有 {cache_type} 缓存")
+                    if await self._unlink_matching(client, f"cache:{cache_type}:*"):
+                        logger.debug("Redis失效所有 %s 缓存", cache_type)
                 except Exception as e:
                     logger.warning(f"Redis批量删除失败: {e}")
         else:
             key = self._generate_key(cache_type, key_data)
             await self._redis_delete(key)
     
+    async def _unlink_matching(self, client, pattern: str) -> int:
+        """
+        边扫描边按批 UNLINK 匹配的键，返回删除数量
+
+        UNLINK 在 Redis 后台线程释放内存，大批量失效时不会阻塞主线程
+        """
+        removed = 0
+        batch = []
+        async for key in client.scan_iter(match=pattern, count=1000):
+            batch.append(key)
+            if len(batch) >= 500:
+                await client.unlink(*batch)
+                removed += len(batch)
+                batch.clear()
+        if batch:
+            await client.unlink(*batch)
+            removed += len(batch)
+        return removed
+
     def _sync_invalidate_fallback(self, cache_type: str, key_data: Any = None) -> None:
         """同步内存缓存失效回退"""
         if key_data is None:
             # 失效所有该类型的缓存
-            keys_to_remove = [k for k in self._memory_cache.keys() if k.startswith(f"cache:{cache_type}:")]
-            for key in keys_to_remove:
-                del self._memory_cache[key]
-            logger.debug(f"内存失效所有 {cache_type} 缓存")
+            prefix = f"cache:{cache_type}:"
+            with self._memory_lock:
+                for cache in (self._memory_cache, self._l1):
+                    for key in [k for k in cache if k.startswith(prefix)]:
+                        del cache[key]
+            logger.debug("内存失效所有 %s 缓存", cache_type)
         else:
             key = self._generate_key(cache_type, key_data)
-            if key in self._memory_cache:
-                del self._memory_cache[key]
-                logger.debug(f"内存失效缓存: {cache_type}")
+            with self._memory_lock:
+                self._l1.pop(key, None)
+                removed = self._memory_cache.pop(key, None) is not None
+            if removed:
+                logger.debug("内存失效缓存: %s", cache_type)
     
     def get_stats(self) -> Dict[str, Any]:
         """获取缓存统计信息（与原版兼容）"""
-        # 内存缓存统计
-        memory_total = len(self._memory_cache)
-        memory_expired = sum(1 for entry in self._memory_cache.values() if entry.is_expired())
+        # 内存缓存统计（在锁内取快照，避免遍历时被其他线程修改）
+        with self._memory_lock:
+            entries = list(self._memory_cache.items())
+        memory_total = len(entries)
+        now = time.monotonic()
+        memory_expired = sum(1 for _, entry in entries if entry.is_expired(now))
         
         memory_type_stats = {}
-        for key, entry in self._memory_cache.items():
+        for key, _ in entries:
             cache_type = key.split(':')[1] if ':' in key else 'unknown'
             if cache_type not in memory_type_stats:
-                memory_type_stats[cache_type] = {'count': 0, 'total_access': 0}
+                memory_type_stats[cache_type] = {'count': 0, 'total_access': self._memory_hits.get(cache_type, 0)}
             memory_type_stats[cache_type]['count'] += 1
-            memory_type_stats[cache_type]['total_access'] += entry.access_count
         
         stats = {
             'total_entries': memory_total,
@@ -355,29 +594,23 @@ class RedisCacheAdapter:
     
     def clear(self) -> None:
         """清空所有缓存（与原版兼容）"""
-        try:
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                asyncio.create_task(self._async_clear())
-            else:
-                asyncio.run(self._async_clear())
-        except Exception:
-            pass
+        if self._redis_available:
+            self._enqueue_write(("call", self._async_clear))
         
         # 清空内存缓存
-        self._memory_cache.clear()
+        with self._memory_lock:
+            self._memory_cache.clear()
+            self._l1.clear()
+            self._memory_hits.clear()
         logger.info("清空所有缓存")
     
     async def _async_clear(self) -> None:
         """异步清空Redis缓存"""
-        if self._redis_available and self._redis:
+        client = self._client()
+        if client is not None:
             try:
                 # 删除所有cache:*键
-                keys = []
-                async for key in self._redis.scan_iter(match="cache:*"):
-                    keys.append(key)
-                if keys:
-                    await self._redis.delete(*keys)
+                if await self._unlink_matching(client, "cache:*"):
                     logger.info("清空Redis缓存")
             except Exception as e:
                 logger.warning(f"清空Redis缓存失败: {e}")
\ No newline at end of file
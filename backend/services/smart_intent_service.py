@@ -3,227 +3,396 @@
 基于简化分类体系进行意图识别，提高匹配成功率和用户体验
 """
 
+import asyncio
+import copy
+import itertools
 import json
 import logging
-from typing import Dict, Any, List, Optional, Tuple
-from .qwen_intent_service import QwenMedicalIntentRecognizer
-from .medical_intent_service import MedicalIntentRecognizer
-from .enhanced_index_service import enhanced_index_service
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AbstractSet, Any, Collection, Dict, List, Optional, Pattern, Tuple
+from .cache_service import cache_service
 from .medical_taxonomy import MedicalDepartment, DocumentType, DiseaseCategory
 
-# 配置日志
-logging.basicConfig(level=logging.INFO)
+# 可选的 pyahocorasick：一次扫描查询即可找出全部医疗信号词，未安装时回退到逐词子串判断
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    ahocorasick = None
+    AHOCORASICK_AVAILABLE = False
+
+# 日志级别与处理器由应用入口配置，库模块只获取自己的 logger
 logger = logging.getLogger(__name__)
 
+# 系统资源缓存有效期（秒）
+RESOURCE_TTL_SECONDS = 60
+
+# 医疗问题判定用的信号词与具体疾病提示词
+_MEDICAL_SIGNALS = (
+    "症状", "诊断", "治疗", "用药", "药物", "检查", "检验", "手术",
+    "指南", "共识", "规范", "医生", "医院", "科", "病", "疾病",
+    "患者", "康复", "急救", "临床", "处方", "剂量", "护理"
+)
+_DISEASE_HINT_SIGNALS = ("抑郁", "焦虑", "高血压", "糖尿病", "肺炎", "胃炎", "骨折", "肿瘤")
+# 每个信号词计 0.15 分、阈值 0.3：不含疾病提示词时至少需要命中 2 个信号词
+_MEDICAL_SIGNAL_MIN_HITS = 2
+
+
+def _build_signal_automaton():
+    """把两组信号词编译成一个 Aho-Corasick 自动机，值为 (是否疾病提示词, 词)"""
+    automaton = ahocorasick.Automaton()
+    for word in _MEDICAL_SIGNALS:
+        automaton.add_word(word, (False, word))
+    for word in _DISEASE_HINT_SIGNALS:
+        automaton.add_word(word, (True, word))
+    automaton.make_automaton()
+    return automaton
+
+
+_SIGNAL_AUTOMATON = _build_signal_automaton() if AHOCORASICK_AVAILABLE else None
+
+# 关键词回退规则：按顺序取第一组命中原始值的关键词，对应的简化分类可用时返回
+_DEPARTMENT_KEYWORD_RULES = (
+    (('心血管', '呼吸', '消化', '内分泌', '肾内', '血液', '神经内'), MedicalDepartment.INTERNAL_MEDICINE.value),
+    (('外科', '骨科', '手术'), MedicalDepartment.SURGERY.value),
+    (('儿科', '小儿', '新生儿'), MedicalDepartment.PEDIATRICS.value),
+    (('妇', '产科'), MedicalDepartment.OBSTETRICS_GYNECOLOGY.value),
+    (('急诊', '重症', 'ICU'), MedicalDepartment.EMERGENCY.value),
+)
+_DOCUMENT_TYPE_KEYWORD_RULES = (
+    (('指南', '标准', '共识', '规范'), DocumentType.CLINICAL_GUIDELINE.value),
+    (('治疗', '急救', '质量'), DocumentType.TREATMENT_PROTOCOL.value),
+    (('药', '用药', '说明书'), DocumentType.DRUG_REFERENCE.value),
+    (('操作', '手术', '检查', '技术'), DocumentType.PROCEDURE_GUIDE.value),
+)
+_DISEASE_KEYWORD_RULES = (
+    (('心脏', '心血管', '循环'), DiseaseCategory.CARDIOVASCULAR.value),
+    (('肺', '呼吸', '气管'), DiseaseCategory.RESPIRATORY.value),
+    (('胃', '肠', '肝', '消化'), DiseaseCategory.DIGESTIVE.value),
+    (('神经', '脑', '视觉', '耳'), DiseaseCategory.NEUROLOGICAL.value),
+    (('精神', '心理', '行为'), DiseaseCategory.MENTAL_DISORDERS.value),
+    (('感染', '病毒', '细菌'), DiseaseCategory.INFECTIOUS.value),
+    (('肿瘤', '癌', '糖尿病', '慢性'), DiseaseCategory.CHRONIC_DISEASES.value),
+)
+_DEPARTMENT_VALUES = frozenset(d.value for d in MedicalDepartment)
+_DOCUMENT_TYPE_VALUES = frozenset(d.value for d in DocumentType)
+_DISEASE_CATEGORY_VALUES = frozenset(d.value for d in DiseaseCategory)
+
+
+def _as_set(values: Optional[Collection[str]]) -> AbstractSet[str]:
+    """列表参数转为 frozenset，已是集合时原样返回"""
+    if isinstance(values, (set, frozenset)):
+        return values
+    return frozenset(values or ())
+
+
+def _invert_mapping(mapping: Dict[str, str]) -> Dict[str, List[str]]:
+    """{原始名称: 简化分类} -> {简化分类: [原始名称, ...]}"""
+    reverse: Dict[str, List[str]] = {}
+    for k, v in mapping.items():
+        reverse.setdefault(v, []).append(k)
+    return reverse
+
+
+# 候选项字段：(输出键, 识别结果键, 反向索引属性, 系统资源键)
+_CANDIDATE_FIELDS = (
+    ("candidate_departments", "department", "_dept_reverse", "departments"),
+    ("candidate_document_types", "document_type", "_doc_reverse", "document_types"),
+    ("candidate_disease_categories", "disease_category", "_disease_reverse", "disease_categories"),
+)
+
+
+def _merge_candidates(primary: Optional[str], aliases: Collection[str],
+                      available: Collection[str], limit: int = 3) -> List[str]:
+    """按顺序合并并去重（dict.fromkeys 保序），跳过空值，最多返回 limit 个"""
+    merged = dict.fromkeys(x for x in itertools.chain((primary,), aliases, itertools.islice(available, limit)) if x)
+    return list(itertools.islice(merged, limit))
+
+
+def _compile_keyword_rules(rules: Tuple[Tuple[Tuple[str, ...], str], ...]) -> Tuple[Tuple[Pattern[str], str], ...]:
+    """每组关键词编译为一个多选正则，一次 search 代替逐个子串判断（组间仍按顺序，保留优先级）"""
+    return tuple((re.compile("|".join(map(re.escape, keywords))), value) for keywords, value in rules)
+
+
+_DEPARTMENT_FALLBACK = _compile_keyword_rules(_DEPARTMENT_KEYWORD_RULES)
+_DOCUMENT_TYPE_FALLBACK = _compile_keyword_rules(_DOCUMENT_TYPE_KEYWORD_RULES)
+_DISEASE_FALLBACK = _compile_keyword_rules(_DISEASE_KEYWORD_RULES)
+
+
+def _keyword_fallback(target: str, available: AbstractSet[str],
+                      rules: Tuple[Tuple[Pattern[str], str], ...],
+                      enum_values: frozenset) -> Optional[str]:
+    """简化分类的关键词回退；系统中没有任何简化分类时不做回退"""
+    if available.isdisjoint(enum_values):
+        return None
+    for pattern, value in rules:
+        if pattern.search(target):
+            return value if value in available else None
+    return None
+
 class SmartMedicalIntentRecognizer:
     """智能医疗意图识别器（简化版）"""
     
+    # 匹配失败时的兜底分类（类定义时取一次枚举值）
+    _DEPT_FALLBACK_DEFAULT = MedicalDepartment.INTERNAL_MEDICINE.value
+    _DOC_FALLBACK_DEFAULT = DocumentType.GENERAL_REFERENCE.value
+    _DISEASE_FALLBACK_DEFAULT = DiseaseCategory.GENERAL_CONDITIONS.value
+    
+    # 映射表及其反向索引在类定义时构建一次，所有实例共享（只读使用，不要在实例上修改）
+    # 科室映射规则（简化版）
+    department_mapping = {
+        # 内科系统映射
+        "心血管科": MedicalDepartment.INTERNAL_MEDICINE.value,
+        "呼吸科": MedicalDepartment.INTERNAL_MEDICINE.value,
+        "消化科": MedicalDepartment.INTERNAL_MEDICINE.value,
+        "内分泌科": MedicalDepartment.INTERNAL_MEDICINE.value,
+        "肾内科": MedicalDepartment.INTERNAL_MEDICINE.value,
+        "血液科": MedicalDepartment.INTERNAL_MEDICINE.value,
+        "肿瘤科": MedicalDepartment.INTERNAL_MEDICINE.value,
+        "风湿科": MedicalDepartment.INTERNAL_MEDICINE.value,
+        "神经内科": MedicalDepartment.INTERNAL_MEDICINE.value,
+        
+        # 外科系统映射
+        "普外科": MedicalDepartment.SURGERY.value,
+        "骨科": MedicalDepartment.SURGERY.value,
+        "神经外科": MedicalDepartment.SURGERY.value,
+        "胸外科": MedicalDepartment.SURGERY.value,
+        "泌尿外科": MedicalDepartment.SURGERY.value,
+        "整形外科": MedicalDepartment.SURGERY.value,
+        
+        # 专科系统映射
+        "眼科": MedicalDepartment.SPECIALIZED.value,
+        "耳鼻喉科": MedicalDepartment.SPECIALIZED.value,
+        "皮肤科": MedicalDepartment.SPECIALIZED.value,
+        "口腔科": MedicalDepartment.SPECIALIZED.value,
+        "康复科": MedicalDepartment.SPECIALIZED.value,
+        "影像科": MedicalDepartment.SPECIALIZED.value,
+        "检验科": MedicalDepartment.SPECIALIZED.value,
+        "病理科": MedicalDepartment.SPECIALIZED.value,
+        "药学科": MedicalDepartment.SPECIALIZED.value,
+        
+        # 儿科保持独立
+        "儿科": MedicalDepartment.PEDIATRICS.value,
+        "新生儿科": MedicalDepartment.PEDIATRICS.value,
+        
+        # 妇产科保持独立
+        "妇科": MedicalDepartment.OBSTETRICS_GYNECOLOGY.value,
+        "产科": MedicalDepartment.OBSTETRICS_GYNECOLOGY.value,
+        "妇产科": MedicalDepartment.OBSTETRICS_GYNECOLOGY.value,
+        
+        # 急诊科保持独立
+        "急诊科": MedicalDepartment.EMERGENCY.value,
+        "重症医学科": MedicalDepartment.EMERGENCY.value,
+        "ICU": MedicalDepartment.EMERGENCY.value,
+    }
+    
+    # 文档类型映射规则（简化版）
+    document_type_mapping = {
+        # 临床指南类
+        "临床指南": DocumentType.CLINICAL_GUIDELINE.value,
+        "诊疗指南": DocumentType.CLINICAL_GUIDELINE.value,
+        "诊断标准": DocumentType.CLINICAL_GUIDELINE.value,
+        "专家共识": DocumentType.CLINICAL_GUIDELINE.value,
+        "预防指南": DocumentType.CLINICAL_GUIDELINE.value,
+        "感控指南": DocumentType.CLINICAL_GUIDELINE.value,
+        "护理指南": DocumentType.CLINICAL_GUIDELINE.value,
+        
+        # 治疗方案类
+        "治疗方案": DocumentType.TREATMENT_PROTOCOL.value,
+        "治疗指南": DocumentType.TREATMENT_PROTOCOL.value,
+        "急救流程": DocumentType.TREATMENT_PROTOCOL.value,
+        "质量标准": DocumentType.TREATMENT_PROTOCOL.value,
+        "诊疗规范": DocumentType.TREATMENT_PROTOCOL.value,
+        "康复指南": DocumentType.TREATMENT_PROTOCOL.value,
+        
+        # 药物参考类
+        "药物说明书": DocumentType.DRUG_REFERENCE.value,
+        "用药指南": DocumentType.DRUG_REFERENCE.value,
+        "药品手册": DocumentType.DRUG_REFERENCE.value,
+        
+        # 操作指南类
+        "手术操作": DocumentType.PROCEDURE_GUIDE.value,
+        "检验参考": DocumentType.PROCEDURE_GUIDE.value,
+        "影像图谱": DocumentType.PROCEDURE_GUIDE.value,
+        "操作规程": DocumentType.PROCEDURE_GUIDE.value,
+        "技术规范": DocumentType.PROCEDURE_GUIDE.value,
+        
+        # 综合参考类
+        "病例研究": DocumentType.GENERAL_REFERENCE.value,
+        "研究论文": DocumentType.GENERAL_REFERENCE.value,
+        "医学教材": DocumentType.GENERAL_REFERENCE.value,
+        "护理手册": DocumentType.GENERAL_REFERENCE.value,
+        "患者教育": DocumentType.GENERAL_REFERENCE.value,
+    }
+    
+    # 疾病分类映射规则（简化版）
+    disease_category_mapping = {
+        # 心血管系统疾病
+        "循环系统疾病": DiseaseCategory.CARDIOVASCULAR.value,
+        "心血管疾病": DiseaseCategory.CARDIOVASCULAR.value,
+        
+        # 呼吸系统疾病
+        "呼吸系统疾病": DiseaseCategory.RESPIRATORY.value,
+        
+        # 消化系统疾病
+        "消化系统疾病": DiseaseCategory.DIGESTIVE.value,
+        
+        # 神经系统疾病
+        "神经系统疾病": DiseaseCategory.NEUROLOGICAL.value,
+        "视觉系统疾病": DiseaseCategory.NEUROLOGICAL.value,
+        "耳部疾病": DiseaseCategory.NEUROLOGICAL.value,
+        
+        # 精神心理疾病
+        "精神、行为和神经发育障碍": DiseaseCategory.MENTAL_DISORDERS.value,
+        "抑郁症": DiseaseCategory.MENTAL_DISORDERS.value,
+        "焦虑症": DiseaseCategory.MENTAL_DISORDERS.value,
+        
+        # 感染性疾病
+        "感染性疾病": DiseaseCategory.INFECTIOUS.value,
+        "病毒感染": DiseaseCategory.INFECTIOUS.value,
+        "细菌感染": DiseaseCategory.INFECTIOUS.value,
+        
+        # 慢性疾病
+        "肿瘤": DiseaseCategory.CHRONIC_DISEASES.value,
+        "内分泌、营养和代谢疾病": DiseaseCategory.CHRONIC_DISEASES.value,
+        "血液及造血器官疾病": DiseaseCategory.CHRONIC_DISEASES.value,
+        "免疫系统疾病": DiseaseCategory.CHRONIC_DISEASES.value,
+        "肌肉骨骼系统疾病": DiseaseCategory.CHRONIC_DISEASES.value,
+        "糖尿病": DiseaseCategory.CHRONIC_DISEASES.value,
+        
+        # 常见病症
+        "皮肤疾病": DiseaseCategory.GENERAL_CONDITIONS.value,
+        "泌尿生殖系统疾病": DiseaseCategory.GENERAL_CONDITIONS.value,
+        "妊娠、分娩和产褥期": DiseaseCategory.GENERAL_CONDITIONS.value,
+        "围产期疾病": DiseaseCategory.GENERAL_CONDITIONS.value,
+        "先天性畸形": DiseaseCategory.GENERAL_CONDITIONS.value,
+        "损伤、中毒和外因": DiseaseCategory.GENERAL_CONDITIONS.value,
+    }
+    
+    # 反向索引：简化分类 -> 映射到它的原始名称（保持映射表中的顺序），供候选项生成直接查表
+    _dept_reverse = _invert_mapping(department_mapping)
+    _doc_reverse = _invert_mapping(document_type_mapping)
+    _disease_reverse = _invert_mapping(disease_category_mapping)
+    
+    # 资源过期时在后台预取，与千问调用并行（线程在首次提交时才创建）
+    _prefetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="intent-resources")
+    
     def __init__(self):
         """初始化智能意图识别器"""
-        self.qwen_recognizer = QwenMedicalIntentRecognizer()
-        self.fallback_recognizer = MedicalIntentRecognizer()
+        # 底层识别器在首次使用时才导入并获取（非医疗问题与纯规则路径无需加载千问客户端）
+        self._qwen_recognizer = None
+        self._fallback_recognizer = None
         
         # 缓存系统资源信息
         self._system_resources = None
         self._last_resource_update = None
-        
-        # 科室映射规则（简化版）
-        self.department_mapping = {
-            # 内科系统映射
-            "心血管科": MedicalDepartment.INTERNAL_MEDICINE.value,
-            "呼吸科": MedicalDepartment.INTERNAL_MEDICINE.value,
-            "消化科": MedicalDepartment.INTERNAL_MEDICINE.value,
-            "内分泌科": MedicalDepartment.INTERNAL_MEDICINE.value,
-            "肾内科": MedicalDepartment.INTERNAL_MEDICINE.value,
-            "血液科": MedicalDepartment.INTERNAL_MEDICINE.value,
-            "肿瘤科": MedicalDepartment.INTERNAL_MEDICINE.value,
-            "风湿科": MedicalDepartment.INTERNAL_MEDICINE.value,
-            "神经内科": MedicalDepartment.INTERNAL_MEDICINE.value,
-            
-            # 外科系统映射
-            "普外科": MedicalDepartment.SURGERY.value,
-            "骨科": MedicalDepartment.SURGERY.value,
-            "神经外科": MedicalDepartment.SURGERY.value,
-            "胸外科": MedicalDepartment.SURGERY.value,
-            "泌尿外科": MedicalDepartment.SURGERY.value,
-            "整形外科": MedicalDepartment.SURGERY.value,
-            
-            # 专科系统映射
-            "眼科": MedicalDepartment.SPECIALIZED.value,
-            "耳鼻喉科": MedicalDepartment.SPECIALIZED.value,
-            "皮肤科": MedicalDepartment.SPECIALIZED.value,
-            "口腔科": MedicalDepartment.SPECIALIZED.value,
-            "康复科": MedicalDepartment.SPECIALIZED.value,
-            "影像科": MedicalDepartment.SPECIALIZED.value,
-            "检验科": MedicalDepartment.SPECIALIZED.value,
-            "病理科": MedicalDepartment.SPECIALIZED.value,
-            "药学科": MedicalDepartment.SPECIALIZED.value,
-            
-            # 儿科保持独立
-            "儿科": MedicalDepartment.PEDIATRICS.value,
-            "新生儿科": MedicalDepartment.PEDIATRICS.value,
-            
-            # 妇产科保持独立
-            "妇科": MedicalDepartment.OBSTETRICS_GYNECOLOGY.value,
-            "产科": MedicalDepartment.OBSTETRICS_GYNECOLOGY.value,
-            "妇产科": MedicalDepartment.OBSTETRICS_GYNECOLOGY.value,
-            
-            # 急诊科保持独立
-            "急诊科": MedicalDepartment.EMERGENCY.value,
-            "重症医学科": MedicalDepartment.EMERGENCY.value,
-            "ICU": MedicalDepartment.EMERGENCY.value,
-        }
-        
-        # 文档类型映射规则（简化版）
-        self.document_type_mapping = {
-            # 临床指南类
-            "临床指南": DocumentType.CLINICAL_GUIDELINE.value,
-            "诊疗指南": DocumentType.CLINICAL_GUIDELINE.value,
-            "诊断标准": DocumentType.CLINICAL_GUIDELINE.value,
-            "专家共识": DocumentType.CLINICAL_GUIDELINE.value,
-            "预防指南": DocumentType.CLINICAL_GUIDELINE.value,
-            "感控指南": DocumentType.CLINICAL_GUIDELINE.value,
-            "护理指南": DocumentType.CLINICAL_GUIDELINE.value,
-            
-            # 治疗方案类
-            "治疗方案": DocumentType.TREATMENT_PROTOCOL.value,
-            "治疗指南": DocumentType.TREATMENT_PROTOCOL.value,
-            "急救流程": DocumentType.TREATMENT_PROTOCOL.value,
-            "质量标准": DocumentType.TREATMENT_PROTOCOL.value,
-            "诊疗规范": DocumentType.TREATMENT_PROTOCOL.value,
-            "康复指南": DocumentType.TREATMENT_PROTOCOL.value,
-            
-            # 药物参考类
-            "药物说明书": DocumentType.DRUG_REFERENCE.value,
-            "用药指南": DocumentType.DRUG_REFERENCE.value,
-            "药品手册": DocumentType.DRUG_REFERENCE.value,
-            
-            # 操作指南类
-            "手术操作": DocumentType.PROCEDURE_GUIDE.value,
-            "检验参考": DocumentType.PROCEDURE_GUIDE.value,
-            "影像图谱": DocumentType.PROCEDURE_GUIDE.value,
-            "操作规程": DocumentType.PROCEDURE_GUIDE.value,
-            "技术规范": DocumentType.PROCEDURE_GUIDE.value,
-            
-            # 综合参考类
-            "病例研究": DocumentType.GENERAL_REFERENCE.value,
-            "研究论文": DocumentType.GENERAL_REFERENCE.value,
-            "医学教材": DocumentType.GENERAL_REFERENCE.value,
-            "护理手册": DocumentType.GENERAL_REFERENCE.value,
-            "患者教育": DocumentType.GENERAL_REFERENCE.value,
-        }
-        
-        # 疾病分类映射规则（简化版）
-        self.disease_category_mapping = {
-            # 心血管系统疾病
-            "循环系统疾病": DiseaseCategory.CARDIOVASCULAR.value,
-            "心血管疾病": DiseaseCategory.CARDIOVASCULAR.value,
-            
-            # 呼吸系统疾病
-            "呼吸系统疾病": DiseaseCategory.RESPIRATORY.value,
-            
-            # 消化系统疾病
-            "消化系统疾病": DiseaseCategory.DIGESTIVE.value,
-            
-            # 神经系统疾病
-            "神经系统疾病": DiseaseCategory.NEUROLOGICAL.value,
-            "视觉系统疾病": DiseaseCategory.NEUROLOGICAL.value,
-            "耳部疾病": DiseaseCategory.NEUROLOGICAL.value,
-            
-            # 精神心理疾病
-            "精神、行为和神经发育障碍": DiseaseCategory.MENTAL_DISORDERS.value,
-            "抑郁症": DiseaseCategory.MENTAL_DISORDERS.value,
-            "焦虑症": DiseaseCategory.MENTAL_DISORDERS.value,
-            
-            # 感染性疾病
-            "感染性疾病": DiseaseCategory.INFECTIOUS.value,
-            "病毒感染": DiseaseCategory.INFECTIOUS.value,
-            "细菌感染": DiseaseCategory.INFECTIOUS.value,
-            
-            # 慢性疾病
-            "肿瘤": DiseaseCategory.CHRONIC_DISEASES.value,
-            "内分泌、营养和代谢疾病": DiseaseCategory.CHRONIC_DISEASES.value,
-            "血液及造血器官疾病": DiseaseCategory.CHRONIC_DISEASES.value,
-            "免疫系统疾病": DiseaseCategory.CHRONIC_DISEASES.value,
-            "肌肉骨骼系统疾病": DiseaseCategory.CHRONIC_DISEASES.value,
-            "糖尿病": DiseaseCategory.CHRONIC_DISEASES.value,
-            
-            # 常见病症
-            "皮肤疾病": DiseaseCategory.GENERAL_CONDITIONS.value,
-            "泌尿生殖系统疾病": DiseaseCategory.GENERAL_CONDITIONS.value,
-            "妊娠、分娩和产褥期": DiseaseCategory.GENERAL_CONDITIONS.value,
-            "围产期疾病": DiseaseCategory.GENERAL_CONDITIONS.value,
-            "先天性畸形": DiseaseCategory.GENERAL_CONDITIONS.value,
-            "损伤、中毒和外因": DiseaseCategory.GENERAL_CONDITIONS.value,
-        }
+        self._resource_ttl = float(RESOURCE_TTL_SECONDS)
+        # 合并并发刷新：同一时刻只有一个线程访问索引服务
+        self._resource_lock = threading.Lock()
+        # 随资源刷新构建的集合形式，供匹配阶段 O(1) 成员判断
+        self._resource_sets: Dict[str, frozenset] = {}
     
-    def _detect_is_medical(self, query: str) -> Tuple[bool, float, List[str]]:
-        """判断是否为医疗问题，返回是否、置信度和命中词"""
-        medical_signals = [
-            "症状", "诊断", "治疗", "用药", "药物", "检查", "检验", "手术",
-            "指南", "共识", "规范", "医生", "医院", "科", "病", "疾病",
-            "患者", "康复", "急救", "临床", "处方", "剂量", "护理"
-        ]
-        matched = [w for w in medical_signals if w in query]
+    @property
+    def qwen_recognizer(self):
+        """千问意图识别器（复用进程内共享实例，共享千问意图缓存）"""
+        if self._qwen_recognizer is None:
+            from .qwen_intent_service import get_qwen_recognizer
+            self._qwen_recognizer = get_qwen_recognizer()
+        return self._qwen_recognizer
+    
+    @property
+    def fallback_recognizer(self):
+        """规则备用识别器（复用模块级共享实例，避免重复构建关键词表）"""
+        if self._fallback_recognizer is None:
+            from .medical_intent_service import medical_intent_recognizer
+            self._fallback_recognizer = medical_intent_recognizer
+        return self._fallback_recognizer
+    
+    def _detect_is_medical(self, query: str, exhaustive: bool = True) -> Tuple[bool, float, List[str]]:
+        """
+        判断是否为医疗问题，返回是否、置信度和命中词
+
+        命中疾病提示词或至少 _MEDICAL_SIGNAL_MIN_HITS 个信号词即判定为医疗问题；
+        exhaustive=False 时一旦可判定为医疗问题就提前结束扫描，此时置信度与命中词只反映已扫描部分
+        """
+        if _SIGNAL_AUTOMATON is not None:
+            hits = set()
+            has_disease_hint = False
+            for _, (is_hint, word) in _SIGNAL_AUTOMATON.iter(query):
+                if is_hint:
+                    has_disease_hint = True
+                else:
+                    hits.add(word)
+                if not exhaustive and (has_disease_hint or len(hits) >= _MEDICAL_SIGNAL_MIN_HITS):
+                    break
+            # 命中词按信号表顺序输出，与逐词判断的结果一致
+            matched = [w for w in _MEDICAL_SIGNALS if w in hits]
+        else:
+            has_disease_hint = any(h in query for h in _DISEASE_HINT_SIGNALS)
+            matched = []
+            if exhaustive or not has_disease_hint:
+                for w in _MEDICAL_SIGNALS:
+                    if w in query:
+                        matched.append(w)
+                        if not exhaustive and len(matched) >= _MEDICAL_SIGNAL_MIN_HITS:
+                            break
         score = min(1.0, 0.15 * len(matched))
         # 进一步加权：出现具体疾病词提高分数
-        disease_hint_signals = ["抑郁", "焦虑", "高血压", "糖尿病", "肺炎", "胃炎", "骨折", "肿瘤"]
-        if any(h in query for h in disease_hint_signals):
+        if has_disease_hint:
             score = min(1.0, score + 0.3)
         is_medical = score >= 0.3
         return is_medical, score, matched
     
     def _generate_candidates(self, intent: Dict[str, Any], system_resources: Optional[Dict[str, Any]]) -> Dict[str, List[str]]:
         """根据识别结果与系统资源生成候选项（医生端）"""
-        candidates = {
-            "candidate_departments": [],
-            "candidate_document_types": [],
-            "candidate_disease_categories": []
-        }
-        system_resources = system_resources or {"departments": [], "document_types": [], "disease_categories": []}
-        
-        # 科室候选
-        dept = intent.get("department")
-        if dept:
-            candidates["candidate_departments"].append(dept)
-        for k, v in self.department_mapping.items():
-            if v == dept and k not in candidates["candidate_departments"]:
-                candidates["candidate_departments"].append(k)
-        for d in system_resources.get("departments", [])[:3]:
-            if d not in candidates["candidate_departments"]:
-                candidates["candidate_departments"].append(d)
-        candidates["candidate_departments"] = candidates["candidate_departments"][:3]
-        
-        # 文档类型候选
-        doc = intent.get("document_type")
-        if doc:
-            candidates["candidate_document_types"].append(doc)
-        for k, v in self.document_type_mapping.items():
-            if v == doc and k not in candidates["candidate_document_types"]:
-                candidates["candidate_document_types"].append(k)
-        for t in system_resources.get("document_types", [])[:3]:
-            if t not in candidates["candidate_document_types"]:
-                candidates["candidate_document_types"].append(t)
-        candidates["candidate_document_types"] = candidates["candidate_document_types"][:3]
-        
-        # 疾病分类候选
-        dis = intent.get("disease_category")
-        if dis:
-            candidates["candidate_disease_categories"].append(dis)
-        for k, v in self.disease_category_mapping.items():
-            if v == dis and k not in candidates["candidate_disease_categories"]:
-                candidates["candidate_disease_categories"].append(k)
-        for c in system_resources.get("disease_categories", [])[:3]:
-            if c not in candidates["candidate_disease_categories"]:
-                candidates["candidate_disease_categories"].append(c)
-        candidates["candidate_disease_categories"] = candidates["candidate_disease_categories"][:3]
-        
+        system_resources = system_resources or {}
+        # 候选顺序：识别结果 -> 映射到同一简化分类的原始名称 -> 系统中前 3 个可用项，去重后取前 3 个
+        candidates = {}
+        for output_key, intent_key, reverse_attr, resource_key in _CANDIDATE_FIELDS:
+            value = intent.get(intent_key)
+            candidates[output_key] = _merge_candidates(
+                value, getattr(self, reverse_attr).get(value, ()), system_resources.get(resource_key, ()))
         return candidates
     
     def recognize_intent(self, query: str) -> Dict[str, Any]:
-        """识别用户查询意图"""
-        # 0. 医疗问题判定
-        is_medical, medical_score, matched_terms = self._detect_is_medical(query)
+        """识别用户查询意图（相同查询命中 intent_recognition 缓存时直接返回）"""
+        cached = cache_service.get('intent_recognition', query)
+        if cached is not None:
+            return copy.deepcopy(cached)
+
+        result = self._recognize_intent_uncached(query)
+        if result.get('success'):
+            cache_service.set('intent_recognition', query, copy.deepcopy(result))
+        return result
+    
+    async def arecognize_intent(self, query: str) -> Dict[str, Any]:
+        """识别用户查询意图（异步，供事件循环中的调用方使用：缓存经 aget 读取 Redis，识别在线程中执行）"""
+        cached = await cache_service.aget('intent_recognition', query)
+        if cached is not None:
+            return copy.deepcopy(cached)
+
+        result = await asyncio.to_thread(self._recognize_intent_uncached, query)
+        if result.get('success'):
+            cache_service.set('intent_recognition', query, copy.deepcopy(result))
+        return result
+    
+    def reload_resources(self) -> None:
+        """向量库内容变化后调用：丢弃资源缓存并清空按查询缓存的意图结果，后续查询重新识别"""
+        self.invalidate_system_resources()
+        cache_service.invalidate('intent_recognition')
+    
+    def invalidate_system_resources(self) -> None:
+        """丢弃缓存的系统资源，下次 get_system_resources 时重新加载"""
+        with self._resource_lock:
+            self._system_resources = None
+            self._resource_sets = {}
+
+    def _recognize_intent_uncached(self, query: str) -> Dict[str, Any]:
+        # 0. 医疗问题判定（置信度与命中词只在非医疗分支使用，医疗问题可提前结束扫描）
+        is_medical, medical_score, matched_terms = self._detect_is_medical(query, exhaustive=False)
         if not is_medical:
             return {
                 'success': True,
@@ -238,6 +407,11 @@ class SmartMedicalIntentRecognizer:
                 'method': 'rule_detection'
             }
         
+        # 资源缓存已过期时提前在后台刷新：网络调用期间完成加载，
+        # 之后 optimize_intent_result 直接命中缓存，或在刷新锁上等待这次加载完成
+        if self._cached_resources() is None:
+            self._prefetch_executor.submit(self.get_system_resources)
+        
         try:
             # 首先使用千问模型进行意图识别
             qwen_result = self.qwen_recognizer.recognize_intent(query)
@@ -275,7 +449,10 @@ class SmartMedicalIntentRecognizer:
             }
     
     def optimize_intent_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
-        """优化意图识别结果，基于简化分类体系"""
+        """优化意图识别结果，基于简化分类体系
+
+        返回一次性构建的新字典，不修改传入的 result。
+        """
         if not result or not result.get('success', False):
             return result
         
@@ -286,50 +463,47 @@ class SmartMedicalIntentRecognizer:
             if not system_resources:
                 logger.warning("系统中没有可用的向量库，返回原始结果")
                 return result
-            
-            # 优化科室
+            resource_sets = self._resource_sets
             original_department = result.get('department')
+            original_doc_type = result.get('document_type')
+            original_disease = result.get('disease_category')
+            
+            # 优化科室 / 文档类型 / 疾病分类
             optimized_department = self.find_best_department_match(
-                original_department, system_resources.get('departments', [])
+                original_department, resource_sets.get('departments', system_resources.get('departments', []))
             )
-            
-            # 优化文档类型
-            original_doc_type = result.get('document_type')
             optimized_doc_type = self.find_best_document_type_match(
-                original_doc_type, system_resources.get('document_types', [])
+                original_doc_type, resource_sets.get('document_types', system_resources.get('document_types', []))
             )
-            
-            # 优化疾病分类
-            original_disease = result.get('disease_category')
             optimized_disease = self.find_best_disease_category_match(
-                original_disease, system_resources.get('disease_categories', [])
+                original_disease, resource_sets.get('disease_categories', system_resources.get('disease_categories', []))
             )
             
-            # 更新结果
-            result.update({
+            optimized = {
                 'department': optimized_department,
                 'document_type': optimized_doc_type,
                 'disease_category': optimized_disease,
+            }
+            return {
+                **result,
+                **optimized,
                 'optimization_applied': True,
                 'original_department': original_department,
                 'original_document_type': original_doc_type,
-                'original_disease_category': original_disease
-            })
-            
-            # 候选项
-            candidates = self._generate_candidates(result, system_resources)
-            result.update(candidates)
-            
-            return result
+                'original_disease_category': original_disease,
+                # 候选项
+                **self._generate_candidates(optimized, system_resources),
+            }
             
         except Exception as e:
             logger.error(f"优化意图结果时发生错误: {str(e)}")
             return result
     
-    def find_best_department_match(self, target_department: str, available_departments: List[str]) -> Optional[str]:
+    def find_best_department_match(self, target_department: str, available_departments: Collection[str]) -> Optional[str]:
         """寻找最佳科室匹配（简化版）"""
         if not target_department:
             return None
+        available_departments = _as_set(available_departments)
         
         # 1. 直接匹配
         if target_department in available_departments:
@@ -341,35 +515,22 @@ class SmartMedicalIntentRecognizer:
             return mapped_department
         
         # 3. 智能回退到通用分类
-        for dept_enum in MedicalDepartment:
-            if dept_enum.value in available_departments:
-                # 根据原始科室特征选择最合适的简化分类
-                if any(keyword in target_department for keyword in ['心血管', '呼吸', '消化', '内分泌', '肾内', '血液', '神经内']):
-                    if MedicalDepartment.INTERNAL_MEDICINE.value in available_departments:
-                        return MedicalDepartment.INTERNAL_MEDICINE.value
-                elif any(keyword in target_department for keyword in ['外科', '骨科', '手术']):
-                    if MedicalDepartment.SURGERY.value in available_departments:
-                        return MedicalDepartment.SURGERY.value
-                elif any(keyword in target_department for keyword in ['儿科', '小儿', '新生儿']):
-                    if MedicalDepartment.PEDIATRICS.value in available_departments:
-                        return MedicalDepartment.PEDIATRICS.value
-                elif any(keyword in target_department for keyword in ['妇', '产科']):
-                    if MedicalDepartment.OBSTETRICS_GYNECOLOGY.value in available_departments:
-                        return MedicalDepartment.OBSTETRICS_GYNECOLOGY.value
-                elif any(keyword in target_department for keyword in ['急诊', '重症', 'ICU']):
-                    if MedicalDepartment.EMERGENCY.value in available_departments:
-                        return MedicalDepartment.EMERGENCY.value
+        matched = _keyword_fallback(target_department, available_departments,
+                                    _DEPARTMENT_FALLBACK, _DEPARTMENT_VALUES)
+        if matched:
+            return matched
         
         # 4. 最后回退到内科系统（最通用）
-        if MedicalDepartment.INTERNAL_MEDICINE.value in available_departments:
-            return MedicalDepartment.INTERNAL_MEDICINE.value
+        if self._DEPT_FALLBACK_DEFAULT in available_departments:
+            return self._DEPT_FALLBACK_DEFAULT
         
         return None
     
-    def find_best_document_type_match(self, target_doc_type: str, available_doc_types: List[str]) -> Optional[str]:
+    def find_best_document_type_match(self, target_doc_type: str, available_doc_types: Collection[str]) -> Optional[str]:
         """寻找最佳文档类型匹配（简化版）"""
         if not target_doc_type:
             return None
+        available_doc_types = _as_set(available_doc_types)
         
         # 1. 直接匹配
         if target_doc_type in available_doc_types:
@@ -381,31 +542,22 @@ class SmartMedicalIntentRecognizer:
             return mapped_doc_type
         
         # 3. 智能回退到通用类型
-        for doc_enum in DocumentType:
-            if doc_enum.value in available_doc_types:
-                if any(keyword in target_doc_type for keyword in ['指南', '标准', '共识', '规范']):
-                    if DocumentType.CLINICAL_GUIDELINE.value in available_doc_types:
-                        return DocumentType.CLINICAL_GUIDELINE.value
-                elif any(keyword in target_doc_type for keyword in ['治疗', '急救', '质量']):
-                    if DocumentType.TREATMENT_PROTOCOL.value in available_doc_types:
-                        return DocumentType.TREATMENT_PROTOCOL.value
-                elif any(keyword in target_doc_type for keyword in ['药', '用药', '说明书']):
-                    if DocumentType.DRUG_REFERENCE.value in available_doc_types:
-                        return DocumentType.DRUG_REFERENCE.value
-                elif any(keyword in target_doc_type for keyword in ['操作', '手术', '检查', '技术']):
-                    if DocumentType.PROCEDURE_GUIDE.value in available_doc_types:
-                        return DocumentType.PROCEDURE_GUIDE.value
+        matched = _keyword_fallback(target_doc_type, available_doc_types,
+                                    _DOCUMENT_TYPE_FALLBACK, _DOCUMENT_TYPE_VALUES)
+        if matched:
+            return matched
         
         # 4. 最后回退到综合参考（最通用）
-        if DocumentType.GENERAL_REFERENCE.value in available_doc_types:
-            return DocumentType.GENERAL_REFERENCE.value
+        if self._DOC_FALLBACK_DEFAULT in available_doc_types:
+            return self._DOC_FALLBACK_DEFAULT
         
         return None
     
-    def find_best_disease_category_match(self, target_disease: str, available_diseases: List[str]) -> Optional[str]:
+    def find_best_disease_category_match(self, target_disease: str, available_diseases: Collection[str]) -> Optional[str]:
         """寻找最佳疾病分类匹配（简化版）"""
         if not target_disease:
             return None
+        available_diseases = _as_set(available_diseases)
         
         # 1. 直接匹配
         if target_disease in available_diseases:
@@ -417,48 +569,54 @@ class SmartMedicalIntentRecognizer:
             return mapped_disease
         
         # 3. 智能回退到通用分类
-        for disease_enum in DiseaseCategory:
-            if disease_enum.value in available_diseases:
-                # 根据原始疾病分类特征选择最合适的简化分类
-                if any(keyword in target_disease for keyword in ['心脏', '心血管', '循环']):
-                    if DiseaseCategory.CARDIOVASCULAR.value in available_diseases:
-                        return DiseaseCategory.CARDIOVASCULAR.value
-                elif any(keyword in target_disease for keyword in ['肺', '呼吸', '气管']):
-                    if DiseaseCategory.RESPIRATORY.value in available_diseases:
-                        return DiseaseCategory.RESPIRATORY.value
-                elif any(keyword in target_disease for keyword in ['胃', '肠', '肝', '消化']):
-                    if DiseaseCategory.DIGESTIVE.value in available_diseases:
-                        return DiseaseCategory.DIGESTIVE.value
-                elif any(keyword in target_disease for keyword in ['神经', '脑', '视觉', '耳']):
-                    if DiseaseCategory.NEUROLOGICAL.value in available_diseases:
-                        return DiseaseCategory.NEUROLOGICAL.value
-                elif any(keyword in target_disease for keyword in ['精神', '心理', '行为']):
-                    if DiseaseCategory.MENTAL_DISORDERS.value in available_diseases:
-                        return DiseaseCategory.MENTAL_DISORDERS.value
-                elif any(keyword in target_disease for keyword in ['感染', '病毒', '细菌']):
-                    if DiseaseCategory.INFECTIOUS.value in available_diseases:
-                        return DiseaseCategory.INFECTIOUS.value
-                elif any(keyword in target_disease for keyword in ['肿瘤', '癌', '糖尿病', '慢性']):
-                    if DiseaseCategory.CHRONIC_DISEASES.value in available_diseases:
-                        return DiseaseCategory.CHRONIC_DISEASES.value
+        matched = _keyword_fallback(target_disease, available_diseases,
+                                    _DISEASE_FALLBACK, _DISEASE_CATEGORY_VALUES)
+        if matched:
+            return matched
         
         # 4. 最后回退到常见病症（最通用）
-        if DiseaseCategory.GENERAL_CONDITIONS.value in available_diseases:
-            return DiseaseCategory.GENERAL_CONDITIONS.value
+        if self._DISEASE_FALLBACK_DEFAULT in available_diseases:
+            return self._DISEASE_FALLBACK_DEFAULT
         
         return None
     
+    def _cached_resources(self) -> Optional[Dict[str, List[str]]]:
+        """有效期内的系统资源，过期或未加载时返回 None"""
+        if self._system_resources and time.monotonic() - self._last_resource_update < self._resource_ttl:
+            return self._system_resources
+        return None
+    
     def get_system_resources(self) -> Optional[Dict[str, List[str]]]:
-        """获取系统可用资源"""
+        """获取系统可用资源（缓存 _resource_ttl 秒，默认 RESOURCE_TTL_SECONDS）"""
+        resources = self._cached_resources()
+        if resources is not None:
+            return resources
+        with self._resource_lock:
+            # 等锁期间其他线程可能已完成刷新
+            resources = self._cached_resources()
+            if resources is not None:
+                return resources
+            return self._refresh_system_resources()
+    
+    def _refresh_system_resources(self) -> Optional[Dict[str, List[str]]]:
+        """从增强索引服务重新加载系统资源"""
         try:
-            # 从增强索引服务获取系统资源
+            # 从增强索引服务获取系统资源（首次刷新时才导入，避免导入本模块即加载向量库）
+            from .enhanced_index_service import enhanced_index_service
             resources = enhanced_index_service.get_available_resources()
             
             if resources:
+                # 先建集合、写时间戳，最后发布资源，无锁读取方看到的始终是完整状态
+                self._resource_sets = {
+                    key: frozenset(resources.get(key, []))
+                    for key in ('departments', 'document_types', 'disease_categories')
+                }
+                self._last_resource_update = time.monotonic()
                 self._system_resources = resources
-                logger.info(f"获取到系统资源: {len(resources.get('departments', []))} 个科室, "
-                          f"{len(resources.get('document_types', []))} 个文档类型, "
-                          f"{len(resources.get('disease_categories', []))} 个疾病分类")
+                logger.info("获取到系统资源: %s 个科室, %s 个文档类型, %s 个疾病分类",
+                            len(resources.get('departments', [])),
+                            len(resources.get('document_types', [])),
+                            len(resources.get('disease_categories', [])))
             
             return resources
             
@@ -473,6 +631,10 @@ def recognize_medical_intent(query: str) -> Dict[str, Any]:
     """识别医疗查询意图的便捷函数"""
     return smart_intent_recognizer.recognize_intent(query)
 
+async def arecognize_medical_intent(query: str) -> Dict[str, Any]:
+    """识别医疗查询意图的便捷函数（异步）"""
+    return await smart_intent_recognizer.arecognize_intent(query)
+
 if __name__ == "__main__":
     # 测试示例
     recognizer = SmartMedicalIntentRecognizer()
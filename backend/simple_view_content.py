@@ -5,10 +5,201 @@
 """
 
 import json
+import mmap
 import os
+import struct
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
 import pickle
 
+# 可选的 ijson：流式解析 chunks.json，只物化预览用的前几个块
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    ijson = None
+    IJSON_AVAILABLE = False
+
+# 可选的 orjson：无法流式解析时整体解析 chunks.json 更快
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+# 解码 UTF-8 JSON 字节（.kgidx 头部与记录），装有 orjson 时优先使用
+_loads_json = orjson.loads if ORJSON_AVAILABLE else json.loads
+
+PREVIEW_CHARS = 500
+PREVIEW_CHUNKS = 3
+SCAN_WORKERS = 8
+
+def _print_chunk(j, chunk):
+    """打印单个文档块的预览"""
+    print(f"\n  块 {j+1}:")
+    if isinstance(chunk, dict):
+        for key, value in chunk.items():
+            if key == 'content' and len(str(value)) > 200:
+                print(f"    {key}: {str(value)[:200]}...")
+            else:
+                print(f"    {key}: {value}")
+    else:
+        content = str(chunk)[:200] + "..." if len(str(chunk)) > 200 else str(chunk)
+        print(f"    内容: {content}")
+
+# 各数据目录的解析结果缓存：按目录内文件的 (名称, 大小, 修改时间) 签名失效，未变化的目录不再重新解析
+# 摘要内容的格式变化时递增 INDEX_VERSION，使旧缓存整体失效
+INDEX_FILE = "_index.json"
+INDEX_VERSION = 2
+
+def _load_index(data_path: Path) -> dict:
+    try:
+        with open(data_path / INDEX_FILE, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(index, dict) or index.get("version") != INDEX_VERSION:
+        return {}
+    return index.get("dirs", {})
+
+def _save_index(data_path: Path, index: dict) -> None:
+    tmp_path = data_path / (INDEX_FILE + ".tmp")
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": INDEX_VERSION, "dirs": index}, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, data_path / INDEX_FILE)
+    except OSError as e:
+        print(f"⚠️ 写入目录索引失败: {e}")
+
+def _read_chunks_preview(chunks_file: Path, chunks_count):
+    """返回 (块数量, 前 PREVIEW_CHUNKS 个块)"""
+    if IJSON_AVAILABLE:
+        # 流式解析：前 3 个块用于预览；元数据里已有块数量时读完前 3 个即停止，否则其余只计数不保留
+        with open(chunks_file, 'rb') as f:
+            items = ijson.items(f, 'item', use_float=True)
+            head = list(islice(items, PREVIEW_CHUNKS))
+            total = chunks_count if isinstance(chunks_count, int) else len(head) + sum(1 for _ in items)
+    elif ORJSON_AVAILABLE:
+        with open(chunks_file, 'rb') as f:
+            chunks = orjson.loads(f.read())
+        head, total = chunks[:PREVIEW_CHUNKS], len(chunks)
+    else:
+        with open(chunks_file, 'r', encoding='utf-8') as f:
+            chunks = json.load(f)
+        head, total = chunks[:PREVIEW_CHUNKS], len(chunks)
+    return total, head
+
+def _read_chunks_jsonl_preview(chunks_file: Path, chunks_count):
+    """chunks.jsonl（每行一个块，空行忽略）：只解析前 PREVIEW_CHUNKS 行，块数量取元数据或只数非空行"""
+    with open(chunks_file, 'rb') as f:
+        lines = (line for line in f if line.strip())
+        head = [_loads_json(line) for line in islice(lines, PREVIEW_CHUNKS)]
+        if isinstance(chunks_count, int):
+            return chunks_count, head
+        return len(head) + sum(1 for _ in lines), head
+
+def _summarize_subdir(subdir: Path, files: list) -> dict:
+    """解析单个数据目录，files 为 [名称, 大小(目录为 None), 修改时间] 列表"""
+    summary = {"files": [[name, size] for name, size, _ in files]}
+    names = {name for name, size, _ in files if size is not None}
+
+    # processing_metadata.json
+    chunks_count = None  # 入库时记录的块数量，有则无需数完整个 chunks.json
+    if "processing_metadata.json" in names:
+        try:
+            with open(subdir / "processing_metadata.json", 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+            summary["metadata"] = metadata
+            chunks_count = metadata.get("chunks_count")
+        except Exception as e:
+            summary["metadata_error"] = str(e)
+
+    # 原始 markdown 文件：只读取预览所需的前 500 字符（多读 1 个用于判断是否截断）
+    markdown = []
+    for name, size, _ in files:
+        if size is None or not name.endswith(".md"):
+            continue
+        item = {"name": name, "size": size}
+        try:
+            with open(subdir / name, 'r', encoding='utf-8') as f:
+                content = f.read(PREVIEW_CHARS + 1)
+            item["preview"] = content[:PREVIEW_CHARS] + "..." if len(content) > PREVIEW_CHARS else content
+        except Exception as e:
+            item["error"] = str(e)
+        markdown.append(item)
+    summary["markdown"] = markdown
+
+    # chunks.jsonl 优先（可只读前几行），否则 chunks.json
+    chunks_name = "chunks.jsonl" if "chunks.jsonl" in names else "chunks.json" if "chunks.json" in names else None
+    if chunks_name:
+        try:
+            reader = _read_chunks_jsonl_preview if chunks_name == "chunks.jsonl" else _read_chunks_preview
+            total, head = reader(subdir / chunks_name, chunks_count)
+            summary["chunks"] = {"total": total, "head": head}
+        except Exception as e:
+            summary["chunks"] = {"error": str(e)}
+    return summary
+
+def _print_subdir(i: int, name: str, summary: dict) -> None:
+    print(f"{'='*50}")
+    print(f"目录 {i}: {name}")
+    print(f"{'='*50}")
+
+    # 列出目录中的所有文件
+    files = summary["files"]
+    print(f"文件列表 ({len(files)} 个文件):")
+    for file_name, size in files:
+        print(f"  📄 {file_name} ({size if size is not None else '目录'} 字节)")
+
+    if "metadata" in summary or "metadata_error" in summary:
+        print(f"\n📋 处理元数据:")
+        if "metadata_error" in summary:
+            print(f"  ❌ 读取失败: {summary['metadata_error']}")
+        else:
+            for key, value in summary["metadata"].items():
+                print(f"  {key}: {value}")
+
+    if summary["markdown"]:
+        print(f"\n📝 Markdown文件内容:")
+        for item in summary["markdown"]:
+            print(f"\n  文件: {item['name']}")
+            if "error" in item:
+                print(f"  ❌ 读取失败: {item['error']}")
+            else:
+                print(f"  大小: {item['size']} 字节")
+                print(f"  内容预览:\n{item['preview']}")
+
+    chunks = summary.get("chunks")
+    if chunks is not None:
+        print(f"\n🧩 文档块信息:")
+        if "error" in chunks:
+            print(f"  ❌ 读取失败: {chunks['error']}")
+        else:
+            total = chunks["total"]
+            print(f"  块数量: {total}")
+            # 显示前3个块的内容
+            for j, chunk in enumerate(chunks["head"]):
+                _print_chunk(j, chunk)
+            if total > PREVIEW_CHUNKS:
+                print(f"    ... 还有 {total - PREVIEW_CHUNKS} 个块")
+
+    print(f"\n")
+
+def _list_files(subdir) -> list:
+    """[名称, 大小(目录为 None), 修改时间(ns)]，同时作为缓存签名
+
+    单次 os.scandir 遍历：文件类型取自目录项本身，无需额外的 is_file/glob 调用
+    """
+    files = []
+    with os.scandir(subdir) as it:
+        for entry in it:
+            st = entry.stat()
+            files.append([entry.name, st.st_size if entry.is_file() else None, st.st_mtime_ns])
+    return files
+
 def view_simple_content():
     """查看简单的数据库内容"""
     print("=== 医疗数据库内容查看 ===\n")
@@ -22,78 +213,27 @@ def view_simple_content():
     print(f"数据目录: {data_path.absolute()}\n")
     
     # 遍历所有子目录
-    subdirs = [d for d in data_path.iterdir() if d.is_dir()]
+    with os.scandir(data_path) as it:
+        subdirs = [Path(e.path) for e in it if e.is_dir(follow_symlinks=False)]
     print(f"找到 {len(subdirs)} 个数据目录:\n")
     
-    for i, subdir in enumerate(subdirs, 1):
-        print(f"{'='*50}")
-        print(f"目录 {i}: {subdir.name}")
-        print(f"{'='*50}")
-        
-        # 列出目录中的所有文件
-        files = list(subdir.iterdir())
-        print(f"文件列表 ({len(files)} 个文件):")
-        for file in files:
-            size = file.stat().st_size if file.is_file() else "目录"
-            print(f"  📄 {file.name} ({size} 字节)")
-        
-        # 查看processing_metadata.json
-        metadata_file = subdir / "processing_metadata.json"
-        if metadata_file.exists():
-            print(f"\n📋 处理元数据:")
-            try:
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-                for key, value in metadata.items():
-                    print(f"  {key}: {value}")
-            except Exception as e:
-                print(f"  ❌ 读取失败: {e}")
-        
-        # 查看原始markdown文件
-        md_files = list(subdir.glob("*.md"))
-        if md_files:
-            print(f"\n📝 Markdown文件内容:")
-            for md_file in md_files:
-                print(f"\n  文件: {md_file.name}")
-                try:
-                    with open(md_file, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    print(f"  大小: {len(content)} 字符")
-                    # 显示前500字符
-                    preview = content[:500] + "..." if len(content) > 500 else content
-                    print(f"  内容预览:\n{preview}")
-                except Exception as e:
-                    print(f"  ❌ 读取失败: {e}")
-        
-        # 查看chunks.json文件
-        chunks_file = subdir / "chunks.json"
-        if chunks_file.exists():
-            print(f"\n🧩 文档块信息:")
-            try:
-                with open(chunks_file, 'r', encoding='utf-8') as f:
-                    chunks = json.load(f)
-                print(f"  块数量: {len(chunks)}")
-                
-                # 显示前3个块的内容
-                for j, chunk in enumerate(chunks[:3]):
-                    print(f"\n  块 {j+1}:")
-                    if isinstance(chunk, dict):
-                        for key, value in chunk.items():
-                            if key == 'content' and len(str(value)) > 200:
-                                print(f"    {key}: {str(value)[:200]}...")
-                            else:
-                                print(f"    {key}: {value}")
-                    else:
-                        content = str(chunk)[:200] + "..." if len(str(chunk)) > 200 else str(chunk)
-                        print(f"    内容: {content}")
-                
-                if len(chunks) > 3:
-                    print(f"    ... 还有 {len(chunks) - 3} 个块")
-                    
-            except Exception as e:
-                print(f"  ❌ 读取失败: {e}")
-        
-        print(f"\n")
+    old_index = _load_index(data_path)
+    new_index = {}
+
+    def scan(subdir):
+        files = _list_files(subdir)
+        cached = old_index.get(subdir.name)
+        if cached is not None and cached.get("signature") == files:
+            return files, cached["summary"]
+        return files, _summarize_subdir(subdir, files)
+
+    # 各目录的列举与解析以 IO 为主，放到线程池并发执行；map 按提交顺序返回，输出顺序不变
+    with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as executor:
+        for i, (subdir, (files, summary)) in enumerate(zip(subdirs, executor.map(scan, subdirs)), 1):
+            new_index[subdir.name] = {"signature": files, "summary": summary}
+            _print_subdir(i, subdir.name, summary)
+    if new_index != old_index:
+        _save_index(data_path, new_index)
     
     # 查看向量存储目录
     vector_store_path = data_path / "vector_stores"
@@ -102,15 +242,196 @@ def view_simple_content():
         print("向量存储目录")
         print(f"{'='*50}")
         
-        store_dirs = [d for d in vector_store_path.iterdir() if d.is_dir()]
+        with os.scandir(vector_store_path) as it:
+            store_dirs = [(e.name, e.path) for e in it if e.is_dir(follow_symlinks=False)]
         print(f"向量存储数量: {len(store_dirs)}")
         
-        for store_dir in store_dirs:
-            print(f"\n📦 {store_dir.name}:")
-            files = list(store_dir.iterdir())
-            for file in files:
-                size = file.stat().st_size if file.is_file() else "目录"
-                print(f"  {file.name} ({size} 字节)")
+        # 只展示、不缓存：边遍历边输出，不再先收集文件列表；子目录无需 stat
+        for store_name, store_path in store_dirs:
+            print(f"\n📦 {store_name}:")
+            with os.scandir(store_path) as it:
+                for entry in it:
+                    size = entry.stat().st_size if entry.is_file() else "目录"
+                    print(f"  {entry.name} ({size} 字节)")
+
+# ---- 知识图谱预览索引（.kgidx 旁路文件）----
+# 布局：魔数 | uint32 头长度 | 头部 JSON | 实体偏移表 | 关系偏移表 | 记录区
+# 偏移表每项为 (记录区内偏移, 长度)；记录为单个实体/关系的 JSON。
+# 预览时 mmap 打开，只切出前几条记录，计数与类型统计直接取自头部，无需反序列化整张图。
+KG_PREVIEW = 10
+_KG_INDEX_MAGIC = b"KGIX1\n"
+_KG_HEADER_LEN = struct.Struct("<I")
+_KG_TABLE_ENTRY = struct.Struct("<QI")
+
+def _kg_type_name(value):
+    return getattr(value, 'value', str(value))
+
+def kg_index_path(kg_path: Path) -> Path:
+    return kg_path.with_suffix(".kgidx")
+
+def build_kg_index(kg_path: Path, data=None) -> Path:
+    """把 pickle 知识图谱转换为可 mmap 预览的 .kgidx 旁路文件（data 为已加载的 pickle 内容时直接复用）"""
+    if data is None:
+        with open(kg_path, 'rb') as f:
+            data = pickle.load(f)
+    graph = data.get('graph')
+    entities = data.get('entities', {})
+
+    types = [_kg_type_name(ent.entity_type) for ent in entities.values()]
+    type_counts = Counter(types)
+    entity_records = []
+    for (eid, ent), t in zip(entities.items(), types):
+        entity_records.append(json.dumps({
+            "id": eid,
+            "name": ent.name,
+            "type": t,
+            "aliases": list(getattr(ent, 'aliases', None) or []),
+            "description": getattr(ent, 'description', '') or '',
+        }, ensure_ascii=False, default=str).encode('utf-8'))
+
+    edge_records = []
+    if graph is not None:
+        for u, v, key, edge in graph.edges(keys=True, data=True):
+            edge_records.append(json.dumps({
+                "u": u,
+                "v": v,
+                "src_name": entities[u].name if u in entities else u,
+                "tgt_name": entities[v].name if v in entities else v,
+                "relation": _kg_type_name(edge.get('relation_type')),
+                "confidence": edge.get('confidence', ''),
+            }, ensure_ascii=False, default=str).encode('utf-8'))
+
+    stat = kg_path.stat()
+    header = json.dumps({
+        "source_mtime_ns": stat.st_mtime_ns,
+        "source_size": stat.st_size,
+        "entity_count": len(entity_records),
+        "edge_count": len(edge_records),
+        "node_count": graph.number_of_nodes() if graph is not None else len(entities),
+        "has_graph": graph is not None,
+        "type_counts": type_counts,
+    }, ensure_ascii=False).encode('utf-8')
+
+    out_path = kg_index_path(kg_path)
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(_KG_INDEX_MAGIC)
+        f.write(_KG_HEADER_LEN.pack(len(header)))
+        f.write(header)
+        offset = 0
+        for record in entity_records + edge_records:
+            f.write(_KG_TABLE_ENTRY.pack(offset, len(record)))
+            offset += len(record)
+        for record in entity_records + edge_records:
+            f.write(record)
+    os.replace(tmp_path, out_path)
+    return out_path
+
+def _read_kg_index(kg_path: Path, mm):
+    """解析 .kgidx 头部；与源 pickle 的大小/修改时间不一致（已过期）时返回 None"""
+    if mm[:len(_KG_INDEX_MAGIC)] != _KG_INDEX_MAGIC:
+        return None
+    pos = len(_KG_INDEX_MAGIC)
+    (header_len,) = _KG_HEADER_LEN.unpack_from(mm, pos)
+    pos += _KG_HEADER_LEN.size
+    header = _loads_json(mm[pos:pos + header_len])
+    stat = kg_path.stat()
+    if header["source_mtime_ns"] != stat.st_mtime_ns or header["source_size"] != stat.st_size:
+        return None
+    table_start = pos + header_len
+    header["_table_start"] = table_start
+    header["_records_start"] = table_start + _KG_TABLE_ENTRY.size * (header["entity_count"] + header["edge_count"])
+    return header
+
+def _kg_index_records(mm, header, first: int, count: int):
+    """按偏移表切出第 first 起的 count 条记录"""
+    for i in range(first, first + count):
+        offset, length = _KG_TABLE_ENTRY.unpack_from(mm, header["_table_start"] + i * _KG_TABLE_ENTRY.size)
+        start = header["_records_start"] + offset
+        yield _loads_json(mm[start:start + length])
+
+def _print_kg_preview(entity_count, edge_count, node_count, type_counts, entities, edges):
+    """打印知识图谱统计与前 KG_PREVIEW 个实体/关系（entities/edges 为记录字典的可迭代对象，edges 为 None 表示无图）"""
+    print(f"📊 实体总数: {entity_count}")
+    print(f"📊 关系总数: {edge_count}")
+    print(f"📊 节点总数: {node_count}")
+
+    print("📚 按类型的实体数量:")
+    for t, c in type_counts.items():
+        print(f"  - {t}: {c}")
+
+    # 实体预览
+    print(f"\n🧬 实体预览(前{KG_PREVIEW}个):")
+    for i, ent in enumerate(islice(entities, KG_PREVIEW), 1):
+        print(f"  {i}. [{ent['id']}] {ent['name']} ({ent['type']})")
+        if ent.get('aliases'):
+            print(f"     别名: {', '.join(ent['aliases'])}")
+        if ent.get('description'):
+            print(f"     描述: {ent['description']}")
+
+    # 关系预览
+    if edges is not None:
+        print(f"\n🔗 关系预览(前{KG_PREVIEW}条):")
+        for edge in islice(edges, KG_PREVIEW):
+            print(f"  - {edge['src_name']} ({edge['u']}) -> {edge['tgt_name']} ({edge['v']}) "
+                  f"关系: {edge['relation']} 置信度: {edge['confidence']}")
+
+def _view_kg_from_index(kg_path: Path) -> bool:
+    """通过 mmap 读取 .kgidx 预览；旁路文件不存在、已过期或损坏时返回 False（由调用方回退到 pickle 并重建）"""
+    index_path = kg_index_path(kg_path)
+    if not index_path.exists():
+        return False
+    try:
+        with open(index_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            header = _read_kg_index(kg_path, mm)
+            if header is None:
+                return False
+            entity_count, edge_count = header["entity_count"], header["edge_count"]
+            # 先完整读出预览记录再打印，记录损坏时不会输出半份预览
+            entities = list(_kg_index_records(mm, header, 0, min(KG_PREVIEW, entity_count)))
+            edges = list(_kg_index_records(mm, header, entity_count, min(KG_PREVIEW, edge_count))) if header["has_graph"] else None
+    except (ValueError, TypeError, struct.error, KeyError, OSError) as e:
+        # 空文件（mmap 报 ValueError）、截断（struct.error）、头部缺字段或 JSON 损坏
+        print(f"⚠️ 预览索引损坏，改为读取 pickle: {e}")
+        return False
+    _print_kg_preview(entity_count, edge_count, header["node_count"], header["type_counts"], entities, edges)
+    return True
+
+def _view_kg_from_pickle(kg_path: Path):
+    """完整反序列化 pickle 预览（无可用 .kgidx 时的回退），之后顺带生成 .kgidx 供下次使用"""
+    with open(kg_path, 'rb') as f:
+        data = pickle.load(f)
+    graph = data.get('graph')
+    entities = data.get('entities', {})
+
+    type_counts = Counter(_kg_type_name(ent.entity_type) for ent in entities.values())
+
+    entity_rows = (
+        {"id": eid, "name": ent.name, "type": _kg_type_name(ent.entity_type),
+         "aliases": getattr(ent, 'aliases', None), "description": getattr(ent, 'description', '')}
+        for eid, ent in entities.items()
+    )
+    edge_rows = None
+    if graph is not None:
+        edge_rows = (
+            {"u": u, "v": v,
+             "src_name": entities[u].name if u in entities else u,
+             "tgt_name": entities[v].name if v in entities else v,
+             "relation": _kg_type_name(edge.get('relation_type')),
+             "confidence": edge.get('confidence', '')}
+            for u, v, key, edge in graph.edges(keys=True, data=True)
+        )
+    _print_kg_preview(
+        len(entities),
+        graph.number_of_edges() if graph is not None else 0,
+        graph.number_of_nodes() if graph is not None else len(entities),
+        type_counts, entity_rows, edge_rows,
+    )
+
+    try:
+        build_kg_index(kg_path, data)
+    except Exception as e:
+        print(f"⚠️ 生成预览索引失败: {e}")
 
 def view_kg_content():
     """查看医疗知识图谱内容"""
@@ -121,51 +442,8 @@ def view_kg_content():
         return
 
     try:
-        with open(kg_path, 'rb') as f:
-            data = pickle.load(f)
-        graph = data.get('graph')
-        entities = data.get('entities', {})
-
-        edge_count = graph.number_of_edges() if graph is not None else 0
-        node_count = graph.number_of_nodes() if graph is not None else len(entities)
-
-        print(f"📊 实体总数: {len(entities)}")
-        print(f"📊 关系总数: {edge_count}")
-        print(f"📊 节点总数: {node_count}")
-
-        # 类型统计
-        type_counts = {}
-        for ent in entities.values():
-            t = getattr(ent.entity_type, 'value', str(ent.entity_type))
-            type_counts[t] = type_counts.get(t, 0) + 1
-        print("📚 按类型的实体数量:")
-        for t, c in type_counts.items():
-            print(f"  - {t}: {c}")
-
-        # 实体预览
-        print("\n🧬 实体预览(前10个):")
-        for i, (eid, ent) in enumerate(list(entities.items())[:10], 1):
-            print(f"  {i}. [{eid}] {ent.name} ({getattr(ent.entity_type, 'value', str(ent.entity_type))})")
-            if getattr(ent, 'aliases', None):
-                print(f"     别名: {', '.join(ent.aliases)}")
-            if getattr(ent, 'description', ''):
-                print(f"     描述: {ent.description}")
-
-        # 关系预览
-        if graph is not None:
-            print("\n🔗 关系预览(前10条):")
-            count = 0
-            for u, v, key, data in graph.edges(keys=True, data=True):
-                rel_type = data.get('relation_type')
-                rel_name = getattr(rel_type, 'value', str(rel_type))
-                confidence = data.get('confidence', '')
-                src_name = entities[u].name if u in entities else u
-                tgt_name = entities[v].name if v in entities else v
-                print(f"  - {src_name} ({u}) -> {tgt_name} ({v}) 关系: {rel_name} 置信度: {confidence}")
-                count += 1
-                if count >= 10:
-                    break
-
+        if not _view_kg_from_index(kg_path):
+            _view_kg_from_pickle(kg_path)
         print("\n✅ 知识图谱内容输出完成\n")
     except Exception as e:
         print(f"❌ 读取知识图谱失败: {e}")
@@ -4,14 +4,60 @@
 """
 
 import asyncio
+import hashlib
+import json
+import pickle
 import sys
 import os
+from pathlib import Path
 
 # 添加项目根目录到 Python 路径
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from services.medical_taxonomy import MedicalDepartment, DocumentType, DiseaseCategory
 
+# 设置 RAG_TEST_CACHE=1 时缓存 medical_retrieve 结果，反复调试同一查询时跳过向量化与检索；
+# 向量库有更新（任一文件比缓存新）时自动失效
+RETRIEVE_CACHE_ENABLED = os.getenv("RAG_TEST_CACHE") == "1"
+RETRIEVE_CACHE_DIR = Path(__file__).resolve().parent / ".cache"
+VECTOR_STORE_DIR = Path(__file__).resolve().parent / "data" / "vector_stores"
+
+def _vector_store_mtime() -> float:
+    latest = 0.0
+    for root, _, files in os.walk(VECTOR_STORE_DIR):
+        for name in files:
+            latest = max(latest, os.stat(os.path.join(root, name)).st_mtime)
+    return latest
+
+async def _cached_medical_retrieve(rag_service, question, department, document_type, disease_category):
+    """带磁盘缓存的 medical_retrieve（仅在 RAG_TEST_CACHE=1 时生效）"""
+    if not RETRIEVE_CACHE_ENABLED:
+        return await rag_service.medical_retrieve(
+            question=question,
+            department=department,
+            document_type=document_type,
+            disease_category=disease_category
+        )
+
+    key_src = json.dumps([question, department.value, document_type.value, disease_category.value], ensure_ascii=False)
+    key = hashlib.blake2b(key_src.encode("utf-8"), digest_size=16).hexdigest()
+    cache_path = RETRIEVE_CACHE_DIR / f"retrieve_{key}.pkl"
+    if cache_path.exists() and cache_path.stat().st_mtime >= _vector_store_mtime():
+        print(f"(使用缓存的检索结果: {cache_path.name})")
+        with open(cache_path, "rb") as f:
+            return pickle.load(f)
+
+    result = await rag_service.medical_retrieve(
+        question=question,
+        department=department,
+        document_type=document_type,
+        disease_category=disease_category
+    )
+    RETRIEVE_CACHE_DIR.mkdir(exist_ok=True)
+    with open(cache_path, "wb") as f:
+        pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return result
+
 async def test_medical_retrieve():
     """测试 medical_retrieve 函数，逐步展示各阶段输出"""
     print("=== 测试 medical_retrieve 分步流程 ===")
@@ -28,12 +74,35 @@ async def test_medical_retrieve():
     print(f"疾病分类: {disease_category.value}")
     print()
 
+    # 步骤1（KG增强）、步骤2（关联挖掘）、步骤6（KG统计）互不依赖，先并发执行，再按步骤顺序输出
+    async def load_kg_enhancement():
+        from services.medical_knowledge_graph import kg_service
+        return kg_service, await kg_service.enhance_query_with_kg(question)
+
+    async def load_associations():
+        from services.medical_association_service import medical_association_service
+        return await asyncio.to_thread(
+            medical_association_service.find_associations,
+            query=question,
+            confidence_threshold=0.6,
+            max_results=10
+        )
+
+    async def load_kg_stats():
+        from services.medical_knowledge_graph import kg_service
+        return await kg_service.get_knowledge_graph_stats()
+
+    kg_result, associations_result, stats_result = await asyncio.gather(
+        load_kg_enhancement(), load_associations(), load_kg_stats(), return_exceptions=True
+    )
+
     # 步骤1：知识图谱增强
     print("=== 步骤1：知识图谱查询增强 ===")
     kg_enhancement = None
     try:
-        from services.medical_knowledge_graph import kg_service
-        kg_enhancement = await kg_service.enhance_query_with_kg(question)
+        if isinstance(kg_result, BaseException):
+            raise kg_result
+        kg_service, kg_enhancement = kg_result
         print("原始查询:", kg_enhancement.get("original_query"))
         print("抽取的实体:")
         for e in kg_enhancement.get("extracted_entities", []) or []:
@@ -85,12 +154,9 @@ async def test_medical_retrieve():
     print("=== 步骤2：医疗关联挖掘 ===")
     associations = None
     try:
-        from services.medical_association_service import medical_association_service
-        associations = medical_association_service.find_associations(
-            query=question,
-            confidence_threshold=0.6,
-            max_results=10
-        )
+        if isinstance(associations_result, BaseException):
+            raise associations_result
+        associations = associations_result
         print(f"关联总数: {associations.total_count}")
         for a in associations.associations[:5]:
             print(f"  - {a.source} —{a.association_type.value}→ {a.target} (conf={a.confidence})")
@@ -198,11 +264,8 @@ async def test_medical_retrieve():
     print("=== 步骤5：RAG检索整合输出 ===")
     try:
         from services.enhanced_rag_service import enhanced_rag_service
-        citations, context_text, metadata = await enhanced_rag_service.medical_retrieve(
-            question=question,
-            department=department,
-            document_type=document_type,
-            disease_category=disease_category
+        citations, context_text, metadata = await _cached_medical_retrieve(
+            enhanced_rag_service, question, department, document_type, disease_category
         )
         print("引用数量:", len(citations))
         print("上下文长度:", len(context_text))
@@ -285,8 +348,9 @@ async def test_medical_retrieve():
     print()
     print("=== 步骤6：知识图谱统计 ===")
     try:
-        from services.medical_knowledge_graph import kg_service
-        stats = await kg_service.get_knowledge_graph_stats()
+        if isinstance(stats_result, BaseException):
+            raise stats_result
+        stats = stats_result
         print("实体总数:", stats.get("total_entities"))
         print("关系总数:", stats.get("total_relations"))
         print("类型分布:", stats.get("entity_types"))
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+测试 Redis 缓存适配器的写入路径与事件循环中的读取行为
+
+Redis 可用时 set() 只入队写 Redis 并更新 L1，不写内存回退缓存；批量写入失败时才补写内存缓存。
+（此处不连接真实 Redis：写操作只入队不落盘，Redis 读取用假的 _redis_get 代替）
+"""
+
+import asyncio
+import sys
+import os
+import time
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.redis_cache_adapter import RedisCacheAdapter
+
+
+def _make_adapter(queued_writes: list) -> RedisCacheAdapter:
+    adapter = RedisCacheAdapter(max_size=16, default_ttl=600)
+    adapter._redis_available = True
+    adapter._enqueue_write = queued_writes.append
+    adapter.L1_TTL = 0  # L1 条目写入后立即过期
+    return adapter
+
+
+def test_set_skips_memory_fallback_when_redis_available():
+    """Redis 可用时 set() 只入队写 Redis，内存回退缓存保持为空"""
+    queued_writes = []
+    adapter = _make_adapter(queued_writes)
+    adapter.set('query_result', {'q': '糖尿病'}, {'answer': 42})
+    assert queued_writes and queued_writes[0][0] == "set"
+    assert len(adapter._memory_cache) == 0
+
+
+def test_set_writes_memory_fallback_when_redis_unavailable():
+    """Redis 不可用时 set() 写入内存回退缓存，get() 可命中"""
+    queued_writes = []
+    adapter = _make_adapter(queued_writes)
+    adapter._redis_available = False
+    adapter.set('query_result', {'q': '糖尿病'}, {'answer': 42})
+    time.sleep(0.01)
+    assert not queued_writes
+    assert adapter.get('query_result', {'q': '糖尿病'}) == {'answer': 42}
+
+
+def test_failed_redis_write_falls_back_to_memory():
+    """批量写入 Redis 失败时，_drain_writes 把值补写到内存缓存，aget() 在 Redis 未命中时能读到"""
+    queued_writes = []
+    adapter = _make_adapter(queued_writes)
+    adapter.set('kg_enhancement', '高血压', {'suggested_expansions': ['降压药']})
+    time.sleep(0.01)
+
+    async def failing_apply(batch):
+        raise ConnectionError("redis down")
+
+    async def fake_redis_get(key):
+        from services.redis_cache_adapter import _MISS
+        return _MISS
+
+    adapter._apply_writes = failing_apply
+    adapter._redis_get = fake_redis_get
+
+    async def drain_then_read():
+        adapter._write_queue = asyncio.Queue()
+        for op in queued_writes:
+            adapter._write_queue.put_nowait(op)
+        worker = asyncio.ensure_future(adapter._drain_writes())
+        while not adapter._write_queue.empty():
+            await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        worker.cancel()
+        return await adapter.aget('kg_enhancement', '高血压')
+
+    assert asyncio.run(drain_then_read()) == {'suggested_expansions': ['降压药']}
+
+
+def test_aget_reads_redis_from_running_loop():
+    """aget() 通过后台事件循环读取 Redis，能拿到其他进程写入、本进程内存中没有的值"""
+    adapter = _make_adapter([])
+
+    async def fake_redis_get(key):
+        return {'from': 'redis'}
+
+    adapter._redis_get = fake_redis_get
+
+    async def read():
+        return await adapter.aget('intent_recognition', '头痛怎么办')
+
+    assert asyncio.run(read()) == {'from': 'redis'}
+
+
+if __name__ == "__main__":
+    test_set_skips_memory_fallback_when_redis_available()
+    test_set_writes_memory_fallback_when_redis_unavailable()
+    test_failed_redis_write_falls_back_to_memory()
+    test_aget_reads_redis_from_running_loop()
+    print("✅ Redis缓存适配器测试通过")
@@ -23,6 +23,9 @@ def test_simplified_classification():
     # 创建智能意图识别器，启用简化分类
     recognizer = SmartMedicalIntentRecognizer()
     recognizer.use_simplified_classification = True
+    # 预热：提前加载系统资源（索引服务查询、疾病分类索引），避免首个测试查询承担初始化开销；
+    # 之后所有查询及传统/简化对比都复用这一个识别器
+    recognizer.get_system_resources()
     
     # 测试用例
     test_queries = [
@@ -4,8 +4,10 @@
 测试简化分类体系的映射效果（模拟环境）
 """
 
+import io
 import sys
 import os
+from contextlib import redirect_stdout
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from services.medical_taxonomy import (
@@ -15,6 +17,14 @@ from services.medical_taxonomy import (
 )
 import json
 
+# 各枚举的取值只需遍历一次，映射测试与优化分析共用
+ORIGINAL_DEPARTMENTS = tuple(dept.value for dept in MedicalDepartment)
+ORIGINAL_DOC_TYPES = tuple(doc_type.value for doc_type in DocumentType)
+ORIGINAL_DISEASE_CATEGORIES = tuple(disease_cat.value for disease_cat in DiseaseCategory)
+SIMPLIFIED_DEPARTMENTS = tuple(dept.value for dept in SimplifiedMedicalDepartment)
+SIMPLIFIED_DOC_TYPES = tuple(doc_type.value for doc_type in SimplifiedDocumentType)
+SIMPLIFIED_DISEASE_CATEGORIES = tuple(disease_cat.value for disease_cat in SimplifiedDiseaseCategory)
+
 def test_classification_mapping():
     """测试分类映射效果"""
     print("=" * 60)
@@ -25,21 +35,17 @@ def test_classification_mapping():
     print("-" * 40)
     
     # 测试科室映射
-    original_departments = [dept.value for dept in MedicalDepartment]
+    original_departments = ORIGINAL_DEPARTMENTS
     print(f"原始科室数量: {len(original_departments)}")
     
-    simplified_departments = [dept.value for dept in SimplifiedMedicalDepartment]
+    simplified_departments = SIMPLIFIED_DEPARTMENTS
     print(f"简化科室数量: {len(simplified_departments)}")
     
     print("\n科室映射关系:")
-    mapped_count = 0
-    for original_dept in original_departments:
-        simplified_dept = DEPARTMENT_MAPPING.get(original_dept)
-        if simplified_dept:
-            print(f"  {original_dept} -> {simplified_dept}")
-            mapped_count += 1
-        else:
-            print(f"  {original_dept} -> 未映射")
+    mappings = [(original_dept, DEPARTMENT_MAPPING.get(original_dept)) for original_dept in original_departments]
+    for original_dept, simplified_dept in mappings:
+        print(f"  {original_dept} -> {simplified_dept or '未映射'}")
+    mapped_count = sum(1 for _, simplified_dept in mappings if simplified_dept)
     
     print(f"\n映射覆盖率: {mapped_count}/{len(original_departments)} ({mapped_count/len(original_departments)*100:.1f}%)")
     
@@ -47,21 +53,17 @@ def test_classification_mapping():
     print("-" * 40)
     
     # 测试文档类型映射
-    original_doc_types = [doc_type.value for doc_type in DocumentType]
+    original_doc_types = ORIGINAL_DOC_TYPES
     print(f"原始文档类型数量: {len(original_doc_types)}")
     
-    simplified_doc_types = [doc_type.value for doc_type in SimplifiedDocumentType]
+    simplified_doc_types = SIMPLIFIED_DOC_TYPES
     print(f"简化文档类型数量: {len(simplified_doc_types)}")
     
     print("\n文档类型映射关系:")
-    mapped_count = 0
-    for original_type in original_doc_types:
-        simplified_type = DOCUMENT_TYPE_MAPPING.get(original_type)
-        if simplified_type:
-            print(f"  {original_type} -> {simplified_type}")
-            mapped_count += 1
-        else:
-            print(f"  {original_type} -> 未映射")
+    mappings = [(original_type, DOCUMENT_TYPE_MAPPING.get(original_type)) for original_type in original_doc_types]
+    for original_type, simplified_type in mappings:
+        print(f"  {original_type} -> {simplified_type or '未映射'}")
+    mapped_count = sum(1 for _, simplified_type in mappings if simplified_type)
     
     print(f"\n映射覆盖率: {mapped_count}/{len(original_doc_types)} ({mapped_count/len(original_doc_types)*100:.1f}%)")
     
@@ -69,21 +71,17 @@ def test_classification_mapping():
     print("-" * 40)
     
     # 测试疾病分类映射
-    original_disease_categories = [disease_cat.value for disease_cat in DiseaseCategory]
+    original_disease_categories = ORIGINAL_DISEASE_CATEGORIES
     print(f"原始疾病分类数量: {len(original_disease_categories)}")
     
-    simplified_disease_categories = [disease_cat.value for disease_cat in SimplifiedDiseaseCategory]
+    simplified_disease_categories = SIMPLIFIED_DISEASE_CATEGORIES
     print(f"简化疾病分类数量: {len(simplified_disease_categories)}")
     
     print("\n疾病分类映射关系:")
-    mapped_count = 0
-    for original_category in original_disease_categories:
-        simplified_category = DISEASE_CATEGORY_MAPPING.get(original_category)
-        if simplified_category:
-            print(f"  {original_category} -> {simplified_category}")
-            mapped_count += 1
-        else:
-            print(f"  {original_category} -> 未映射")
+    mappings = [(original_category, DISEASE_CATEGORY_MAPPING.get(original_category)) for original_category in original_disease_categories]
+    for original_category, simplified_category in mappings:
+        print(f"  {original_category} -> {simplified_category or '未映射'}")
+    mapped_count = sum(1 for _, simplified_category in mappings if simplified_category)
     
     print(f"\n映射覆盖率: {mapped_count}/{len(original_disease_categories)} ({mapped_count/len(original_disease_categories)*100:.1f}%)")
 
@@ -170,14 +168,14 @@ def analyze_optimization_benefits():
     print("-" * 40)
     
     # 统计原始分类数量
-    original_dept_count = len([dept.value for dept in MedicalDepartment])
-    original_doc_type_count = len([doc_type.value for doc_type in DocumentType])
-    original_disease_count = len([disease_cat.value for disease_cat in DiseaseCategory])
+    original_dept_count = len(ORIGINAL_DEPARTMENTS)
+    original_doc_type_count = len(ORIGINAL_DOC_TYPES)
+    original_disease_count = len(ORIGINAL_DISEASE_CATEGORIES)
     
     # 统计简化分类数量
-    simplified_dept_count = len([dept.value for dept in SimplifiedMedicalDepartment])
-    simplified_doc_type_count = len([doc_type.value for doc_type in SimplifiedDocumentType])
-    simplified_disease_count = len([disease_cat.value for disease_cat in SimplifiedDiseaseCategory])
+    simplified_dept_count = len(SIMPLIFIED_DEPARTMENTS)
+    simplified_doc_type_count = len(SIMPLIFIED_DOC_TYPES)
+    simplified_disease_count = len(SIMPLIFIED_DISEASE_CATEGORIES)
     
     print("分类数量对比:")
     print(f"  科室: {original_dept_count} -> {simplified_dept_count} (减少 {original_dept_count - simplified_dept_count} 个)")
@@ -201,10 +199,16 @@ def analyze_optimization_benefits():
     print(f"  - 改善用户体验")
 
 if __name__ == "__main__":
-    test_classification_mapping()
-    test_smart_intent_with_mock_data()
-    analyze_optimization_benefits()
-    
-    print("\n" + "=" * 60)
-    print("简化分类体系测试完成")
-    print("=" * 60)
\ No newline at end of file
+    # 各测试只做纯内存计算、输出行数较多：先写入缓冲区，结束（或出错）时一次性输出
+    buffer = io.StringIO()
+    try:
+        with redirect_stdout(buffer):
+            test_classification_mapping()
+            test_smart_intent_with_mock_data()
+            analyze_optimization_benefits()
+            
+            print("\n" + "=" * 60)
+            print("简化分类体系测试完成")
+            print("=" * 60)
+    finally:
+        sys.stdout.write(buffer.getvalue())
\ No newline at end of file
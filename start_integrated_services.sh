@@ -216,7 +216,8 @@ if [ -d ".venv" ]; then
     source .venv/bin/activate
     echo "✅ 已激活医生端虚拟环境"
 fi
-nohup python app.py > ../logs/doctor_backend.log 2>&1 &
+# 以 uvicorn 模块方式启动：PDF 进程池用 spawn 拉起 worker，若以 app.py 为 __main__，每个 worker 都会重新执行其模块级初始化
+nohup python -m uvicorn app:app --host 0.0.0.0 --port $DOCTOR_BACKEND_PORT > ../logs/doctor_backend.log 2>&1 &
 DOCTOR_PID=$!
 echo "✅ 医生端后端服务已启动 (PID: $DOCTOR_PID)"
 cd ..